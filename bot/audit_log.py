@@ -0,0 +1,209 @@
+'''
+A local, append-only audit log of the actions of the bot and its users.
+
+Records are queued by the event loop and written in batches by a writer
+thread, so appending never waits for the disk. The records are stored in
+a SQLite database in WAL mode with indexes for the lookups of the /audit
+command (by user, by channel and by time).
+'''
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+DEFAULT_AUDIT_PATH = "audit.db"
+
+
+@dataclass
+class AuditRecord:
+    guild_id: int
+    channel_id: int
+    user_id: int
+    action: str
+    target_id: Optional[int] = None
+    details: Optional[str] = None
+    created_at: int = field(default_factory=lambda: int(time.time()))
+
+    def to_row(self) -> tuple:
+        return (
+            self.created_at,
+            self.guild_id,
+            self.channel_id,
+            self.user_id,
+            self.action,
+            self.target_id,
+            self.details
+        )
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    created_at INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    target_id INTEGER,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS audit_log_guild ON audit_log (guild_id, created_at);
+CREATE INDEX IF NOT EXISTS audit_log_user ON audit_log (guild_id, user_id, created_at);
+CREATE INDEX IF NOT EXISTS audit_log_target ON audit_log (guild_id, target_id, created_at);
+CREATE INDEX IF NOT EXISTS audit_log_channel ON audit_log (channel_id, created_at);
+"""
+
+COLUMNS = "created_at, guild_id, channel_id, user_id, action, target_id, details"
+
+
+def connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    # shard processes share the file
+    connection.execute("PRAGMA busy_timeout=5000")
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class AuditLog:
+    '''
+    This class appends audit records to the database through a writer thread.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        path: str = DEFAULT_AUDIT_PATH,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        logger: logging.Logger = None
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue: queue.Queue[Optional[AuditRecord]] = queue.Queue()
+        self.written = 0
+        # records of batches that could not be written
+        self.failed = 0
+
+        connection = connect(path)
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self.thread = threading.Thread(target=self._writer, name="audit-log-writer", daemon=True)
+        self.thread.start()
+
+    def append(self, record: AuditRecord) -> None:
+        '''Queue a record, it is written with the next batch.'''
+        self.queue.put_nowait(record)
+
+    def _writer(self) -> None:
+        connection = connect(self.path)
+        running = True
+        while running:
+            # wait for the first record, then collect the batch
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            # None stops the writer after the records before it
+            if None in batch:
+                running = False
+            records = [record for record in batch if record is not None]
+
+            try:
+                if records:
+                    self._write(connection, records)
+            except sqlite3.Error as e:
+                # a failed batch is dropped, the writer keeps running for the next ones
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                self.failed += len(records)
+                self.logger.error(f"Failed to write {len(records)} audit records: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, records: list[AuditRecord]) -> None:
+        # one transaction per batch
+        connection.execute("BEGIN")
+        connection.executemany(
+            f"INSERT INTO audit_log ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [record.to_row() for record in records]
+        )
+        connection.execute("COMMIT")
+        self.written += len(records)
+
+    def flush(self) -> None:
+        '''Block until every queued record is written.'''
+        self.queue.join()
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def query(
+        self,
+        guild_id: int,
+        user_id: int = None,
+        channel_id: int = None,
+        since: int = None,
+        until: int = None,
+        limit: int = 20
+    ) -> list[AuditRecord]:
+        '''
+        Get the newest records of a guild.
+        A user matches as actor and as target of an action.
+        This blocks, the event loop should call it in a thread.
+        '''
+        conditions = ["guild_id = ?"]
+        parameters: list = [guild_id]
+        if user_id is not None:
+            conditions.append("(user_id = ? OR target_id = ?)")
+            parameters += [user_id, user_id]
+        if channel_id is not None:
+            conditions.append("channel_id = ?")
+            parameters.append(channel_id)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("created_at <= ?")
+            parameters.append(until)
+
+        connection = connect(self.path)
+        try:
+            rows = connection.execute(
+                f"SELECT {COLUMNS} FROM audit_log WHERE {' AND '.join(conditions)} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                parameters + [limit]
+            ).fetchall()
+        finally:
+            connection.close()
+
+        return [
+            AuditRecord(
+                created_at=created_at,
+                guild_id=guild_id,
+                channel_id=channel_id,
+                user_id=user_id,
+                action=action,
+                target_id=target_id,
+                details=details
+            )
+            for created_at, guild_id, channel_id, user_id, action, target_id, details in rows
+        ]
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import threading
+
+# custom imports
+from bot.audit_log import SCHEMA, AuditLog, AuditRecord, connect
+
+
+def test_append_and_query() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        audit_log = AuditLog(os.path.join(directory, "audit.db"), flush_interval=0.01)
+        audit_log.append(AuditRecord(guild_id=1, channel_id=10, user_id=100, action="create", created_at=1000))
+        audit_log.append(AuditRecord(guild_id=1, channel_id=10, user_id=100, action="ban", target_id=200, created_at=1010))
+        audit_log.append(AuditRecord(guild_id=1, channel_id=11, user_id=300, action="lock", created_at=1020))
+        audit_log.append(AuditRecord(guild_id=2, channel_id=20, user_id=100, action="create", created_at=1030))
+        audit_log.flush()
+
+        assert audit_log.written == 4
+        assert [r.action for r in audit_log.query(1, user_id=100)] == ["ban", "create"]
+        assert [r.action for r in audit_log.query(1, user_id=200)] == ["ban"], "Targets should match the user"
+        assert [r.action for r in audit_log.query(1, channel_id=11)] == ["lock"]
+        assert [r.action for r in audit_log.query(1, since=1005, until=1015)] == ["ban"]
+        assert len(audit_log.query(1, limit=2)) == 2
+
+        audit_log.close()
+        assert not audit_log.thread.is_alive(), "The writer should stop on close"
+
+
+def test_failed_batch_does_not_stop_the_writer() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "audit.db")
+        audit_log = AuditLog(path, flush_interval=0.01)
+        connection = connect(path)
+        connection.execute("DROP TABLE audit_log")
+
+        audit_log.append(AuditRecord(guild_id=1, channel_id=10, user_id=100, action="create"))
+        flush = threading.Thread(target=audit_log.flush)
+        flush.start()
+        flush.join(timeout=5)
+        assert not flush.is_alive(), "A failed batch should not block the flush"
+        assert audit_log.failed == 1
+
+        # the next batch is written once the database works again
+        connection.executescript(SCHEMA)
+        connection.close()
+        audit_log.append(AuditRecord(guild_id=1, channel_id=10, user_id=100, action="lock"))
+        audit_log.flush()
+        assert audit_log.written == 1
+        assert [r.action for r in audit_log.query(1)] == ["lock"]
+
+        audit_log.close()
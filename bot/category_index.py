@@ -0,0 +1,63 @@
+from typing import Iterable, Optional
+
+# discord allows at most 50 channels in one category
+CATEGORY_CHANNEL_LIMIT = 50
+
+
+class CategoryIndex:
+    '''
+    This class keeps the channel ids of the creator categories.
+    A category is seeded from the cache the first time it is needed and kept
+    up to date by the channel events, so placing a channel does not walk
+    the channels of the guild.
+    Creations that are still running reserve a slot in their category.
+    '''
+
+    def __init__(self, limit: int = CATEGORY_CHANNEL_LIMIT):
+        self.limit = limit
+        self.channels: dict[int, set[int]] = {}
+        self.reserved: dict[int, int] = {}
+
+    def is_known(self, category_id: int) -> bool:
+        return int(category_id) in self.channels
+
+    def seed(self, category_id: int, channel_ids: Iterable[int]) -> None:
+        self.channels[int(category_id)] = {int(channel_id) for channel_id in channel_ids}
+
+    def add(self, category_id: Optional[int], channel_id: int) -> None:
+        # unknown categories are seeded from the cache when they are needed
+        if category_id is not None and self.is_known(category_id):
+            self.channels[int(category_id)].add(int(channel_id))
+
+    def remove(self, category_id: Optional[int], channel_id: int) -> None:
+        if category_id is not None and self.is_known(category_id):
+            self.channels[int(category_id)].discard(int(channel_id))
+
+    def forget(self, category_id: int) -> None:
+        self.channels.pop(int(category_id), None)
+        self.reserved.pop(int(category_id), None)
+
+    def count(self, category_id: int) -> int:
+        category_id = int(category_id)
+        return len(self.channels.get(category_id, ())) + self.reserved.get(category_id, 0)
+
+    def pick(self, category_ids: Iterable[int]) -> Optional[int]:
+        '''
+        Get the first category with room for another channel.
+        '''
+        for category_id in category_ids:
+            if self.count(category_id) < self.limit:
+                return category_id
+        return None
+
+    def reserve(self, category_id: int) -> None:
+        category_id = int(category_id)
+        self.reserved[category_id] = self.reserved.get(category_id, 0) + 1
+
+    def release(self, category_id: int) -> None:
+        category_id = int(category_id)
+        remaining = self.reserved.get(category_id, 0) - 1
+        if remaining > 0:
+            self.reserved[category_id] = remaining
+        else:
+            self.reserved.pop(category_id, None)
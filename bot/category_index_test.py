@@ -0,0 +1,27 @@
+# custom imports
+from bot.category_index import CategoryIndex
+
+
+def test_pick_first_category_with_room() -> None:
+    index = CategoryIndex(limit=2)
+    index.seed(1, [10, 11])
+    index.seed(2, [20])
+
+    assert index.pick([1, 2]) == 2, "A full category should be skipped"
+
+    index.reserve(2)
+    assert index.pick([1, 2]) is None, "A reserved slot should count as a channel"
+
+    index.release(2)
+    index.add(2, 21)
+    index.add(2, 21)
+    assert index.count(2) == 2, "Adding a channel twice should count once"
+
+    index.remove(1, 10)
+    assert index.pick([1, 2]) == 1
+
+
+def test_unknown_category_is_ignored() -> None:
+    index = CategoryIndex()
+    index.add(5, 50)
+    assert not index.is_known(5), "Events should not seed a category"
@@ -1,5 +1,6 @@
 import time
-from interactions import GuildText, AllowedMentions
+from typing import Optional
+from interactions import GuildText, AllowedMentions, BaseChannel, Guild
 
 
 def now() -> int:
@@ -34,3 +35,46 @@ async def send_log_message(
         return True
     except Exception as e:
         return False
+
+
+class LogChannelCache:
+    '''
+    This class caches the log channel of every guild.
+    Entries are invalidated by the channel events and on reload.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(self):
+        self.channels: dict[int, GuildText] = {}
+
+    def get(
+        self,
+        guild: Guild,
+        log_channel_id: Optional[int]
+    ) -> Optional[GuildText]:
+        if not log_channel_id:
+            return None
+
+        channel = self.channels.get(guild.id)
+        if channel is not None and channel.id == log_channel_id:
+            return channel
+
+        # missing channels are not cached, they may be created later
+        channel = guild.get_channel(log_channel_id)
+        if channel is not None:
+            self.channels[guild.id] = channel
+        return channel
+
+    def invalidate_channel(self, channel: BaseChannel) -> None:
+        guild = getattr(channel, "guild", None)
+        if guild is None:
+            return
+        cached = self.channels.get(guild.id)
+        if cached is not None and cached.id == channel.id:
+            del self.channels[guild.id]
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        self.channels.pop(guild_id, None)
+
+    def clear(self) -> None:
+        self.channels.clear()
@@ -1,13 +1,17 @@
 import time
 from datetime import datetime
 from dataclasses import dataclass
-from typing import Optional
-from interactions import GuildVoice, Member
+from typing import Iterable, Optional
+from interactions import Guild, GuildVoice, Member
 from interactions import PermissionOverwrite, Permissions
+from interactions.client.errors import NotFound
 
 # custom imports
 from bot.config_loader import Creator
 from bot.rate_limiter import RateLimitManager, RateLimitResponse
+from bot.state_backend import StateBackend, MemoryStateBackend, ChannelRecord
+from bot.channel_status import update_voice_channel_status
+from bot.category_index import CategoryIndex
 
 
 @dataclass
@@ -27,6 +31,21 @@ class TempChannel:
         minutes, seconds = divmod(remainder, 60)
         return f"{hours}h {minutes}m {seconds}s"
 
+    @property
+    def owner_id(self) -> int:
+        '''
+        The owner is stored as a Member or as an id
+        '''
+        return int(getattr(self.owner, "id", self.owner))
+
+    def to_record(self) -> ChannelRecord:
+        return ChannelRecord(
+            channel_id=int(self.channel.id),
+            guild_id=int(self.channel.guild.id),
+            owner_id=self.owner_id,
+            created_at=self.created_at
+        )
+
     def __repr__(self) -> str:
         return f"TempChannel(channel={self.channel}, owner={self.owner})"
 
@@ -39,17 +58,135 @@ class TempChannelManager:
 
     def __init__(
         self,
-        rate_limiter: RateLimitManager
+        rate_limiter: RateLimitManager,
+        backend: StateBackend = None
     ):
         self.channels: dict[int, TempChannel] = {}
+        # channel id -> ids of the connected members
+        # it is updated by the voice events, so emptiness checks do not walk the voice states
+        self.occupants: dict[int, set[int]] = {}
+        # owner id -> ids of the owned channels
+        self.owners: dict[int, set[int]] = {}
+        # channels per creator category, to find a category with room
+        self.categories = CategoryIndex()
+        # how often the registry was changed by something else than the bot
+        self.external_changes: dict[str, int] = {}
         self.rate_limiter = rate_limiter
+        # the backend mirrors the registry for other processes
+        self.backend = backend if backend is not None else MemoryStateBackend()
+
+    def _index_owner(self, tempchannel: TempChannel) -> None:
+        self.owners.setdefault(tempchannel.owner_id, set()).add(int(tempchannel.channel.id))
+
+    def _unindex_owner(self, tempchannel: TempChannel) -> None:
+        channel_ids = self.owners.get(tempchannel.owner_id)
+        if channel_ids is None:
+            return
+        channel_ids.discard(int(tempchannel.channel.id))
+        if not channel_ids:
+            del self.owners[tempchannel.owner_id]
 
     def _add_channel(self, tempchannel: TempChannel) -> None:
         self.channels[tempchannel.channel.id] = tempchannel
+        self._index_owner(tempchannel)
+        self.backend.set_channel(tempchannel.to_record())
 
     def _remove_channel_by_id(self, channel_id: int) -> None:
         if channel_id in self.channels:
+            self._unindex_owner(self.channels[channel_id])
             del self.channels[channel_id]
+        self.occupants.pop(channel_id, None)
+        self.backend.remove_channel(channel_id)
+
+    def evict_channel(self, channel_id: int, reason: str) -> bool:
+        '''
+        Remove a channel that was deleted or moved by someone else.
+        Returns False if the channel is not registered.
+        '''
+        if channel_id not in self.channels:
+            return False
+        self._remove_channel_by_id(channel_id)
+        self.external_changes[reason] = self.external_changes.get(reason, 0) + 1
+        return True
+
+    def evict_guild(self, guild_id: int) -> list[int]:
+        '''
+        Remove every channel of a guild the bot has left.
+        Returns the ids of the removed channels.
+        '''
+        channel_ids = [
+            channel_id
+            for channel_id, tempchannel in self.channels.items()
+            if tempchannel.channel.guild.id == guild_id
+        ]
+        for channel_id in channel_ids:
+            self.evict_channel(channel_id, "guild_left")
+        return channel_ids
+
+    # raw: occupancy
+    def member_joined(self, channel_id: int, member_id: int) -> None:
+        self.occupants.setdefault(int(channel_id), set()).add(int(member_id))
+
+    def member_left(self, channel_id: int, member_id: int) -> None:
+        members = self.occupants.get(int(channel_id))
+        if members is None:
+            return
+        members.discard(int(member_id))
+        if not members:
+            del self.occupants[int(channel_id)]
+
+    def seed_occupancy(self, voice_states: Iterable[tuple[int, int]]) -> None:
+        '''
+        Replace the occupancy index with (channel id, member id) pairs from the cache.
+        '''
+        self.occupants = {}
+        for channel_id, member_id in voice_states:
+            self.member_joined(channel_id, member_id)
+
+    def occupancy(self, channel_id: int) -> int:
+        return len(self.occupants.get(int(channel_id), ()))
+
+    def is_empty(self, channel_id: int) -> bool:
+        return int(channel_id) not in self.occupants
+
+    def get_members(self, channel_id: int) -> set[int]:
+        '''
+        Get the ids of the members connected to the channel.
+        '''
+        return set(self.occupants.get(int(channel_id), ()))
+
+    def set_owner(
+        self,
+        tempchannel: TempChannel,
+        owner: Member
+    ) -> None:
+        '''
+        Change the owner of a temporary channel
+        '''
+        self._unindex_owner(tempchannel)
+        tempchannel.owner = owner
+        self._index_owner(tempchannel)
+        self.backend.set_channel(tempchannel.to_record())
+
+    def pick_category(
+        self,
+        guild: Guild,
+        creator: Creator
+    ) -> Optional[int]:
+        '''
+        Get the first category of the creator with room for another channel
+        '''
+        for category_id in creator.general.categories:
+            if not self.categories.is_known(category_id):
+                category = guild.get_channel(category_id)
+                if category is None:
+                    continue
+                self.categories.seed(category_id, [channel.id for channel in category.channels])
+        return self.categories.pick(
+            category_id
+            for category_id in creator.general.categories
+            if self.categories.is_known(category_id)
+        )
 
     async def create_channel(
         self,
@@ -61,6 +198,13 @@ class TempChannelManager:
         Create a new temporary channel while respecting the creator config
         '''
 
+        category_id = self.pick_category(previous_channel.guild, creator)
+        if category_id is None:
+            previous_channel.bot.logger.error(
+                f"Error creating channel: all categories of creator '{creator.general.name}' are full"
+            )
+            return None
+
         default_role = owner.guild.default_role
         overwrites = []
         if creator.default.copy_permissions:
@@ -85,12 +229,14 @@ class TempChannelManager:
             owner_overwrite.add_allows(Permissions.CONNECT)
             overwrites.append(owner_overwrite)
 
+        # the slot is reserved until the channel exists
+        self.categories.reserve(category_id)
         try:
             name = owner.nickname or owner.username
             new_channel = await previous_channel.guild.create_voice_channel(
 
                 # where
-                category=creator.general.category,
+                category=category_id,
 
                 # why
                 reason=f"User '{owner.username}' ({owner.id}) joined '{previous_channel.name}'",
@@ -107,6 +253,7 @@ class TempChannelManager:
             )
 
             # add the new channel to the list of channels
+            self.categories.add(category_id, new_channel.id)
             self._add_channel(
                 TempChannel(
                     channel=new_channel,
@@ -123,6 +270,41 @@ class TempChannelManager:
             )
             return None
 
+        finally:
+            self.categories.release(category_id)
+
+    async def apply_default_status(
+        self,
+        channel: GuildVoice,
+        owner: Member,
+        creator: Creator,
+    ) -> bool:
+        '''
+        Apply the default status of the creator to a new temporary channel
+        '''
+        if not creator.default.channel_status:
+            return False
+
+        try:
+            name = owner.nickname or owner.username
+            response = await update_voice_channel_status(
+                client=channel.bot,
+                channel_id=channel.id,
+                status=creator.default.channel_status.format(name),
+                audit_log_reason=f"Standardstatus für '{owner.username}' ({owner.id})"
+            )
+            if not response:
+                channel.bot.logger.error(
+                    f"Error applying default status: {response.error}"
+                )
+            return bool(response)
+
+        except Exception as e:
+            channel.bot.logger.error(
+                f"Error applying default status: {e}"
+            )
+            return False
+
     async def delete_channel(
         self,
         channel: GuildVoice,
@@ -131,19 +313,33 @@ class TempChannelManager:
         Delete a temporary channel
         '''
 
+        # the delete event usually arrives before the request returns,
+        # an unregistered channel is not taken for an external delete
+        tempchannel = self.channels.get(channel.id)
+        occupants = self.occupants.get(channel.id)
+        self._remove_channel_by_id(channel.id)
+
         try:
             await channel.delete(
                 reason=f"All users left the channel '{channel.name}'"
             )
-            self._remove_channel_by_id(channel.id)
-            return True
-
+        except NotFound:
+            # deleted by someone else in the meantime
+            pass
         except Exception as e:
             channel.bot.logger.error(
                 f"Error deleting channel: {e}"
             )
+            # the channel still exists
+            if tempchannel is not None:
+                self._add_channel(tempchannel)
+            if occupants:
+                self.occupants[channel.id] = occupants
             return False
 
+        self.categories.remove(channel.parent_id, channel.id)
+        return True
+
     def get_channel_by_id(
         self,
         channel_id: int,
@@ -153,3 +349,23 @@ class TempChannelManager:
         '''
 
         return self.channels.get(channel_id, None)
+
+    def get_channels_by_owner(
+        self,
+        owner_id: int,
+        guild_id: int = None
+    ) -> list[TempChannel]:
+        '''
+        Get the temporary channels of an owner, optionally only of one guild
+        '''
+        tempchannels = [
+            self.channels[channel_id]
+            for channel_id in self.owners.get(int(owner_id), ())
+            if channel_id in self.channels
+        ]
+        if guild_id is not None:
+            tempchannels = [
+                tempchannel for tempchannel in tempchannels
+                if tempchannel.channel.guild.id == guild_id
+            ]
+        return sorted(tempchannels, key=lambda tempchannel: tempchannel.created_at)
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+# custom imports
+from bot.channel_manager import TempChannel, TempChannelManager
+from bot.rate_limiter import RateLimitManager
+
+
+def make_manager() -> TempChannelManager:
+    return TempChannelManager(rate_limiter=RateLimitManager())
+
+
+def test_occupancy_index() -> None:
+    manager = make_manager()
+    manager.seed_occupancy([(1, 10), (1, 11), (2, 12)])
+
+    assert manager.occupancy(1) == 2
+    manager.member_left(1, 10)
+    assert not manager.is_empty(1)
+    manager.member_left(1, 11)
+    assert manager.is_empty(1), "The channel should be empty after the last member left"
+    assert 1 not in manager.occupants, "Empty channels should be removed from the index"
+
+    manager.member_left(3, 10)
+    assert manager.is_empty(3), "Leaving an unknown channel should be ignored"
+    assert manager.get_members(2) == {12}
+
+
+def test_owner_index() -> None:
+    manager = make_manager()
+    guild = SimpleNamespace(id=1)
+    first = TempChannel(channel=SimpleNamespace(id=10, guild=guild), owner=SimpleNamespace(id=100), created_at=1)
+    second = TempChannel(channel=SimpleNamespace(id=11, guild=guild), owner=SimpleNamespace(id=100), created_at=2)
+    manager._add_channel(first)
+    manager._add_channel(second)
+
+    assert manager.get_channels_by_owner(100) == [first, second]
+    assert manager.get_channels_by_owner(100, guild_id=2) == []
+
+    manager.set_owner(first, SimpleNamespace(id=200))
+    assert manager.get_channels_by_owner(200) == [first]
+
+    manager._remove_channel_by_id(11)
+    assert manager.get_channels_by_owner(100) == []
+    assert 100 not in manager.owners, "Owners without channels should be removed from the index"
+
+
+def test_evict_external_changes() -> None:
+    manager = make_manager()
+    guild = SimpleNamespace(id=1)
+    for channel_id in (10, 11):
+        manager._add_channel(TempChannel(
+            channel=SimpleNamespace(id=channel_id, guild=guild),
+            owner=SimpleNamespace(id=100),
+            created_at=1
+        ))
+
+    assert manager.evict_channel(10, "delete")
+    assert not manager.evict_channel(10, "delete"), "A removed channel should not be counted twice"
+    assert manager.evict_guild(1) == [11]
+    assert manager.channels == {}
+    assert manager.external_changes == {"delete": 1, "guild_left": 1}
+
+
+class FakeChannel:
+    """
+    A channel whose delete event arrives before the request returns.
+    """
+
+    def __init__(self, manager: TempChannelManager, channel_id: int, fails: bool = False):
+        self.id = channel_id
+        self.name = f"channel {channel_id}"
+        self.parent_id = 5
+        self.guild = SimpleNamespace(id=1)
+        self.bot = SimpleNamespace(logger=SimpleNamespace(error=lambda message: None))
+        self.manager = manager
+        self.fails = fails
+
+    async def delete(self, reason: str = None) -> None:
+        if self.fails:
+            raise RuntimeError("Missing permissions")
+        # the gateway event of the delete
+        self.manager.evict_channel(self.id, "delete")
+
+
+def test_delete_is_not_an_external_change() -> None:
+    manager = make_manager()
+    channel = FakeChannel(manager, 10)
+    manager._add_channel(TempChannel(channel=channel, owner=SimpleNamespace(id=100), created_at=1))
+
+    assert asyncio.run(manager.delete_channel(channel))
+    assert manager.channels == {}
+    assert manager.external_changes == {}, "The own delete should not be counted as external"
+
+
+def test_failed_delete_keeps_the_channel() -> None:
+    manager = make_manager()
+    channel = FakeChannel(manager, 10, fails=True)
+    tempchannel = TempChannel(channel=channel, owner=SimpleNamespace(id=100), created_at=1)
+    manager._add_channel(tempchannel)
+
+    assert not asyncio.run(manager.delete_channel(channel))
+    assert manager.get_channel_by_id(10) is tempchannel, "The channel should be registered again"
+    assert manager.get_channels_by_owner(100) == [tempchannel]
@@ -9,56 +9,132 @@ To keep track of the changes and discussions regarding this endpoint
 you can refer to the following links:
 - https://github.com/discord/discord-api-docs/pull/6400
 - https://github.com/discord/discord-api-docs/pull/6398
+
+The request is sent through the HTTP client of interactions.py.
+It reuses the pooled keep-alive session of the bot and shares the
+rate limit buckets (including the global limit) with all other requests.
+The client retries 429s itself, a request that is still limited after the
+last attempt returns None instead of raising.
 '''
 
-import requests
+import asyncio
+import functools
+import time
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from interactions import Client
+from interactions.api.http.route import Route
+from interactions.client.errors import HTTPException
+
+
+@dataclass
+class StatusUpdateResponse:
+    success: bool
+    retry_after: float = 0.0
+    error: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def end_time(self) -> int:
+        return int(time.time() + self.retry_after)
 
 
-def update_voice_channel_status(
-    bot_token: str,
-    channel_id: str,
+def parse_retry_after(headers: Mapping[str, str]) -> float:
+    """
+    Get the seconds to wait from the headers of a response.
+    Retry-After is only sent with a 429 and is the most precise source.
+    """
+    for header in ("Retry-After", "X-RateLimit-Reset-After"):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return 0.0
+
+
+def track_bucket_resets(http) -> None:
+    """
+    Record when the rate limit buckets of the HTTP client reset.
+    A BucketLock only keeps the reset window of the last response, not when it started.
+    """
+    ingest_ratelimit = http.ingest_ratelimit
+
+    @functools.wraps(ingest_ratelimit)
+    def tracked_ingest_ratelimit(route, header, bucket_lock):
+        ingest_ratelimit(route, header, bucket_lock)
+        bucket_lock.reset_at = time.monotonic() + max(bucket_lock.delta, parse_retry_after(header))
+
+    http.ingest_ratelimit = tracked_ingest_ratelimit
+
+
+def remaining_wait(bucket) -> float:
+    """Get the seconds until the bucket resets, the reset window if the reset is not tracked."""
+    reset_at = getattr(bucket, "reset_at", None)
+    if reset_at is None:
+        return bucket.delta
+    return max(0.0, reset_at - time.monotonic())
+
+
+async def update_voice_channel_status(
+    client: Client,
+    channel_id: int,
     status: str,
-    audit_log_reason: str = None
-) -> requests.Response:
+    audit_log_reason: str = None,
+    timeout: float = 5.0
+) -> StatusUpdateResponse:
     """
     Updates the voice channel status on Discord.
 
     Args:
-        bot_token (str): The bot token for authentication.
-        channel_id (str): The ID of the Discord channel.
+        client (Client): The bot client, its HTTP client is used for the request.
+        channel_id (int): The ID of the Discord channel.
         status (str): The status to set for the voice channel.
         audit_log_reason (str, optional): The reason for the audit log. Defaults to None.
+        timeout (float, optional): The maximum time to wait for the request. Defaults to 5.0.
     """
-    # Discord API endpoint
-    url = f"https://discord.com/api/v9/channels/{channel_id}/voice-status"
-
-    payload = {
-        "status": status,
-    }
-    headers = {
-        "Authorization": f"Bot {bot_token}",
-        "Content-Type": "application/json",
-        "User-Agent": "DiscordBot",
-    }
-
-    # Add audit log reason if provided
-    if audit_log_reason:
-        headers["X-Audit-Log-Reason"] = audit_log_reason
-
-    response = requests.put(url, json=payload, headers=headers, timeout=2)
-    return response
-
-
-# Example usage
-if __name__ == "__main__":
-    # Read the bot token from the file
-    with open("config/bot.key", "r", encoding="utf-8") as file:
-        token = file.read().strip()
-
-    # Example channel ID and status
-    example_channel_id = "1359565234305634476"
-    new_status = "hey"
-    reason = "Testing the voice channel status update"
-
-    # Update the voice channel status
-    update_voice_channel_status(token, example_channel_id, new_status, reason)
+    route = Route(
+        "PUT",
+        "/channels/{channel_id}/voice-status",
+        channel_id=channel_id
+    )
+
+    # do not queue behind a bucket that is locked by a 429
+    bucket = client.http.get_ratelimit(route)
+    if bucket.locked and remaining_wait(bucket) > timeout:
+        return StatusUpdateResponse(
+            False,
+            retry_after=remaining_wait(bucket),
+            error="rate limited"
+        )
+
+    try:
+        # the client retries 429s itself and returns None once it gives up
+        result = await asyncio.wait_for(
+            client.http.request(
+                route,
+                payload={"status": status},
+                reason=audit_log_reason
+            ),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        return StatusUpdateResponse(
+            False,
+            retry_after=remaining_wait(bucket),
+            error="timeout"
+        )
+    except HTTPException as e:
+        return StatusUpdateResponse(False, error=str(e))
+
+    if result is None:
+        return StatusUpdateResponse(
+            False,
+            retry_after=remaining_wait(bucket),
+            error="rate limited"
+        )
+    return StatusUpdateResponse(True)
@@ -0,0 +1,40 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+# custom imports
+from bot.channel_status import parse_retry_after, remaining_wait, update_voice_channel_status
+
+
+def make_client(result, delta: float = 0.0) -> SimpleNamespace:
+    bucket = SimpleNamespace(locked=False, delta=delta)
+
+    async def request(route, payload=None, reason=None):
+        return result
+
+    return SimpleNamespace(http=SimpleNamespace(get_ratelimit=lambda route: bucket, request=request))
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after({"Retry-After": "2.5", "X-RateLimit-Reset-After": "1"}) == 2.5
+    assert parse_retry_after({"X-RateLimit-Reset-After": "1.5"}) == 1.5
+    assert parse_retry_after({"Retry-After": "soon"}) == 0.0
+
+
+def test_remaining_wait() -> None:
+    bucket = SimpleNamespace(delta=10.0, reset_at=time.monotonic() + 3)
+    assert 2 < remaining_wait(bucket) <= 3, "The time left should be reported, not the window"
+    bucket.reset_at = time.monotonic() - 1
+    assert remaining_wait(bucket) == 0.0
+    # untracked buckets report their window
+    assert remaining_wait(SimpleNamespace(delta=4.0)) == 4.0
+
+
+def test_exhausted_retries_are_a_failure() -> None:
+    # a 204 of discord is decoded as an empty string
+    assert asyncio.run(update_voice_channel_status(make_client(""), 1, "status"))
+
+    response = asyncio.run(update_voice_channel_status(make_client(None, delta=2.0), 1, "status"))
+    assert not response
+    assert response.error == "rate limited"
+    assert response.retry_after == 2.0
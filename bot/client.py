@@ -1,5 +1,9 @@
 import sys
+import time
+import atexit
+import queue
 import logging
+import logging.handlers
 import colorlog
 
 from interactions import (
@@ -10,16 +14,35 @@ from interactions import (
 )
 
 # custom imports
-from bot.rate_limiter import RateLimitManager
+from bot.rate_limiter import RateLimitManager, ActionRateLimitManager
 from bot.channel_manager import TempChannelManager
 from bot.config_loader import GuildConfigLoader
+from bot.channel_logger import LogChannelCache
+from bot.interface.custom_id import CustomIdSigner
+from bot.state_backend import make_state_backend
+from bot.channel_status import track_bucket_resets
+from bot.edit_coalescer import ChannelEditCoalescer
+from bot.permission_engine import PermissionEngine
+from bot.inflight import InFlightDeduplicator
+from bot.interface.responder import InteractionResponder
+from bot.audit_log import AuditLog, DEFAULT_AUDIT_PATH
+from bot.startup import StartupTimer
+from bot.performance import make_performance_profile
+from bot.member_cache import MemberCachePolicy
+from bot.loop_monitor import LoopLagMonitor
+from bot.shutdown import GracefulShutdown, DEFAULT_SNAPSHOT_PATH
+from bot.metrics import BotMetrics, MetricsServer, instrument_http, register_client_metrics
 
 EXTENSIONS = [
     'bot.events.ready',
     'bot.events.voice',
+    'bot.events.channels',
     'bot.interface.send_cmd',
     'bot.interface.button_handler',
-    'bot.commands.reload_server'
+    'bot.commands.reload_server',
+    'bot.commands.audit',
+    'bot.commands.profile',
+    'bot.commands.memory'
 ]
 
 
@@ -59,18 +82,51 @@ def make_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)
 
-    # add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # the handlers write in a thread, logging never blocks the event loop
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue,
+        file_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     return logger
 
 
 def make_client(
     version: str,
     bot_token: str,
-    logger: logging.Logger = None
+    logger: logging.Logger = None,
+    state_path: str = None,
+    audit_path: str = DEFAULT_AUDIT_PATH,
+    shard_id: int = 0,
+    total_shards: int = 1,
+    startup_timer: StartupTimer = None,
+    performance: bool = False,
+    member_cache_ttl: int = 600,
+    member_cache_size: int = 10_000,
+    metrics_host: str = "127.0.0.1",
+    metrics_port: int = None,
+    snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+    shutdown_deadline: float = 10.0
 ) -> Client:
+    # everything before this point is the import of the bot
+    startup_timer = startup_timer or StartupTimer()
+    startup_timer.mark("imports")
+
+    # a member cache size of 0 keeps every member like interactions.py does
+    member_cache = MemberCachePolicy(member_cache_ttl, member_cache_size) if member_cache_size else None
+
     client = Client(
+        # every shard process runs its own client
+        shard_id=shard_id,
+        total_shards=total_shards,
+        # the commands are global, one shard is enough to sync them
+        sync_interactions=shard_id == 0,
+
 
         activity=Activity(
             name="TempVoice",
@@ -87,14 +143,56 @@ def make_client(
             guild_members=True,
             guild_voice_states=True
         ),
-        token=bot_token
+        token=bot_token,
+        **(member_cache.cache_kwargs() if member_cache else {})
     )
 
     # Bind custom attributes to the client
     client.version = version
-    client.rlm = RateLimitManager(rate_limit_in_seconds=5)
-    client.tcm = TempChannelManager(rate_limiter=client.rlm)
-    client.gcl = GuildConfigLoader()
+    client.startup = startup_timer
+    # used by run_client to pick the event loop
+    client.performance = make_performance_profile(performance, logger)
+    # the configs are parsed while the extensions load and the gateway connects
+    client.gcl = GuildConfigLoader(
+        shard_id=shard_id,
+        total_shards=total_shards,
+        background=True,
+        logger=logger
+    )
+    # a state path shares the state with other processes on this host
+    client.state = make_state_backend(state_path)
+    client.rlm = RateLimitManager(rate_limit_in_seconds=5, backend=client.state)
+    client.arlm = ActionRateLimitManager(backend=client.state)
+    client.tcm = TempChannelManager(rate_limiter=client.rlm, backend=client.state)
+    client.cec = ChannelEditCoalescer()
+    client.mcp = member_cache
+    client.pe = PermissionEngine()
+    client.ifd = InFlightDeduplicator()
+    client.irp = InteractionResponder()
+    client.audit = AuditLog(audit_path, logger=logger)
+    client.lcc = LogChannelCache()
+    client.cis = CustomIdSigner.from_token(bot_token)
+    # started with the first login, on the loop of the client
+    client.llm = LoopLagMonitor(logger)
+    client.metrics = BotMetrics()
+    instrument_http(client.http, client.metrics)
+    # the status updates report how long a locked bucket is still locked
+    track_bucket_resets(client.http)
+    register_client_metrics(client.metrics.registry, client)
+    # the endpoint is optional, the metrics are always collected
+    client.metrics_server = MetricsServer(
+        client.metrics.registry,
+        metrics_host,
+        metrics_port,
+        logger=logger
+    ) if metrics_port else None
+    # the state of the last shutdown, the registry is restored on ready
+    client.shutdown = GracefulShutdown(logger, snapshot_path, shutdown_deadline)
+    started_at = time.perf_counter()
+    if client.shutdown.load(client):
+        startup_timer.record("snapshot", time.perf_counter() - started_at)
+
+    startup_timer.mark("client")
 
     # load extensions
     logger.info("-" * 50,)
@@ -106,5 +204,6 @@ def make_client(
         except Exception as e:
             client.logger.error(f"Failed to load extension {extension}: {e}")
     logger.info("-" * 50,)
+    startup_timer.mark("extensions")
 
     return client
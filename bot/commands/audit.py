@@ -0,0 +1,124 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Optional
+
+from interactions import (
+    Extension,
+    slash_command,
+    slash_option,
+    OptionType,
+    Permissions,
+    SlashContext,
+    Member
+)
+
+from ..audit_log import AuditRecord
+from ..embed_maker import error_embed
+
+if TYPE_CHECKING:
+    from bot.audit_log import AuditLog
+
+
+def parse_channel_id(value: str) -> Optional[int]:
+    '''Get the id of a channel from an id or a channel mention.'''
+    value = value.strip().removeprefix("<#").removesuffix(">")
+    return int(value) if value.isdigit() else None
+
+
+def format_record(record: AuditRecord) -> str:
+    line = f"<t:{record.created_at}:f> **{record.action}** <@{record.user_id}>"
+    if record.target_id:
+        line += f" → <@{record.target_id}>"
+    line += f" in <#{record.channel_id}>"
+    if record.details:
+        line += f" ({record.details})"
+    return line
+
+
+class AuditCommand(Extension):
+
+    def get_audit_log(self) -> 'AuditLog':
+        return self.bot.audit
+
+    @slash_command(
+        name="audit",
+        description="Zeigt die letzten Aktionen in den Sprachkanälen",
+        default_member_permissions=Permissions.ADMINISTRATOR,
+    )
+    @slash_option(
+        name="user",
+        description="Nur Aktionen von oder gegen dieses Mitglied",
+        opt_type=OptionType.USER,
+        required=False
+    )
+    @slash_option(
+        name="channel",
+        description="Nur Aktionen in diesem Kanal (ID, auch von gelöschten Kanälen)",
+        opt_type=OptionType.STRING,
+        required=False
+    )
+    @slash_option(
+        name="hours",
+        description="Länge des Zeitraums in Stunden (Standard: 24)",
+        opt_type=OptionType.INTEGER,
+        min_value=1,
+        max_value=720,
+        required=False
+    )
+    @slash_option(
+        name="until",
+        description="Ende des Zeitraums in Stunden vor jetzt (Standard: 0)",
+        opt_type=OptionType.INTEGER,
+        min_value=0,
+        max_value=8760,
+        required=False
+    )
+    async def audit(
+        self,
+        ctx: SlashContext,
+        user: Member = None,
+        channel: str = None,
+        hours: int = 24,
+        until: int = 0
+    ) -> None:
+        """Query the audit log of the guild."""
+        # temp channels are deleted when they are empty, so the channel is given by its id
+        channel_id = parse_channel_id(channel) if channel else None
+        if channel and channel_id is None:
+            await ctx.send(
+                ephemeral=True,
+                delete_after=5,
+                embed=error_embed(
+                    title="Fehler",
+                    description="Der Kanal muss eine Kanal-ID oder eine Erwähnung sein."
+                )
+            )
+            return
+
+        await ctx.defer(ephemeral=True)
+
+        # the range ends until hours ago and spans the given hours before that
+        end = int(time.time()) - until * 3600
+
+        # the query blocks, it runs in a thread
+        records = await asyncio.to_thread(
+            self.get_audit_log().query,
+            guild_id=ctx.guild.id,
+            user_id=user.id if user else None,
+            channel_id=channel_id,
+            since=end - hours * 3600,
+            until=end,
+            limit=20
+        )
+
+        if not records:
+            await ctx.send(
+                ephemeral=True,
+                content="Keine Aktionen gefunden."
+            )
+            return
+
+        await ctx.send(
+            ephemeral=True,
+            content="\n".join(format_record(record) for record in records)[:2000]
+        )
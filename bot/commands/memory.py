@@ -0,0 +1,69 @@
+import asyncio
+
+from interactions import (
+    Extension,
+    slash_command,
+    slash_option,
+    OptionType,
+    SlashCommandChoice,
+    Permissions,
+    SlashContext
+)
+
+from ..memory_profiler import MemoryProfiler, structure_sizes
+
+
+class MemoryCommand(Extension):
+
+    # the snapshots are kept between the commands
+    profiler = MemoryProfiler()
+
+    @slash_command(
+        name="memory",
+        description="Vergleicht den Speicher des Bots mit dem letzten Snapshot",
+        default_member_permissions=Permissions.ADMINISTRATOR,
+    )
+    @slash_option(
+        name="action",
+        description="snapshot (Standard) oder stop",
+        opt_type=OptionType.STRING,
+        choices=[
+            SlashCommandChoice(name="snapshot", value="snapshot"),
+            SlashCommandChoice(name="stop", value="stop")
+        ],
+        required=False
+    )
+    async def memory(self, ctx: SlashContext, action: str = "snapshot") -> None:
+        """Take a tracemalloc snapshot and write the diff to the previous one."""
+        await ctx.defer(ephemeral=True)
+        profiler = MemoryCommand.profiler
+
+        if action == "stop":
+            profiler.stop()
+            await ctx.send(ephemeral=True, content="Die Speicheraufzeichnung wurde beendet.")
+            return
+
+        # the first snapshot is the baseline
+        if profiler.previous is None:
+            await asyncio.to_thread(profiler.start)
+            await ctx.send(
+                ephemeral=True,
+                content="Die Speicheraufzeichnung läuft. Der nächste Snapshot wird mit diesem verglichen."
+            )
+            return
+
+        # the structures are read on the loop, they are changed by the loop
+        sizes = structure_sizes(self.bot)
+        stats, elapsed = await asyncio.to_thread(profiler.compare)
+        report = profiler.report(stats, elapsed, sizes)
+        path = await asyncio.to_thread(profiler.write, report)
+        self.bot.logger.info(f"{ctx.author.username} wrote the memory report {path}")
+
+        top = "\n".join(
+            f"`{stat.size_diff / 1024:+9.1f} KiB` {stat.traceback[0].filename.rsplit('/', 1)[-1]}:{stat.traceback[0].lineno}"
+            for stat in stats[:5]
+        )
+        await ctx.send(
+            ephemeral=True,
+            content=f"Bericht gespeichert: `{path}` (Vergleich mit dem Snapshot vor {elapsed:.0f}s)\n{top}"[:2000]
+        )
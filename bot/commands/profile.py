@@ -0,0 +1,82 @@
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from interactions import (
+    Extension,
+    slash_command,
+    slash_option,
+    OptionType,
+    Permissions,
+    SlashContext
+)
+
+from ..sampling_profiler import SamplingProfiler, DEFAULT_PROFILE_DIR
+from ..embed_maker import error_embed
+
+if TYPE_CHECKING:
+    from bot.loop_monitor import LoopLagMonitor
+
+
+class ProfileCommand(Extension):
+
+    # one profile at a time, the samples of two profiles would mix
+    running = False
+
+    def get_loop_monitor(self) -> 'LoopLagMonitor':
+        return self.bot.llm
+
+    @slash_command(
+        name="profile",
+        description="Zeichnet ein CPU-Profil des Bots auf",
+        default_member_permissions=Permissions.ADMINISTRATOR,
+    )
+    @slash_option(
+        name="seconds",
+        description="Dauer in Sekunden (Standard: 10)",
+        opt_type=OptionType.INTEGER,
+        min_value=1,
+        max_value=60,
+        required=False
+    )
+    async def profile(self, ctx: SlashContext, seconds: int = 10) -> None:
+        """Sample the event loop thread and write a collapsed stack file."""
+        if ProfileCommand.running:
+            await ctx.send(
+                ephemeral=True,
+                delete_after=5,
+                embed=error_embed(
+                    title="Fehler",
+                    description="Es wird bereits ein Profil aufgezeichnet."
+                )
+            )
+            return
+
+        await ctx.defer(ephemeral=True)
+        ProfileCommand.running = True
+        try:
+            # the profiler thread samples this thread while the loop keeps running
+            profiler = SamplingProfiler(thread_id=threading.get_ident())
+            await asyncio.to_thread(profiler.run, seconds)
+            path = await asyncio.to_thread(
+                profiler.write,
+                os.path.join(DEFAULT_PROFILE_DIR, f"profile-{int(time.time())}.folded")
+            )
+        finally:
+            ProfileCommand.running = False
+
+        self.bot.logger.info(f"{ctx.author.username} wrote the profile {path} ({profiler.samples} samples)")
+        top = "\n".join(
+            f"`{samples / max(profiler.samples, 1):6.1%}` {name}"
+            for name, samples in profiler.top_functions()
+        )
+        await ctx.send(
+            ephemeral=True,
+            content=(
+                f"Profil gespeichert: `{path}` ({profiler.samples} Samples in {profiler.duration:.1f}s)\n"
+                f"Event-Loop-Verzögerung: {self.get_loop_monitor().summary()}\n"
+                f"{top}"
+            )
+        )
@@ -1,22 +1,38 @@
+import asyncio
 import os
 from typing import TYPE_CHECKING
 
 from interactions import (
     Extension,
     slash_command,
+    listen,
     Permissions,
     SlashContext
 )
+from interactions.api.events import Login
+
+from ..supervisor import RELOAD_SIGNAL
 
 
 if TYPE_CHECKING:
     from bot.channel_manager import TempChannelManager
     from bot.rate_limiter import RateLimitManager
     from bot.config_loader import GuildConfigLoader
+    from bot.channel_logger import LogChannelCache
+
+
+async def perform_git_pull() -> int:
+    # a subprocess of the loop, the bot keeps handling events during the pull
+    process = await asyncio.create_subprocess_exec("git", "pull", "origin", "main")
+    return await process.wait()
 
 
-def perform_git_pull() -> None:
-    os.system("git pull origin main")
+def request_shard_reload() -> bool:
+    '''Ask the supervisor to reload the configs of every shard.'''
+    if RELOAD_SIGNAL is None:
+        return False
+    os.kill(os.getppid(), RELOAD_SIGNAL)
+    return True
 
 
 class ReloadServer(Extension):
@@ -30,6 +46,31 @@ class ReloadServer(Extension):
     def get_guild_config(self) -> 'GuildConfigLoader':
         return self.bot.gcl
 
+    def get_log_channel_cache(self) -> 'LogChannelCache':
+        return self.bot.lcc
+
+    @property
+    def sharded(self) -> bool:
+        return self.bot.total_shards > 1
+
+    async def reload_configs(self) -> None:
+        # the configs are parsed in a thread
+        config = self.get_guild_config()
+        config.guilds = await asyncio.to_thread(config.load)
+
+        # the log channels may have changed
+        self.get_log_channel_cache().clear()
+
+    def on_reload_signal(self) -> None:
+        self.bot.logger.info("Reloading the configs on request of another shard")
+        asyncio.create_task(self.reload_configs())
+
+    @listen(Login)
+    async def on_login(self) -> None:
+        # the supervisor forwards the /reload of another shard
+        if self.sharded and RELOAD_SIGNAL is not None:
+            asyncio.get_running_loop().add_signal_handler(RELOAD_SIGNAL, self.on_reload_signal)
+
     @slash_command(
         name="reload",
         description="Lade die Konfigurationen für alle Server neu",
@@ -40,13 +81,24 @@ class ReloadServer(Extension):
         # load guild config
 
         await ctx.defer(ephemeral=True)
-        perform_git_pull()
+        returncode = await perform_git_pull()
+        if returncode != 0:
+            self.bot.logger.error(f"git pull failed with exit code {returncode}")
+        await self.reload_configs()
 
-        config = self.get_guild_config()
-        config.guilds = config.load()
+        content = "Die Konfigurationen für alle Server wurden neu geladen."
+        if self.sharded:
+            # every process owns one shard, the others reload through the supervisor
+            if request_shard_reload():
+                content = "Die Konfigurationen wurden neu geladen, die anderen Shards laden sie ebenfalls neu."
+            else:
+                content = "Die Konfigurationen wurden nur auf diesem Shard neu geladen."
+        if returncode != 0:
+            # the configs on disk are reloaded anyway, they may be outdated
+            content = f"git pull ist fehlgeschlagen (Code {returncode}), die lokalen Dateien wurden verwendet.\n{content}"
 
         await ctx.send(
             ephemeral=True,
             delete_after=5,
-            content="Die Konfigurationen für alle Server wurden neu geladen."
+            content=content
         )
@@ -1,5 +1,9 @@
 import os
 import json
+import asyncio
+import logging
+import threading
+import time
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -15,6 +19,11 @@ from interactions import (
 GUILDS_CONFIG_PATH = "config/servers"
 
 
+def shard_for_guild(guild_id: int, total_shards: int) -> int:
+    """Get the shard of a guild, see https://discord.com/developers/docs/topics/gateway#sharding"""
+    return (guild_id >> 22) % total_shards
+
+
 class CreatorRole(BaseModel):
     '''
     Role settings for the creator.
@@ -67,10 +76,28 @@ class CreatorDefault(BaseModel):
     copy_permissions: Optional[bool] = False
 
 
+class CreatorOwner(BaseModel):
+    '''
+    Settings for members that already own a channel.
+    reuse_channel: move them back to their channel instead of creating a new one
+    max_channels: the number of channels a member can own, None is unlimited
+    '''
+
+    reuse_channel: Optional[bool] = False
+    max_channels: Optional[int] = None
+
+
 class CreatorGeneral(BaseModel):
     name: Optional[str] = None
     channel: int
     category: int
+    # used in order once the category is full
+    overflow_categories: Optional[List[int]] = []
+
+    @property
+    def categories(self) -> List[int]:
+        """Get the category and the overflow categories in the order they are filled."""
+        return [self.category] + (self.overflow_categories or [])
 
 
 class Creator(BaseModel):
@@ -78,6 +105,7 @@ class Creator(BaseModel):
     default: Optional[CreatorDefault] = CreatorDefault()
     disable: Optional[CreatorDisable] = CreatorDisable()
     role: Optional[CreatorRole] = CreatorRole()
+    owner: Optional[CreatorOwner] = CreatorOwner()
 
     def member_can_not_be_kicked(
         self,
@@ -172,7 +200,11 @@ class GuildConfig(BaseModel):
     @property
     def creator_category_ids(self) -> List[int]:
         """Get the list of all category IDs in the creators."""
-        return [creator.general.category for creator in self.creators]
+        return [
+            category
+            for creator in self.creators
+            for category in creator.general.categories
+        ]
 
     @property
     def creator_channel_ids(self) -> List[int]:
@@ -239,7 +271,7 @@ class GuildConfig(BaseModel):
         - the channel.id is in the list of creator channels
         """
         for creator in self.creators:
-            if creator.general.category == category_id:
+            if category_id in creator.general.categories:
                 return creator
         return None
 
@@ -247,14 +279,67 @@ class GuildConfig(BaseModel):
 class GuildConfigLoader:
     '''
     This class loads the configs of every guild.
+    With background=True the configs are loaded in a thread,
+    so the startup can continue (e.g. connect to the gateway) in the meantime.
+    The handlers await wait_loaded before they read the configs.
     '''
 
     def __init__(
         self,
-        guild_config_path: str = GUILDS_CONFIG_PATH
+        guild_config_path: str = GUILDS_CONFIG_PATH,
+        shard_id: int = 0,
+        total_shards: int = 1,
+        background: bool = False,
+        logger: logging.Logger = None
     ):
-        self.guilds: List[GuildConfig] = []
-        self.guilds = self.load(guild_config_path)
+        # only the guilds of this shard are loaded
+        self.shard_id = shard_id
+        self.total_shards = total_shards
+        self.logger = logger or logging.getLogger(__name__)
+        self.loaded = threading.Event()
+        # the exception of the background load, raised again by guilds
+        self.error: Optional[Exception] = None
+        self.load_duration = 0.0
+        self._guilds: List[GuildConfig] = []
+
+        if background:
+            threading.Thread(
+                target=self._load_in_background,
+                args=(guild_config_path,),
+                name="config-loader",
+                daemon=True
+            ).start()
+        else:
+            self.load(guild_config_path)
+            self.loaded.set()
+
+    @property
+    def guilds(self) -> List[GuildConfig]:
+        if self.error is not None:
+            raise self.error
+        if not self.loaded.is_set():
+            raise RuntimeError("The guild configs are not loaded yet, await wait_loaded first")
+        return self._guilds
+
+    @guilds.setter
+    def guilds(self, guilds: List[GuildConfig]) -> None:
+        self._guilds = guilds
+
+    async def wait_loaded(self) -> None:
+        '''Wait for the background load without blocking the loop, raises its exception.'''
+        if not self.loaded.is_set():
+            await asyncio.to_thread(self.loaded.wait)
+        if self.error is not None:
+            raise self.error
+
+    def _load_in_background(self, guild_config_path: str) -> None:
+        try:
+            self.load(guild_config_path)
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"Failed to load the guild configs from {guild_config_path}: {e}")
+        finally:
+            self.loaded.set()
 
     def get_creator_by_creator_channel_id(
         self,
@@ -324,9 +409,9 @@ class GuildConfigLoader:
         the script has to look for the id in the file content.
         """
 
-        # delete old guilds
-        self.guilds = []
-
+        started_at = time.perf_counter()
+        # the new list replaces the old one at once, readers never see a partial load
+        guilds = []
         files = os.listdir(guild_config_path)
 
         for file in files:
@@ -334,7 +419,14 @@ class GuildConfigLoader:
 
                 try:
                     data = json.load(f)
-                    self.guilds.append(GuildConfig(**data))
+                    if shard_for_guild(data["id"], self.total_shards) != self.shard_id:
+                        continue
+                    guilds.append(GuildConfig(**data))
                 except json.JSONDecodeError as e:
-                    print(f"Error decoding JSON from file {file}: {e}")
-        return self.guilds
+                    self.logger.error(f"Error decoding JSON from file {file}: {e}")
+
+        # a later load replaces a failed one
+        self.guilds = guilds
+        self.error = None
+        self.load_duration = time.perf_counter() - started_at
+        return guilds
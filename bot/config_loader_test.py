@@ -1,5 +1,11 @@
 # pylint: disable=line-too-long
-from config_loader import GuildConfig, GuildConfigLoader
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from config_loader import GuildConfig, GuildConfigLoader, shard_for_guild
 
 
 def test_get_functions():
@@ -16,6 +22,21 @@ def test_get_functions():
     assert cr_channel.general.name == cr_category.general.name, "Get functions are not working as expected"
 
 
+def test_overflow_categories():
+    """
+    Test that every overflow category belongs to its creator.
+    """
+
+    gc = GuildConfig(
+        id=1,
+        creators=[{"general": {"channel": 10, "category": 20, "overflow_categories": [21, 22]}}]
+    )
+
+    assert gc.creators[0].general.categories == [20, 21, 22]
+    assert gc.creator_category_ids == [20, 21, 22]
+    assert gc.get_creator_by_category_id(22) is gc.creators[0], "Overflow categories are not recognized"
+
+
 def test_loading_all_guilds():
     """
     Test the loading of all guilds.
@@ -30,7 +51,58 @@ def test_loading_all_guilds():
     print(first_guild)
 
 
+def test_loading_shards():
+    """
+    Test that every guild is loaded by exactly one shard.
+    """
+
+    all_ids = sorted(guild.id for guild in GuildConfigLoader().guilds)
+    shard_ids = []
+    for shard_id in range(3):
+        for guild in GuildConfigLoader(shard_id=shard_id, total_shards=3).guilds:
+            assert shard_for_guild(guild.id, 3) == shard_id
+            shard_ids.append(guild.id)
+
+    assert sorted(shard_ids) == all_ids, "Guilds are missing or loaded twice"
+
+
+def test_background_loading():
+    """
+    Test that the handlers can await the background load.
+    """
+
+    gcl = GuildConfigLoader(background=True)
+    asyncio.run(gcl.wait_loaded())
+    assert len(gcl.guilds) == len(GuildConfigLoader().guilds)
+
+
+def test_background_loading_error():
+    """
+    Test that an error of the background load is raised again instead of serving no guilds.
+    """
+
+    with tempfile.TemporaryDirectory() as path:
+        with open(os.path.join(path, "broken.json"), "w", encoding="utf-8") as f:
+            f.write('{"name": "missing id"}')
+
+        gcl = GuildConfigLoader(path, background=True)
+        with pytest.raises(KeyError):
+            asyncio.run(gcl.wait_loaded())
+        # the guilds of a failed load are never served
+        with pytest.raises(KeyError):
+            assert gcl.guilds
+
+        # a later load replaces the failed one
+        os.remove(os.path.join(path, "broken.json"))
+        gcl.load(path)
+        assert gcl.guilds == []
+
+
 if __name__ == '__main__':
     test_get_functions()
+    test_overflow_categories()
     test_loading_all_guilds()
+    test_loading_shards()
+    test_background_loading()
+    test_background_loading_error()
     print("All tests passed.")
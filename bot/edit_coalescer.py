@@ -0,0 +1,221 @@
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+from interactions import GuildVoice
+
+# custom imports
+from bot.channel_status import update_voice_channel_status
+
+
+@dataclass
+class PendingEdit:
+    '''
+    The pending changes of one channel.
+    Every field is overwritten by the latest submit (last writer wins).
+    '''
+    name: Optional[str] = None
+    status: Optional[str] = None
+    user_limit: Optional[int] = None
+    reason: Optional[str] = None
+    updated_at: float = field(default_factory=time.time)
+
+    def merge(self, other: 'PendingEdit') -> None:
+        if other.name is not None:
+            self.name = other.name
+        if other.status is not None:
+            self.status = other.status
+        if other.user_limit is not None:
+            self.user_limit = other.user_limit
+        if other.reason is not None:
+            self.reason = other.reason
+        self.updated_at = max(self.updated_at, other.updated_at)
+
+    def __bool__(self) -> bool:
+        return any(
+            value is not None
+            for value in (self.name, self.status, self.user_limit)
+        )
+
+
+class RenameBucket:
+    '''
+    Discord allows only 2 renames per channel every 10 minutes.
+    This bucket tracks the renames of one channel to know the next free slot.
+    '''
+
+    def __init__(
+        self,
+        limit: int = 2,
+        window: int = 600
+    ):
+        self.limit = limit
+        self.window = window
+        self.history: deque[float] = deque()
+
+    def _prune(self, now: float) -> None:
+        while self.history and now - self.history[0] >= self.window:
+            self.history.popleft()
+
+    def next_slot(self, now: float = None) -> float:
+        if now is None:
+            now = time.time()
+        self._prune(now)
+        if len(self.history) < self.limit:
+            return now
+        return self.history[0] + self.window
+
+    def record(self, now: float = None) -> None:
+        if now is None:
+            now = time.time()
+        self._prune(now)
+        self.history.append(now)
+
+
+class ChannelEditCoalescer:
+    '''
+    This class merges the name, status and limit edits of a channel
+    and flushes them as a single request once the channel allows it.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        debounce: float = 1.5,
+        rename_limit: int = 2,
+        rename_window: int = 600
+    ):
+        self.debounce = debounce
+        self.rename_limit = rename_limit
+        self.rename_window = rename_window
+        self.pending: dict[int, PendingEdit] = {}
+        self.tasks: dict[int, asyncio.Task] = {}
+        self.rename_buckets: dict[int, RenameBucket] = {}
+
+    def _get_rename_bucket(self, channel_id: int) -> RenameBucket:
+        if channel_id not in self.rename_buckets:
+            self.rename_buckets[channel_id] = RenameBucket(
+                limit=self.rename_limit,
+                window=self.rename_window
+            )
+        return self.rename_buckets[channel_id]
+
+    def _ready_at(self, channel_id: int, edit: PendingEdit) -> float:
+        '''
+        Get the time at which the first field of the edit can be flushed.
+        '''
+        ready_at = edit.updated_at + self.debounce
+        if edit.name is not None and edit.status is None and edit.user_limit is None:
+            ready_at = max(
+                ready_at,
+                self._get_rename_bucket(channel_id).next_slot(ready_at)
+            )
+        return ready_at
+
+    def _take_ready(self, channel_id: int, now: float) -> PendingEdit:
+        '''
+        Take every field that can be flushed now.
+        A name that has to wait for the rename bucket stays pending.
+        '''
+        edit = self.pending.pop(channel_id)
+        if edit.name is None or self._get_rename_bucket(channel_id).next_slot(now) <= now:
+            return edit
+
+        self.pending[channel_id] = PendingEdit(
+            name=edit.name,
+            reason=edit.reason,
+            updated_at=edit.updated_at
+        )
+        edit.name = None
+        return edit
+
+    def submit(
+        self,
+        channel: GuildVoice,
+        name: str = None,
+        status: str = None,
+        user_limit: int = None,
+        reason: str = None
+    ) -> int:
+        '''
+        Queue an edit of the channel.
+        Returns the unix time at which the edit will be applied.
+        '''
+        edit = PendingEdit(
+            name=name,
+            status=status,
+            user_limit=user_limit,
+            reason=reason
+        )
+        if channel.id in self.pending:
+            self.pending[channel.id].merge(edit)
+        else:
+            self.pending[channel.id] = edit
+
+        # start a flush task if there is none for this channel
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.create_task(
+                self._flush_when_ready(channel)
+            )
+
+        eta = edit.updated_at + self.debounce
+        if name is not None:
+            eta = max(eta, self._get_rename_bucket(channel.id).next_slot(eta))
+        return int(eta) + 1
+
+    def pending_count(self) -> int:
+        return len(self.pending)
+
+    async def _flush_when_ready(self, channel: GuildVoice) -> None:
+        try:
+            while channel.id in self.pending:
+                delay = self._ready_at(channel.id, self.pending[channel.id]) - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    # new submits may have moved the ready time
+                    continue
+
+                edit = self._take_ready(channel.id, time.time())
+                await self._apply(channel, edit)
+        finally:
+            self.tasks.pop(channel.id, None)
+
+    async def _apply(self, channel: GuildVoice, edit: PendingEdit) -> None:
+        # name and limit share one channel edit
+        if edit.name is not None or edit.user_limit is not None:
+            kwargs = {}
+            if edit.name is not None:
+                kwargs["name"] = edit.name
+                self._get_rename_bucket(channel.id).record()
+            if edit.user_limit is not None:
+                kwargs["user_limit"] = edit.user_limit
+            try:
+                await channel.edit(reason=edit.reason, **kwargs)
+            except Exception as e:
+                channel.bot.logger.error(
+                    f"Error editing channel {channel.id}: {e}"
+                )
+
+        # the status has its own route
+        if edit.status is not None:
+            response = await update_voice_channel_status(
+                client=channel.bot,
+                channel_id=channel.id,
+                status=edit.status,
+                audit_log_reason=edit.reason
+            )
+            if not response:
+                channel.bot.logger.error(
+                    f"Error updating status of channel {channel.id}: {response.error}"
+                )
+
+    def forget_channel(self, channel_id: int) -> None:
+        '''
+        Drop the pending edits of a deleted channel.
+        '''
+        self.pending.pop(channel_id, None)
+        self.rename_buckets.pop(channel_id, None)
+        task = self.tasks.pop(channel_id, None)
+        if task:
+            task.cancel()
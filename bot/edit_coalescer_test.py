@@ -0,0 +1,89 @@
+import time
+import asyncio
+import logging
+from types import SimpleNamespace
+
+# custom imports
+from bot.edit_coalescer import ChannelEditCoalescer, PendingEdit, RenameBucket
+
+
+class FakeChannel:
+    """
+    A voice channel that records its edits.
+    """
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.bot = SimpleNamespace(logger=logging.getLogger(__name__))
+        self.edits = []
+
+    async def edit(self, reason: str = None, **kwargs) -> None:
+        self.edits.append(kwargs)
+
+
+def test_last_writer_wins() -> None:
+    edit = PendingEdit(name="first", user_limit=5, updated_at=1)
+    edit.merge(PendingEdit(name="second", updated_at=2))
+
+    assert edit.name == "second", "The latest name should win"
+    assert edit.user_limit == 5, "Fields that were not submitted again should stay"
+    assert edit.updated_at == 2
+    assert not PendingEdit(reason="only a reason"), "An edit without changes should be empty"
+
+
+def test_rename_bucket() -> None:
+    bucket = RenameBucket(limit=2, window=600)
+
+    assert bucket.next_slot(now=0) == 0
+    bucket.record(now=0)
+    bucket.record(now=10)
+    assert bucket.next_slot(now=20) == 600, "The third rename has to wait for the window"
+    assert bucket.next_slot(now=700) == 700, "Old renames should leave the window"
+
+
+def test_edits_are_coalesced() -> None:
+    """
+    Test that multiple submits result in a single channel edit.
+    """
+    channel = FakeChannel(1)
+
+    async def run() -> None:
+        coalescer = ChannelEditCoalescer(debounce=0.05)
+        coalescer.submit(channel, name="first")
+        coalescer.submit(channel, user_limit=3)
+        coalescer.submit(channel, name="second")
+        await asyncio.sleep(0.2)
+        assert coalescer.pending_count() == 0
+
+    asyncio.run(run())
+    assert channel.edits == [{"name": "second", "user_limit": 3}]
+
+
+def test_rename_waits_for_bucket() -> None:
+    """
+    Test that a blocked rename does not block the limit.
+    """
+    channel = FakeChannel(2)
+
+    async def run() -> int:
+        coalescer = ChannelEditCoalescer(debounce=0.05, rename_limit=1)
+        coalescer.submit(channel, name="first")
+        await asyncio.sleep(0.2)
+
+        eta = coalescer.submit(channel, name="second", user_limit=4)
+        await asyncio.sleep(0.2)
+        assert coalescer.pending_count() == 1, "The name should still be pending"
+        coalescer.forget_channel(channel.id)
+        return eta
+
+    eta = asyncio.run(run())
+    assert channel.edits == [{"name": "first"}, {"user_limit": 4}]
+    assert eta > time.time() + 500, "The eta should point to the next rename slot"
+
+
+if __name__ == '__main__':
+    test_last_writer_wins()
+    test_rename_bucket()
+    test_edits_are_coalesced()
+    test_rename_waits_for_bucket()
+    print("All tests passed.")
@@ -0,0 +1,113 @@
+from typing import TYPE_CHECKING
+from interactions.api.events import (
+    ChannelCreate,
+    ChannelDelete,
+    ChannelUpdate,
+    GuildLeft
+)
+
+from interactions import (
+    Extension,
+    listen
+)
+
+if TYPE_CHECKING:
+    from bot.channel_logger import LogChannelCache
+    from bot.channel_manager import TempChannelManager
+    from bot.config_loader import GuildConfigLoader
+    from bot.edit_coalescer import ChannelEditCoalescer
+    from bot.permission_engine import PermissionEngine
+
+
+class ChannelEvents(Extension):
+    '''
+    Keeps the registry and the caches in line with changes made outside of the bot.
+    The bot unregisters its own channels before it deletes them,
+    so their delete event is not counted as an external change.
+    '''
+
+    def get_log_channel_cache(self) -> 'LogChannelCache':
+        return self.bot.lcc
+
+    def get_temp_channel_manager(self) -> 'TempChannelManager':
+        return self.bot.tcm
+
+    def get_guild_config(self) -> 'GuildConfigLoader':
+        return self.bot.gcl
+
+    def get_edit_coalescer(self) -> 'ChannelEditCoalescer':
+        return self.bot.cec
+
+    def get_permission_engine(self) -> 'PermissionEngine':
+        return self.bot.pe
+
+    def forget_channel(self, channel_id: int) -> None:
+        '''Drop the pending work of a channel that is no longer managed.'''
+        self.get_edit_coalescer().forget_channel(channel_id)
+        self.get_permission_engine().forget_channel(channel_id)
+
+    @listen(ChannelCreate)
+    async def on_channel_create(self, event: ChannelCreate) -> None:
+        channel = event.channel
+        self.get_temp_channel_manager().categories.add(
+            getattr(channel, "parent_id", None), channel.id)
+
+    @listen(ChannelDelete)
+    async def on_channel_delete(self, event: ChannelDelete) -> None:
+        channel = event.channel
+        self.get_log_channel_cache().invalidate_channel(channel)
+
+        temp_channel_manager = self.get_temp_channel_manager()
+        temp_channel_manager.categories.remove(
+            getattr(channel, "parent_id", None), channel.id)
+
+        # deleted by hand
+        if temp_channel_manager.evict_channel(channel.id, "delete"):
+            self.forget_channel(channel.id)
+            self.bot.logger.info(f"Temp channel {channel.id} was deleted externally")
+
+    @listen(ChannelUpdate)
+    async def on_channel_update(self, event: ChannelUpdate) -> None:
+        channel = event.after
+        self.get_log_channel_cache().invalidate_channel(channel)
+
+        # keep the category index up to date if the channel was moved
+        temp_channel_manager = self.get_temp_channel_manager()
+        before_parent = getattr(event.before, "parent_id", None)
+        after_parent = getattr(channel, "parent_id", None)
+        if before_parent != after_parent:
+            categories = temp_channel_manager.categories
+            categories.remove(before_parent, channel.id)
+            categories.add(after_parent, channel.id)
+
+        managed_channel = temp_channel_manager.get_channel_by_id(channel.id)
+        if not managed_channel:
+            return
+
+        # moved out of the creator categories by hand
+        config = self.get_guild_config()
+        await config.wait_loaded()
+        guild_config = config.get_guild_by_id(channel.guild.id)
+        if not guild_config or not guild_config.is_temp_channel(channel):
+            temp_channel_manager.evict_channel(channel.id, "move")
+            self.forget_channel(channel.id)
+            self.bot.logger.info(f"Temp channel {channel.id} was moved out of its category")
+            return
+
+        # the registry keeps the current channel object
+        managed_channel.channel = channel
+
+    @listen(GuildLeft)
+    async def on_guild_left(self, event: GuildLeft) -> None:
+        self.get_log_channel_cache().invalidate_guild(event.guild_id)
+
+        temp_channel_manager = self.get_temp_channel_manager()
+        for channel_id in temp_channel_manager.evict_guild(event.guild_id):
+            self.forget_channel(channel_id)
+
+        config = self.get_guild_config()
+        await config.wait_loaded()
+        guild_config = config.get_guild_by_id(event.guild_id)
+        if guild_config:
+            for category_id in guild_config.creator_category_ids:
+                temp_channel_manager.categories.forget(category_id)
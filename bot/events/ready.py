@@ -1,13 +1,70 @@
-from interactions.api.events import Ready
+from typing import TYPE_CHECKING
+from interactions.api.events import (
+    Login,
+    WebsocketReady,
+    Startup,
+    Ready
+)
 
 from interactions import (
     Extension,
     listen
 )
 
+if TYPE_CHECKING:
+    from bot.startup import StartupTimer
+    from bot.metrics import MetricsServer
+    from bot.loop_monitor import LoopLagMonitor
+    from bot.shutdown import GracefulShutdown
+
 
 class ReadyEvent(Extension):
 
+    def get_startup_timer(self) -> 'StartupTimer':
+        return self.bot.startup
+
+    def get_metrics_server(self) -> 'MetricsServer':
+        return self.bot.metrics_server
+
+    def get_loop_monitor(self) -> 'LoopLagMonitor':
+        return self.bot.llm
+
+    def get_shutdown(self) -> 'GracefulShutdown':
+        return self.bot.shutdown
+
+    @listen(Login)
+    async def on_login(self) -> None:
+        self.get_startup_timer().mark("login")
+        self.get_loop_monitor().start()
+        # SIGTERM and SIGINT drain the work and write the snapshot
+        self.get_shutdown().install_signal_handlers(self.bot)
+
+        # the endpoint runs on the loop of the client, it is started with the first login
+        metrics_server = self.get_metrics_server()
+        if metrics_server and not metrics_server.server:
+            try:
+                await metrics_server.start()
+                self.bot.logger.info(f"Serving metrics on {metrics_server.host}:{metrics_server.port}/metrics")
+            except OSError as e:
+                self.bot.logger.error(f"Failed to start the metrics endpoint: {e}")
+
+    @listen(WebsocketReady)
+    async def on_websocket_ready(self) -> None:
+        # reconnects also send a ready, only the first one is part of the startup
+        startup_timer = self.get_startup_timer()
+        if not startup_timer.finished and "identify" not in startup_timer.phases:
+            startup_timer.mark("identify")
+
+    @listen(Startup)
+    async def on_startup(self) -> None:
+        # guilds are received and the commands are synced
+        startup_timer = self.get_startup_timer()
+        startup_timer.mark("ready")
+        await self.bot.gcl.wait_loaded()
+        startup_timer.record("config", self.bot.gcl.load_duration)
+        startup_timer.finish()
+        self.bot.logger.info(startup_timer.report())
+
     @listen(Ready)
     async def on_ready(self) -> None:
         messages = [
@@ -1,5 +1,8 @@
+import asyncio
 from typing import TYPE_CHECKING
 from interactions.api.events import (
+    Ready,
+    Startup,
     VoiceUserJoin,
     VoiceUserMove,
     VoiceUserLeave
@@ -10,17 +13,26 @@ from interactions import (
     listen,
     GuildVoice,
     Member,
-    Guild
+    Guild,
+    Embed
 )
 
 if TYPE_CHECKING:
+    from bot.config_loader import Creator
     from bot.channel_manager import TempChannelManager
     from bot.rate_limiter import RateLimitManager
     from bot.config_loader import GuildConfigLoader
+    from bot.edit_coalescer import ChannelEditCoalescer
+    from bot.channel_logger import LogChannelCache
+    from bot.permission_engine import PermissionEngine
+    from bot.audit_log import AuditLog
+    from bot.metrics import BotMetrics
+    from bot.shutdown import GracefulShutdown
 
 
 from ..embed_maker import error_embed
 from ..channel_logger import send_log_message
+from ..audit_log import AuditRecord
 
 
 class VoiceEvents(Extension):
@@ -34,18 +46,110 @@ class VoiceEvents(Extension):
     def get_guild_config(self) -> 'GuildConfigLoader':
         return self.bot.gcl
 
+    def get_edit_coalescer(self) -> 'ChannelEditCoalescer':
+        return self.bot.cec
+
+    def get_log_channel_cache(self) -> 'LogChannelCache':
+        return self.bot.lcc
+
+    def get_permission_engine(self) -> 'PermissionEngine':
+        return self.bot.pe
+
+    def get_audit_log(self) -> 'AuditLog':
+        return self.bot.audit
+
+    def get_metrics(self) -> 'BotMetrics':
+        return self.bot.metrics
+
+    def get_shutdown(self) -> 'GracefulShutdown':
+        return self.bot.shutdown
+
+    def audit(self, channel: GuildVoice, author: Member, action: str) -> None:
+        self.get_audit_log().append(
+            AuditRecord(
+                guild_id=channel.guild.id,
+                channel_id=channel.id,
+                user_id=author.id,
+                action=action
+            )
+        )
+
     async def channel_is_empty(
         self,
         channel: GuildVoice
     ) -> bool:
-        if len(channel.voice_members) == 1:
+        # the occupancy index is updated before the leave is handled
+        return self.get_temp_channel_manager().is_empty(channel.id)
+
+    async def send_direct_message(self, author: Member, embed: Embed) -> bool:
+        """Send a direct message, members can have them disabled."""
+        try:
+            await author.send(embed=embed)
             return True
-        return False
+        except Exception as e:
+            self.bot.logger.warning(f"Could not send a direct message to {author.username} ({author.id}): {e}")
+            return False
+
+    async def disconnect_member(self, author: Member) -> bool:
+        """Disconnect a member, the member may have left already."""
+        try:
+            await author.disconnect()
+            return True
+        except Exception as e:
+            self.bot.logger.warning(f"Could not disconnect {author.username} ({author.id}): {e}")
+            return False
 
     async def log_guild_not_found(self, guild: Guild) -> None:
         """Log a warning if the guild is not found."""
         self.bot.logger.warning(f"Guild {guild.name} ({guild.id}) not found")
 
+    async def handle_existing_owner(
+        self,
+        channel: GuildVoice,
+        author: Member,
+        creator: 'Creator'
+    ) -> bool:
+        '''
+        Move an owner back to their channel or stop them at the channel limit of the creator.
+        Returns True if no channel should be created.
+        '''
+        owner_config = creator.owner
+        if not owner_config or (not owner_config.reuse_channel and owner_config.max_channels is None):
+            return False
+
+        owned = [
+            tempchannel
+            for tempchannel in self.get_temp_channel_manager().get_channels_by_owner(author.id, channel.guild.id)
+            if channel.guild.get_channel(tempchannel.channel.id)
+        ]
+        if not owned:
+            return False
+
+        # saves the creation and the later deletion of a channel
+        if owner_config.reuse_channel:
+            try:
+                await author.move(owned[-1].channel.id)
+                self.audit(owned[-1].channel, author, "reuse")
+                return True
+            except Exception as e:
+                # the channel limit still applies when the owner can not be moved back
+                self.bot.logger.warning(
+                    f"Could not move {author.username} ({author.id}) back to {owned[-1].channel.id}: {e}"
+                )
+
+        if owner_config.max_channels is not None and len(owned) >= owner_config.max_channels:
+            await self.disconnect_member(author)
+            await self.send_direct_message(
+                author,
+                error_embed(
+                    title="Fehler",
+                    description=f"Du besitzt bereits {len(owned)} Kanäle: {owned[-1].channel.mention}"
+                )
+            )
+            return True
+
+        return False
+
     async def handle_join(
         self,
         channel: GuildVoice,
@@ -53,15 +157,26 @@ class VoiceEvents(Extension):
     ) -> None:
         # load guild config
         config = self.get_guild_config()
+        await config.wait_loaded()
         guild_config = config.get_guild_by_id(channel.guild.id)
 
+        metrics = self.get_metrics()
+
         # skip if no config is found
         if not guild_config:
+            metrics.voice_events.inc("join", "filtered")
             await self.log_guild_not_found(channel.guild)
             return
 
         # check if the channel is a creator channel
         if not guild_config.is_creator_channel(channel.id):
+            metrics.voice_events.inc("join", "filtered")
+            return
+        metrics.voice_events.inc("join", "handled")
+
+        # members that already own a channel can be sent back or limited
+        creator = guild_config.get_creator_by_channel_id(channel.id)
+        if await self.handle_existing_owner(channel, author, creator):
             return
 
         # check if user can create a channel (rate limit)
@@ -69,8 +184,10 @@ class VoiceEvents(Extension):
         is_allowed = rate_limiter.can_perform_action(author.id)
         descrition = f"Du kannst einen neuen Kanal erstellen: <t:{is_allowed.end_time()}:R>"
         if not is_allowed:
-            await author.send(
-                embed=error_embed(
+            metrics.rate_limited.inc("create", "create")
+            await self.send_direct_message(
+                author,
+                error_embed(
                     title="Nicht so schnell!",
                     description=descrition
                 )
@@ -79,22 +196,45 @@ class VoiceEvents(Extension):
 
         # create a temp channel
         temp_channel_manager = self.get_temp_channel_manager()
-        creator = guild_config.get_creator_by_channel_id(channel.id)
         temp_channel = await temp_channel_manager.create_channel(
             previous_channel=channel,
             owner=author,
             creator=creator
         )
 
+        # the creation failed (e.g. every category of the creator is full)
+        # the user is not left waiting in the creator channel
+        if not temp_channel:
+            await self.disconnect_member(author)
+            await self.send_direct_message(
+                author,
+                error_embed(
+                    title="Fehler",
+                    description="Dein Kanal konnte nicht erstellt werden. Bitte versuche es später erneut."
+                )
+            )
+            return
+
+        # record the action in the rate limiter
+        rate_limiter.record_action(author.id)
+        metrics.channels_created.inc(str(channel.guild.id))
+        self.audit(temp_channel, author, "create")
+
         # move the user to the new channel
-        if temp_channel:
-            await author.move(temp_channel.id)
+        # the default status is applied at the same time and never blocks the move
+        status_task = asyncio.create_task(
+            temp_channel_manager.apply_default_status(
+                channel=temp_channel,
+                owner=author,
+                creator=creator
+            )
+        )
+        await author.move(temp_channel.id)
+        await status_task
 
         # send a log message
-        log_channel_id = guild_config.log_channel
-        if not log_channel_id:
-            return
-        log_channel = channel.guild.get_channel(log_channel_id)
+        log_channel = self.get_log_channel_cache().get(
+            channel.guild, guild_config.log_channel)
         if not log_channel:
             return
         await send_log_message(
@@ -102,9 +242,6 @@ class VoiceEvents(Extension):
             message=f"{author.mention} ({author.id}) erstellt **{temp_channel.name}.**"
         )
 
-        # record the action in the rate limiter
-        rate_limiter.record_action(author.id)
-
     async def handle_leave(
         self,
         channel: GuildVoice,
@@ -112,16 +249,22 @@ class VoiceEvents(Extension):
     ) -> None:
         # load guild config
         config = self.get_guild_config()
+        await config.wait_loaded()
         guild_config = config.get_guild_by_id(channel.guild.id)
 
+        metrics = self.get_metrics()
+
         # skip if no config is found
         if not guild_config:
+            metrics.voice_events.inc("leave", "filtered")
             await self.log_guild_not_found(channel.guild)
             return
 
         # check if the channel is a temp channel
         if not guild_config.is_temp_channel(channel):
+            metrics.voice_events.inc("leave", "filtered")
             return
+        metrics.voice_events.inc("leave", "handled")
 
         # check if the channel is empty
         if await self.channel_is_empty(channel):
@@ -140,15 +283,17 @@ class VoiceEvents(Extension):
             else:
                 time_since_creation = "Unbekannt"
 
-            await temp_channel_manager.delete_channel(
-                channel=channel
-            )
+            # the channel stays registered if the delete failed
+            if not await temp_channel_manager.delete_channel(channel=channel):
+                return
+            self.audit(channel, author, "delete")
+            metrics.channels_deleted.inc(str(channel.guild.id))
+            self.get_edit_coalescer().forget_channel(channel.id)
+            self.get_permission_engine().forget_channel(channel.id)
 
             # send a log message
-            log_channel_id = guild_config.log_channel
-            if not log_channel_id:
-                return
-            log_channel = channel.guild.get_channel(log_channel_id)
+            log_channel = self.get_log_channel_cache().get(
+                channel.guild, guild_config.log_channel)
             if not log_channel:
                 return
 
@@ -157,32 +302,77 @@ class VoiceEvents(Extension):
                 message=f"{author.mention} ({author.id}) hat **{channel_name}** verlassen und der Kanal wurde gelöscht. (Kanal existierte für {time_since_creation})"
             )
 
+    def seed_occupancy(self) -> None:
+        '''Seed the occupancy index from the voice states in the cache.'''
+        voice_states = [
+            (voice_state.channel.id, voice_state.user_id)
+            for voice_state in self.bot.cache.voice_state_cache.values()
+            if voice_state.channel
+        ]
+        self.get_temp_channel_manager().seed_occupancy(voice_states)
+        self.bot.logger.info(f"Seeded occupancy of {len(voice_states)} voice states")
+
+    @listen(Startup)
+    async def on_startup(self) -> None:
+        # the first ready of the process, it is dispatched before the Ready event
+        self.seed_occupancy()
+
+        # the channels of the last shutdown, the ones that emptied in the meantime are deleted
+        shutdown = self.get_shutdown()
+        await shutdown.delete_emptied(self.bot, await shutdown.restore(self.bot))
+
+    @listen(Ready)
+    async def on_ready(self) -> None:
+        # a new session after a reconnect, the voice events in between are lost
+        self.seed_occupancy()
+
     @listen(VoiceUserJoin)
     async def on_voice_user_join(self, event: VoiceUserJoin) -> None:
 
         author = event.author
         new_channel = event.channel
+        self.get_temp_channel_manager().member_joined(new_channel.id, author.id)
+
+        # no new work once the shutdown started, the restart picks up the state
+        shutdown = self.get_shutdown()
+        if shutdown.draining:
+            return
 
         self.bot.logger.info(
             f"User {author.username} joined voice channel {new_channel.name}.")
-        await self.handle_join(new_channel, author)
+        with shutdown.work():
+            await self.handle_join(new_channel, author)
 
     @listen(VoiceUserMove)
     async def on_voice_user_move(self, event: VoiceUserMove) -> None:
         author = event.author
         previous_channel = event.previous_channel
         new_channel = event.new_channel
+        temp_channel_manager = self.get_temp_channel_manager()
+        temp_channel_manager.member_left(previous_channel.id, author.id)
+        temp_channel_manager.member_joined(new_channel.id, author.id)
+
+        shutdown = self.get_shutdown()
+        if shutdown.draining:
+            return
 
         self.bot.logger.info(
             f"User {author.username} moved from {previous_channel.name} to {new_channel.name}.")
-        await self.handle_leave(previous_channel, author)
-        await self.handle_join(new_channel, author)
+        with shutdown.work():
+            await self.handle_leave(previous_channel, author)
+            await self.handle_join(new_channel, author)
 
     @listen(VoiceUserLeave)
     async def on_voice_user_leave(self, event: VoiceUserLeave) -> None:
         author = event.author
         previous_channel = event.channel
+        self.get_temp_channel_manager().member_left(previous_channel.id, author.id)
+
+        shutdown = self.get_shutdown()
+        if shutdown.draining:
+            return
 
         self.bot.logger.info(
             f"User {author.username} left voice channel {previous_channel.name}.")
-        await self.handle_leave(previous_channel, author)
+        with shutdown.work():
+            await self.handle_leave(previous_channel, author)
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class InFlightDeduplicator:
+    '''
+    This class runs an action only once while it is in flight.
+    A call with the key of a running action waits for the result of that
+    action instead of running it again.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(self):
+        self.inflight: dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.deduplicated = 0
+
+    def is_running(self, key: Hashable) -> bool:
+        return key in self.inflight
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[T]]
+    ) -> tuple[T, bool]:
+        '''
+        Run the action created by the factory or join the running one.
+        Returns the result and whether it was shared with a running action.
+        '''
+        future = self.inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future), True
+
+        task = asyncio.ensure_future(factory())
+        self.inflight[key] = task
+        # the task keeps running if the first caller is cancelled,
+        # so the key is removed when the task is done
+        task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        self.executed += 1
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "executed": self.executed,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self.inflight),
+        }
@@ -0,0 +1,44 @@
+import asyncio
+
+# custom imports
+from bot.inflight import InFlightDeduplicator
+
+
+def test_running_action_is_joined() -> None:
+    """
+    Test that concurrent calls with the same key share one execution.
+    """
+    deduplicator = InFlightDeduplicator()
+    calls = []
+
+    async def action() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "locked"
+
+    async def run() -> list:
+        return await asyncio.gather(*(
+            deduplicator.run((1, "lock"), action) for _ in range(3)
+        ))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1, "The action should only run once"
+    assert results == [("locked", False), ("locked", True), ("locked", True)]
+    assert deduplicator.stats() == {"executed": 1, "deduplicated": 2, "in_flight": 0}
+
+
+def test_finished_action_runs_again() -> None:
+    deduplicator = InFlightDeduplicator()
+
+    async def action() -> int:
+        return 1
+
+    async def run() -> None:
+        await deduplicator.run((1, "lock"), action)
+        await deduplicator.run((1, "lock"), action)
+        await deduplicator.run((2, "lock"), action)
+
+    asyncio.run(run())
+    assert deduplicator.executed == 3
+    assert deduplicator.deduplicated == 0
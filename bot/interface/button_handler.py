@@ -1,23 +1,23 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Union
+import asyncio
 import re
 import time
-import asyncio
 
 from interactions import (
     Extension,
     component_callback,
+    modal_callback,
     ComponentContext,
+    ModalContext,
     Modal,
     ShortText,
     GuildVoice,
-    PermissionOverwrite,
-    Permissions,
+    Member,
     UserSelectMenu,
-    ActionRow
+    Permissions,
+    Embed
 )
 
-# pylint: disable=broad-exception-raised
-
 from ._buttons import (
     name,
     status,
@@ -31,15 +31,62 @@ from ._buttons import (
     take_owner,
     transfer_owner
 )
+from .router import ButtonRoute, ButtonRouter
+from .moderation import (
+    MAX_SELECTED_MEMBERS,
+    in_channel,
+    mentions,
+    summary,
+    disconnect_members,
+    get_member,
+    selected_members
+)
+from .resolved_context import ResolvedContext, resolve_context
 from ..embed_maker import error_embed
 from ..channel_logger import send_log_message
-from ..channel_status import update_voice_channel_status
 from ..channel_manager import TempChannel
+from ..permission_engine import PermissionChange
+from ..audit_log import AuditRecord
 
 if TYPE_CHECKING:
     from bot.channel_manager import TempChannelManager
-    from bot.rate_limiter import RateLimitManager
+    from bot.rate_limiter import RateLimitManager, ActionRateLimitManager
     from bot.config_loader import GuildConfigLoader
+    from bot.edit_coalescer import ChannelEditCoalescer
+    from bot.permission_engine import PermissionEngine
+    from bot.inflight import InFlightDeduplicator
+    from bot.interface.responder import InteractionResponder
+    from bot.audit_log import AuditLog
+    from bot.metrics import BotMetrics
+    from bot.shutdown import GracefulShutdown
+    from bot.channel_logger import LogChannelCache
+    from bot.interface.custom_id import CustomIdSigner
+
+BUTTONS = (
+    name,
+    status,
+    size,
+    lock,
+    unlock,
+    kick,
+    ban,
+    invite,
+    show_owner,
+    take_owner,
+    transfer_owner
+)
+
+ROUTER = ButtonRouter()
+
+# actions whose outcome depends on the user, a click of another user must not join them
+PER_USER_ACTIONS = {"take_owner"}
+
+
+def inflight_key(channel_id: int, action: str, user_id: int) -> tuple:
+    '''Get the key of a running action, per user actions are deduplicated per user.'''
+    if action in PER_USER_ACTIONS:
+        return (channel_id, action, user_id)
+    return (channel_id, action)
 
 
 class ButtonHandler(Extension):
@@ -47,16 +94,104 @@ class ButtonHandler(Extension):
     def get_rate_limiter(self) -> 'RateLimitManager':
         return self.bot.rlm
 
+    def get_action_rate_limiter(self) -> 'ActionRateLimitManager':
+        return self.bot.arlm
+
     def get_temp_channel_manager(self) -> 'TempChannelManager':
         return self.bot.tcm
 
     def get_guild_config(self) -> 'GuildConfigLoader':
         return self.bot.gcl
 
-    @component_callback(re.compile(r"button|[a-zA-Z0-9_]+"))
+    def get_edit_coalescer(self) -> 'ChannelEditCoalescer':
+        return self.bot.cec
+
+    def get_log_channel_cache(self) -> 'LogChannelCache':
+        return self.bot.lcc
+
+    def get_permission_engine(self) -> 'PermissionEngine':
+        return self.bot.pe
+
+    def get_inflight(self) -> 'InFlightDeduplicator':
+        return self.bot.ifd
+
+    def get_responder(self) -> 'InteractionResponder':
+        return self.bot.irp
+
+    def get_audit_log(self) -> 'AuditLog':
+        return self.bot.audit
+
+    def get_metrics(self) -> 'BotMetrics':
+        return self.bot.metrics
+
+    def get_shutdown(self) -> 'GracefulShutdown':
+        return self.bot.shutdown
+
+    def get_custom_id_signer(self) -> 'CustomIdSigner':
+        return self.bot.cis
+
+    async def resolve(self, member: Member, channel: GuildVoice) -> ResolvedContext:
+        # the configs may still be loading during the startup
+        await self.get_guild_config().wait_loaded()
+        return resolve_context(
+            member=member,
+            channel=channel,
+            guild_config_loader=self.get_guild_config(),
+            temp_channel_manager=self.get_temp_channel_manager(),
+            log_channel_cache=self.get_log_channel_cache(),
+        )
+
+    def sign(self, kind: str, action: str, resolved: ResolvedContext) -> str:
+        '''Create the signed custom_id of a modal or select menu for the resolved channel and member.'''
+        return self.get_custom_id_signer().encode(
+            kind=kind,
+            action=action,
+            channel_id=resolved.channel.id,
+            user_id=resolved.member.id
+        )
+
+    async def log(
+        self,
+        resolved: ResolvedContext,
+        message: str,
+        action: str,
+        targets: list[Member] = (),
+        details: str = None
+    ) -> None:
+        '''
+        Record the action in the audit log (one record per target)
+        and send a message to the log channel of the guild, if there is one.
+        '''
+        audit_log = self.get_audit_log()
+        for target in targets or [None]:
+            audit_log.append(
+                AuditRecord(
+                    guild_id=resolved.channel.guild.id,
+                    channel_id=resolved.channel.id,
+                    user_id=resolved.member.id,
+                    action=action,
+                    target_id=target.id if target else None,
+                    details=details
+                )
+            )
+
+        if not resolved.log_channel:
+            return
+        await send_log_message(
+            channel=resolved.log_channel,
+            message=message
+        )
+
+    @component_callback(*[button.custom_id for button in BUTTONS])
     async def button_callback(self, ctx: ComponentContext) -> None:
         """Handle button click events."""
 
+        # only the custom_ids of the interface are registered
+        route = ROUTER.resolve(ctx.custom_id)
+        if not route:
+            self.bot.logger.warning(f"No route for custom_id {ctx.custom_id}")
+            return
+
         user_voice = ctx.member.voice.channel if ctx.member.voice else None
         # check if user is in a voice channel
         if not user_voice:
@@ -70,104 +205,164 @@ class ButtonHandler(Extension):
             )
             return
 
+        action = ctx.custom_id.removeprefix("button|")
+
+        if await self.reject_while_draining(ctx):
+            return
+
+        # rejected clicks must not use up the cooldowns of the owner
+        resolved = await self.resolve(ctx.member, user_voice)
+        if not await self.check_requirements(ctx, route, resolved):
+            return
+
+        # a repeated click joins the running action, it does not count against the rate limit
+        key = inflight_key(user_voice.id, action, ctx.member.id)
+        if route.deduplicate and self.get_inflight().is_running(key):
+            await self.run_handler(ctx, route, resolved)
+            return
+
         # check if user can perform action (rate limiting)
-        button_ratelimit = False
-
-        if button_ratelimit:
-            rate_limiter = self.get_rate_limiter()
-            can = rate_limiter.can_perform_action(ctx.member.id)
-            if not can:
-                descrition = f"Du kannst diesen Knopf verwenden: <t:{can.end_time()}:R>"
-                await ctx.send(
-                    embed=error_embed(
-                        title="Nicht so schnell!",
-                        description=descrition
-                    ),
-                    ephemeral=True,
-                    delete_after=5
-                )
-                return
+        # the action is limited per user and per channel, before any modal or REST call
+        action_rate_limiter = self.get_action_rate_limiter()
+        can = action_rate_limiter.acquire(
+            action=action,
+            user_id=ctx.member.id,
+            channel_id=user_voice.id
+        )
+        if not can:
+            self.get_metrics().rate_limited.inc("button", action)
+            descrition = f"Du kannst diesen Knopf verwenden: <t:{can.end_time()}:R>"
+            await ctx.send(
+                embed=error_embed(
+                    title="Nicht so schnell!",
+                    description=descrition
+                ),
+                ephemeral=True,
+                delete_after=5
+            )
+            return
 
-        # get channel manager and rate limiter
-        channel_manager = self.get_temp_channel_manager()
-        managed_channel = channel_manager.get_channel_by_id(
-            user_voice.id)
+        await self.run_handler(ctx, route, resolved)
 
-        rate_limiter = self.get_rate_limiter()
+    @component_callback(re.compile(r"^select\|"))
+    async def select_callback(self, ctx: ComponentContext) -> None:
+        """Handle the select menus sent by the buttons."""
+        await self.signed_callback(ctx)
 
-        guild = self.get_guild_config()
-        creator = guild.get_creator_by_category_id(user_voice.parent_id)
+    @modal_callback(re.compile(r"^modal\|"))
+    async def modal_callback(self, ctx: ModalContext) -> None:
+        """Handle the modals sent by the buttons."""
+        await self.signed_callback(ctx)
 
-        if ctx.custom_id == take_owner.custom_id:
-            await self.button_take_owner(ctx, user_voice)
+    async def signed_callback(self, ctx: Union[ComponentContext, ModalContext]) -> None:
+        """
+        Route a modal or select menu by its signed custom_id.
+        The target channel is taken from the custom_id, so no coroutine has to wait for the answer.
+        """
+        if await self.reject_while_draining(ctx):
             return
 
-        if not managed_channel:
+        signed = self.get_custom_id_signer().decode(ctx.custom_id, ctx.author.id)
+        route = ROUTER.resolve(signed.route_id) if signed else None
+        if not route:
             await ctx.send(
                 ephemeral=True,
                 delete_after=5,
                 embed=error_embed(
                     title="Fehler",
-                    description="Dieser Kanal hat keinen Besitzer."
+                    description="Diese Aktion ist ungültig."
                 )
             )
             return
 
-        if ctx.custom_id not in [
-            show_owner.custom_id,
-            take_owner.custom_id
-        ]:
-
-            is_admin = creator.member_has_channel_owner_permissions(ctx.member)
-            is_owner = managed_channel.owner == ctx.member.id
-
-            # check if user is admin or owner of the channel
-            if not is_admin and not is_owner:
-                await ctx.send(
-                    ephemeral=True,
-                    delete_after=5,
-                    embed=error_embed(
-                        title="Fehler",
-                        description="Du bist nicht der Besitzer dieses Kanals."
-                    )
+        channel = ctx.guild.get_channel(signed.channel_id)
+        if not isinstance(channel, GuildVoice):
+            await ctx.send(
+                ephemeral=True,
+                delete_after=5,
+                embed=error_embed(
+                    title="Fehler",
+                    description="Dieser Kanal existiert nicht mehr."
                 )
-                return
-
-        match ctx.custom_id:
-            # raw: general
-            case name.custom_id:
-                await self.button_name(ctx, user_voice)
-            case status.custom_id:
-                await self.button_status(ctx, user_voice)
-
-            case size.custom_id:
-                await self.button_size(ctx, user_voice)
-            case lock.custom_id:
-                await self.button_lock(ctx, user_voice)
-            case unlock.custom_id:
-                await self.button_unlock(ctx, user_voice)
-            # raw: moderation
-            case kick.custom_id:
-                await self.button_kick(ctx, user_voice)
-            case ban.custom_id:
-                await self.button_ban(ctx, user_voice)
-            case invite.custom_id:
-                await self.button_invite(ctx, user_voice)
-            # raw: ownership
-            case show_owner.custom_id:
-                await self.button_show_owner(ctx, user_voice)
-            case take_owner.custom_id:
-                await self.button_take_owner(ctx, user_voice)
-            case transfer_owner.custom_id:
-                await self.button_transfer_owner(ctx, user_voice)
-
-        # todo: add modals for name and size
-        # todo: add MemberSelecbutton|tMenu Response for kick, ban, invite, transfer
-        # todo: record action in rate limiter
+            )
+            return
+
+        await self.dispatch(ctx, route, channel)
+
+    async def reject_while_draining(self, ctx: Union[ComponentContext, ModalContext]) -> bool:
+        '''No new actions are started once the shutdown started.'''
+        if not self.get_shutdown().draining:
+            return False
+        await ctx.send(
+            ephemeral=True,
+            delete_after=5,
+            embed=error_embed(
+                title="Neustart",
+                description="Der Bot wird gerade neu gestartet. Bitte versuche es gleich erneut."
+            )
+        )
+        return True
+
+    async def dispatch(
+        self,
+        ctx: Union[ComponentContext, ModalContext],
+        route: ButtonRoute,
+        channel: GuildVoice
+    ) -> None:
+        """Check the requirements of the route and call its handler."""
+
+        # resolve config, creator, managed channel and log channel once
+        resolved = await self.resolve(ctx.member, channel)
+        if not await self.check_requirements(ctx, route, resolved):
+            return
+
+        await self.run_handler(ctx, route, resolved)
+
+    async def check_requirements(
+        self,
+        ctx: Union[ComponentContext, ModalContext],
+        route: ButtonRoute,
+        resolved: ResolvedContext
+    ) -> bool:
+        """Check the requirements of the route, the user gets an error if one is not met."""
+        if route.requires_managed and not resolved.managed_channel:
+            await ctx.send(
+                ephemeral=True,
+                delete_after=5,
+                embed=error_embed(
+                    title="Fehler",
+                    description="Dieser Kanal hat keinen Besitzer."
+                )
+            )
+            return False
+
+        # check if user is admin or owner of the channel
+        if route.requires_owner and not resolved.can_manage:
+            await ctx.send(
+                ephemeral=True,
+                delete_after=5,
+                embed=error_embed(
+                    title="Fehler",
+                    description="Du bist nicht der Besitzer dieses Kanals."
+                )
+            )
+            return False
+        return True
+
+    async def run_handler(
+        self,
+        ctx: Union[ComponentContext, ModalContext],
+        route: ButtonRoute,
+        resolved: ResolvedContext
+    ) -> None:
+        # the shutdown waits for the handler
+        with self.get_shutdown().work():
+            await route.handler(self, ctx, resolved)
 
     # raw: general
-    async def button_name(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''sends a modal'''
+    @ROUTER.route(name.custom_id)
+    async def button_name(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends a modal, the answer is handled by modal_name.'''
         model = Modal(
             ShortText(
                 label="Neuer Name",
@@ -178,55 +373,41 @@ class ButtonHandler(Extension):
                 min_length=1
             ),
             title="Name des Kanals ändern",
-            custom_id="channel_name",
+            custom_id=self.sign("modal", "name", resolved),
         )
         await ctx.send_modal(model)
 
-        try:
-            model_ctx = await ctx.bot.wait_for_modal(modal=model, timeout=30)
-        except asyncio.TimeoutError:
-            return
-
-        new_name = model_ctx.responses.get("channel_name")
-
-        # rename channel
-        try:
-            await user_voice.edit(
-                name=new_name,
-                reason=f"Kanalname geändert von {ctx.member.username}",
-            )
-        except Exception:
-            await model_ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Der Kanalname konnte nicht geändert werden."
-                )
-            )
-            return
+    @ROUTER.route("modal|name")
+    async def modal_name(self, ctx: ModalContext, resolved: ResolvedContext) -> None:
+        '''Renames the channel with the answer of the modal.'''
+        user_voice = resolved.channel
+        new_name = ctx.responses.get("channel_name")
+
+        # queue the rename, it is applied as soon as the channel allows it
+        eta = self.get_edit_coalescer().submit(
+            user_voice,
+            name=new_name,
+            reason=f"Kanalname geändert von {ctx.member.username}"
+        )
 
         # send confirmation message
-        await model_ctx.send(
+        await ctx.send(
             ephemeral=True,
             delete_after=5,
-            content=f"Kanalname geändert zu {new_name}",
+            content=f"Kanalname wird <t:{eta}:R> zu {new_name} geändert",
         )
 
         # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanalnamen geändert zu: **{new_name}**"
-            )
-        except Exception as e:
-            print(e)
+        await self.log(
+            resolved,
+            message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanalnamen geändert zu: **{new_name}**",
+            action="name",
+            details=new_name
+        )
 
-    async def button_status(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''Sends a modal to update the status of the voice channel.'''
+    @ROUTER.route(status.custom_id)
+    async def button_status(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends a modal to update the status of the voice channel, the answer is handled by modal_status.'''
         model = Modal(
             ShortText(
                 label="Neuer Status",
@@ -235,62 +416,41 @@ class ButtonHandler(Extension):
                 max_length=100
             ),
             title="Status des Kanals ändern",
-            custom_id="channel_status",
+            custom_id=self.sign("modal", "status", resolved),
         )
         await ctx.send_modal(model)
 
-        try:
-            model_ctx = await ctx.bot.wait_for_modal(modal=model, timeout=30)
-        except asyncio.TimeoutError:
-            return
-
-        new_status = model_ctx.responses.get("channel_status")
-
-        # Update the channel status
-        try:
-            bot_token = ctx.bot.token
-            response = update_voice_channel_status(
-                bot_token=bot_token,
-                channel_id=str(user_voice.id),
-                status=new_status,
-                audit_log_reason=f"Status geändert von {ctx.member.username}"
-            )
-            print(response.status_code)
-            if response.status_code != 204:
-                raise Exception(
-                    f"Failed to update status: {response.status_code}")
-        except Exception:
-            await model_ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Der Status konnte nicht geändert werden."
-                )
-            )
-            return
+    @ROUTER.route("modal|status")
+    async def modal_status(self, ctx: ModalContext, resolved: ResolvedContext) -> None:
+        '''Updates the status of the channel with the answer of the modal.'''
+        user_voice = resolved.channel
+        new_status = ctx.responses.get("channel_status")
+
+        # queue the status update
+        eta = self.get_edit_coalescer().submit(
+            user_voice,
+            status=new_status,
+            reason=f"Status geändert von {ctx.member.username}"
+        )
 
         # Send confirmation message
-        await model_ctx.send(
+        await ctx.send(
             ephemeral=True,
             delete_after=5,
-            content=f"Status geändert zu: {new_status}",
+            content=f"Status wird <t:{eta}:R> geändert zu: {new_status}",
         )
 
-        # Send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanalstatus geändert zu: **{new_status}**"
-            )
-        except Exception as e:
-            print(e)
+        # send log message
+        await self.log(
+            resolved,
+            message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanalstatus geändert zu: **{new_status}**",
+            action="status",
+            details=new_status
+        )
 
-    async def button_size(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''sends a modal'''
+    @ROUTER.route(size.custom_id)
+    async def button_size(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends a modal, the answer is handled by modal_size.'''
         model = Modal(
             ShortText(
                 label="Neue Größe",
@@ -301,20 +461,19 @@ class ButtonHandler(Extension):
                 min_length=1
             ),
             title="Größe des Kanals ändern",
-            custom_id="channel_size",
+            custom_id=self.sign("modal", "size", resolved),
         )
         await ctx.send_modal(model)
 
-        try:
-            model_ctx = await ctx.bot.wait_for_modal(modal=model, timeout=30)
-        except asyncio.TimeoutError:
-            return
-
-        new_size = model_ctx.responses.get("channel_size")
+    @ROUTER.route("modal|size")
+    async def modal_size(self, ctx: ModalContext, resolved: ResolvedContext) -> None:
+        '''Changes the limit of the channel with the answer of the modal.'''
+        user_voice = resolved.channel
+        new_size = ctx.responses.get("channel_size")
 
         # check if new size is a number
         if not new_size.isdigit():
-            await model_ctx.send(
+            await ctx.send(
                 ephemeral=True,
                 delete_after=5,
                 embed=error_embed(
@@ -324,423 +483,355 @@ class ButtonHandler(Extension):
             )
             return
 
-        # rename channel
-        await user_voice.edit(
+        # queue the new limit
+        eta = self.get_edit_coalescer().submit(
+            user_voice,
             user_limit=int(new_size),
-            reason=f"Limit geändert von {ctx.member.username}",
+            reason=f"Limit geändert von {ctx.member.username}"
         )
 
         # send confirmation message
-        await model_ctx.send(
+        await ctx.send(
             ephemeral=True,
             delete_after=5,
-            content=f"Limit geändert zu {new_size}"
+            content=f"Limit wird <t:{eta}:R> geändert zu {new_size}"
         )
 
         # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat das Kanal-Limit geändert zu: **{new_size}**"
-            )
-        except Exception as e:
-            print(e)
+        await self.log(
+            resolved,
+            message=f"{ctx.member.mention} ({ctx.member.id}) hat das Kanal-Limit geändert zu: **{new_size}**",
+            action="size",
+            details=new_size
+        )
 
-    async def button_lock(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
+    @ROUTER.route(lock.custom_id, deduplicate=True)
+    async def button_lock(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
         '''directly locks the channel'''
+        user_voice = resolved.channel
+
+        async def lock_channel() -> bool:
+            everyone = user_voice.guild.default_role
+            changed = await self.get_permission_engine().apply(
+                user_voice,
+                [PermissionChange(everyone, Permissions.CONNECT, False)],
+                reason="Kanal wurde gesperrt"
+            )
+            if changed:
+                # send log message
+                await self.log(
+                    resolved,
+                    message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanal gesperrt.",
+                    action="lock"
+                )
+            return changed
 
-        everyone = user_voice.guild.default_role
-        await user_voice.set_permission(everyone, connect=False, reason="Kanal wurde gesperrt")
-
-        await ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content="Kanal wurde gesperrt",
-        )
-
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanal gesperrt."
+        async def work() -> str:
+            # repeated clicks share the running lock
+            changed, _ = await self.get_inflight().run(
+                inflight_key(user_voice.id, "lock", ctx.member.id),
+                lock_channel
             )
-        except Exception as e:
-            print(e)
-
-    async def button_unlock(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''directly unlocks the channel'''
+            # nothing was done, the channel is already locked
+            return "Kanal wurde gesperrt" if changed else "Kanal ist bereits gesperrt"
 
-        everyone = user_voice.guild.default_role
-        await user_voice.set_permission(everyone, connect=True, reason="Kanal wurde entsperrt")
+        await self.get_responder().respond(ctx, lock.custom_id, work)
 
-        await ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content="Kanal wurde entsperrt",
-        )
+    @ROUTER.route(unlock.custom_id, deduplicate=True)
+    async def button_unlock(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''directly unlocks the channel'''
+        user_voice = resolved.channel
+
+        async def unlock_channel() -> bool:
+            everyone = user_voice.guild.default_role
+            changed = await self.get_permission_engine().apply(
+                user_voice,
+                [PermissionChange(everyone, Permissions.CONNECT, True)],
+                reason="Kanal wurde entsperrt"
+            )
+            if changed:
+                # send log message
+                await self.log(
+                    resolved,
+                    message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanal entsperrt.",
+                    action="unlock"
+                )
+            return changed
 
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat den Kanal entsperrt."
+        async def work() -> str:
+            # repeated clicks share the running unlock
+            changed, _ = await self.get_inflight().run(
+                inflight_key(user_voice.id, "unlock", ctx.member.id),
+                unlock_channel
             )
-        except Exception as e:
-            print(e)
+            # nothing was done, the channel is already unlocked
+            return "Kanal wurde entsperrt" if changed else "Kanal ist bereits entsperrt"
+
+        await self.get_responder().respond(ctx, unlock.custom_id, work)
 
     # raw: moderation
-    async def button_kick(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''Sends an ephemeral message with a user select menu to kick a member from the channel.'''
+    @ROUTER.route(kick.custom_id)
+    async def button_kick(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends an ephemeral message with a user select menu to kick members from the channel.'''
 
         # Create a member select menu
         member_select = UserSelectMenu(
-            custom_id="kick_member_select",
-            placeholder="Wähle ein Mitglied aus",
-            max_values=1
+            custom_id=self.sign("select", "kick", resolved),
+            placeholder="Wähle Mitglieder aus",
+            max_values=MAX_SELECTED_MEMBERS
         )
 
         # Send the select menu to the user
         await ctx.send(
             ephemeral=True,
             delete_after=30,
-            content="Wähle ein Mitglied aus, um es aus dem Kanal zu entfernen:",
+            content="Wähle Mitglieder aus, um sie aus dem Kanal zu entfernen:",
             components=member_select
         )
 
-        try:
-            # Wait for the user's selection
-            select_ctx = await ctx.bot.wait_for_component(
-                components=member_select,
-                timeout=30
-            )
-        except asyncio.TimeoutError:
-            return
-
-        # Get the selected member
-        selected_member_id = select_ctx.ctx.values[0]
-        selected_member = ctx.guild.get_member(int(selected_member_id))
-
-        if not selected_member:
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
+    @ROUTER.route("select|kick")
+    async def select_kick(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Kicks the selected members from the channel.'''
+        user_voice = resolved.channel
+
+        async def work() -> Union[str, Embed]:
+            # split the selection into members that can and can not be kicked
+            kickable = []
+            skipped = []
+            for member in await selected_members(ctx.guild, ctx.values):
+                if resolved.creator.member_can_not_be_kicked(member) or not in_channel(member, user_voice):
+                    skipped.append(member)
+                else:
+                    kickable.append(member)
+
+            if not kickable:
+                return error_embed(
                     title="Fehler",
-                    description="Das ausgewählte Mitglied konnte nicht gefunden werden."
+                    description="Keines der ausgewählten Mitglieder kann aus diesem Kanal entfernt werden."
                 )
-            )
-            return
 
-        # check if the selected member can not be kicked (creator config)
-        creator = self.get_guild_config().get_creator_by_category_id(user_voice.parent_id)
-        if creator.member_can_not_be_kicked(selected_member):
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Das ausgewählte Mitglied kann nicht entfernt werden."
-                )
-            )
-            return
+            kicked = await disconnect_members(kickable, self.bot.logger)
 
-        # Check if the selected member is in the voice channel
-        if not selected_member.voice or selected_member.voice.channel.id != user_voice.id:
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Das ausgewählte Mitglied ist nicht in diesem Kanal."
+            # send log message
+            if kicked:
+                await self.log(
+                    resolved,
+                    message=f"{ctx.member.mention} ({ctx.member.id}) hat {mentions(kicked)} aus dem Kanal entfernt.",
+                    action="kick",
+                    targets=kicked
                 )
-            )
-            return
 
-        await selected_member.disconnect()
+            # one summary for all members
+            return summary("aus dem Kanal entfernt", kicked, skipped, [m for m in kickable if m not in kicked])
 
-        # Send confirmation message
-        await select_ctx.ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content=f"{selected_member.mention} wurde erfolgreich aus dem Kanal entfernt."
-        )
+        await self.get_responder().respond(ctx, "select|kick", work, delete_after=10)
 
-        # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat {selected_member.mention} ({selected_member.id}) aus dem Kanal entfernt."
-            )
-        except Exception as e:
-            print(e)
-
-    async def button_ban(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''Sends an ephemeral message with a user select menu to ban a member from the channel.'''
+    @ROUTER.route(ban.custom_id)
+    async def button_ban(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends an ephemeral message with a user select menu to ban members from the channel.'''
 
         # Create a member select menu
         member_select = UserSelectMenu(
-            custom_id="ban_member_select",
-            placeholder="Wähle ein Mitglied aus",
-            max_values=1
+            custom_id=self.sign("select", "ban", resolved),
+            placeholder="Wähle Mitglieder aus",
+            max_values=MAX_SELECTED_MEMBERS
         )
 
         # Send the select menu to the user
         await ctx.send(
             ephemeral=True,
             delete_after=30,
-            content="Wähle ein Mitglied aus, um es aus dem Kanal zu verbannen:",
+            content="Wähle Mitglieder aus, um sie aus dem Kanal zu verbannen:",
             components=member_select
         )
 
-        try:
-            # Wait for the user's selection
-            select_ctx = await ctx.bot.wait_for_component(
-                components=member_select,
-                timeout=30
-            )
-        except asyncio.TimeoutError:
-            return
-
-        # Get the selected member
-        selected_member_id = select_ctx.ctx.values[0]
-        selected_member = ctx.guild.get_member(int(selected_member_id))
-
-        if not selected_member:
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
+    @ROUTER.route("select|ban")
+    async def select_ban(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Bans the selected members from the channel.'''
+        user_voice = resolved.channel
+
+        async def work() -> Union[str, Embed]:
+            # Check which selected members can not be banned (creator config)
+            bannable = []
+            skipped = []
+            for member in await selected_members(ctx.guild, ctx.values):
+                if resolved.creator.member_can_not_be_kicked(member):
+                    skipped.append(member)
+                else:
+                    bannable.append(member)
+
+            if not bannable:
+                return error_embed(
                     title="Fehler",
-                    description="Das ausgewählte Mitglied konnte nicht gefunden werden."
+                    description="Keines der ausgewählten Mitglieder kann verbannt werden."
                 )
-            )
-            return
 
-        # Check if the selected member can not be banned (creator config)
-        creator = self.get_guild_config().get_creator_by_category_id(user_voice.parent_id)
-        if creator.member_can_not_be_kicked(selected_member):
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Das ausgewählte Mitglied kann nicht verbannt werden."
+            connected = [member for member in bannable if in_channel(member, user_voice)]
+            # all overwrites are written with one edit, the disconnects run at the same time
+            applied, disconnected = await asyncio.gather(
+                self.get_permission_engine().apply(
+                    user_voice,
+                    [PermissionChange(member, Permissions.CONNECT, False) for member in bannable],
+                    reason=f"Mitglieder wurden von {ctx.member.username} verbannt"
+                ),
+                disconnect_members(connected, self.bot.logger),
+                return_exceptions=True
+            )
+            if isinstance(applied, Exception):
+                self.bot.logger.error(f"Error banning members from channel {user_voice.id}: {applied}")
+
+            # a member is banned once the overwrite is written and it is not connected anymore
+            banned = [
+                member for member in bannable
+                if not isinstance(applied, Exception)
+                and (member not in connected or member in disconnected)
+            ]
+            failed = [member for member in bannable if member not in banned]
+
+            # send log message
+            if banned:
+                await self.log(
+                    resolved,
+                    message=f"{ctx.member.mention} ({ctx.member.id}) hat {mentions(banned)} aus dem Kanal verbannt.",
+                    action="ban",
+                    targets=banned
                 )
-            )
-            return
 
-        await user_voice.set_permission(selected_member, connect=False, reason=f"Mitglied wurde von {ctx.member.username} verbannt")
+            # one summary for all members
+            return summary("aus dem Kanal verbannt", banned, skipped, failed)
 
-        # only kick user if they are in the same voice channel
-        if selected_member.voice and selected_member.voice.channel and selected_member.voice.channel.id == user_voice.id:
-            await selected_member.disconnect()
+        await self.get_responder().respond(ctx, "select|ban", work, delete_after=10)
 
-        # Send confirmation message
-        await select_ctx.ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content=f"{selected_member.mention} wurde erfolgreich aus dem Kanal verbannt.",
-        )
-
-        # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat {selected_member.mention} ({selected_member.id}) aus dem Kanal verbannt."
-            )
-        except Exception as e:
-            print(e)
-
-    async def button_invite(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''Sends an ephemeral message with a user select menu to invite a member to the channel.'''
+    @ROUTER.route(invite.custom_id)
+    async def button_invite(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends an ephemeral message with a user select menu to invite members to the channel.'''
 
         # Create a member select menu
         member_select = UserSelectMenu(
-            custom_id="invite_member_select",
-            placeholder="Wähle ein Mitglied aus",
-            max_values=1
+            custom_id=self.sign("select", "invite", resolved),
+            placeholder="Wähle Mitglieder aus",
+            max_values=MAX_SELECTED_MEMBERS
         )
 
         # Send the select menu to the user
         await ctx.send(
             ephemeral=True,
             delete_after=30,
-            content="Wähle ein Mitglied aus, um es in den Kanal einzuladen:",
+            content="Wähle Mitglieder aus, um sie in den Kanal einzuladen:",
             components=member_select
         )
 
-        try:
-            # Wait for the user's selection
-            select_ctx = await ctx.bot.wait_for_component(
-                components=member_select,
-                timeout=30
-            )
-        except asyncio.TimeoutError:
-            return
+    @ROUTER.route("select|invite")
+    async def select_invite(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Invites the selected members to the channel.'''
+        user_voice = resolved.channel
 
-        # Get the selected member
-        selected_member_id = select_ctx.ctx.values[0]
-        selected_member = ctx.guild.get_member(int(selected_member_id))
-
-        if not selected_member:
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
+        async def work() -> Union[str, Embed]:
+            invited = await selected_members(ctx.guild, ctx.values)
+            if not invited:
+                return error_embed(
                     title="Fehler",
-                    description="Das ausgewählte Mitglied konnte nicht gefunden werden."
+                    description="Die ausgewählten Mitglieder konnten nicht gefunden werden."
                 )
+
+            # all overwrites are written with one edit
+            await self.get_permission_engine().apply(
+                user_voice,
+                [PermissionChange(member, Permissions.CONNECT, True) for member in invited],
+                reason="Einladung in den Kanal"
             )
-            return
 
-        await user_voice.set_permission(selected_member, connect=True, reason="Einladung in den Kanal")
+            # send log message
+            await self.log(
+                resolved,
+                message=f"{ctx.member.mention} ({ctx.member.id}) hat {mentions(invited)} in den Kanal eingeladen.",
+                action="invite",
+                targets=invited
+            )
 
-        # Send confirmation message
-        await select_ctx.ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content=f"{selected_member.mention} wurde erfolgreich in den Kanal eingeladen."
-        )
+            # one summary for all members
+            return summary("in den Kanal eingeladen", invited, [])
 
-        # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat {selected_member.mention} ({selected_member.id}) in den Kanal eingeladen."
-            )
-        except Exception as e:
-            print(e)
+        await self.get_responder().respond(ctx, "select|invite", work, delete_after=10)
 
     # raw: ownership
-    async def button_show_owner(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
+    @ROUTER.route(show_owner.custom_id, requires_owner=False)
+    async def button_show_owner(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
         '''Directly send an ephemeral message with the owner of the channel.'''
-        channel_manager = self.get_temp_channel_manager()
-        managed_channel = channel_manager.get_channel_by_id(user_voice.id)
-
-        if not managed_channel:
-            await ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Dieser Kanal hat keinen Besitzer."
-                )
-            )
-            return
+        managed_channel = resolved.managed_channel
 
-        owner_id = managed_channel.owner
-        owner = ctx.guild.get_member(owner_id)
-
-        if not owner:
-            await ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
+        async def work() -> Union[str, Embed]:
+            # an owner that expired from the cache is fetched
+            owner = await get_member(ctx.guild, managed_channel.owner_id)
+            if not owner:
+                return error_embed(
                     title="Fehler",
                     description="Der Besitzer dieses Kanals konnte nicht gefunden werden."
                 )
-            )
-            return
+            return f"Der Besitzer dieses Kanals ist: {owner.mention}"
 
-        await ctx.send(
-            ephemeral=True,
-            delete_after=10,
-            content=f"Der Besitzer dieses Kanals ist: {owner.mention}"
-        )
+        await self.get_responder().respond(ctx, show_owner.custom_id, work, delete_after=10)
 
-    async def button_take_owner(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
+    @ROUTER.route(take_owner.custom_id, requires_managed=False, requires_owner=False, deduplicate=True)
+    async def button_take_owner(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
         '''Directly takes ownership of the channel if the current owner is not connected.'''
+        user_voice = resolved.channel
 
-        # Get the channel manager and the managed channel
-        channel_manager = self.get_temp_channel_manager()
-        managed_channel = channel_manager.get_channel_by_id(user_voice.id)
+        async def take_ownership() -> Optional[int]:
+            '''Returns the id of the owner after the action or None if the owner is still connected.'''
+            # Get the channel manager
+            channel_manager = self.get_temp_channel_manager()
 
-        # users can claim a channel that doesnt have an owner
-        if not managed_channel:
-            channel_manager._add_channel(
-                TempChannel(
+            # users can claim a channel that doesnt have an owner
+            managed_channel = channel_manager.get_channel_by_id(user_voice.id)
+            if not managed_channel:
+                managed_channel = TempChannel(
                     channel=user_voice,
                     owner=ctx.bot.user,
                     created_at=int(time.time())
                 )
-            )
+                channel_manager._add_channel(managed_channel)
 
-        # get newyl added channel
-        managed_channel = channel_manager.get_channel_by_id(user_voice.id)
+            # Check if the current owner is connected to the channel
+            # connected members never expire from the cache, an uncached owner is not connected
+            owner = ctx.guild.get_member(managed_channel.owner_id)
+            if owner and in_channel(owner, user_voice):
+                return owner.id if owner == ctx.member else None
 
-        # Check if the current owner is connected to the channel
-        owner_id = managed_channel.owner
-        owner = ctx.guild.get_member(owner_id)
+            # Transfer ownership to the user
+            channel_manager.set_owner(managed_channel, ctx.member)
 
-        if owner and owner.voice and owner.voice.channel and owner.voice.channel.id == user_voice.id:
-            await ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
-                    title="Fehler",
-                    description="Der Besitzer ist noch im Kanal und kann nicht ersetzt werden."
-                )
+            # send log message
+            await self.log(
+                resolved,
+                message=f"{ctx.member.mention} ({ctx.member.id}) hat die Kanalbesitzerschaft übernommen: **{user_voice.name}**",
+                action="take_owner"
             )
-            return
-
-        # Transfer ownership to the user
-        managed_channel.owner = ctx.member
+            return ctx.member.id
 
-        await ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content=f"Du bist jetzt der Besitzer des Kanals: {user_voice.name}"
-        )
-
-        # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat die Kanalbesitzerschaft übernommen: **{user_voice.name}**"
+        async def work() -> Union[str, Embed]:
+            # repeated clicks of the same user get the result of the running action
+            owner_id, _ = await self.get_inflight().run(
+                inflight_key(user_voice.id, "take_owner", ctx.member.id),
+                take_ownership
             )
-        except Exception as e:
-            print(e)
-
-    async def button_transfer_owner(self, ctx: ComponentContext, user_voice: GuildVoice) -> None:
-        '''Sends an ephemeral message with a user select menu to transfer ownership.'''
-
-        # Get the channel manager and the managed channel
-        channel_manager = self.get_temp_channel_manager()
-        managed_channel = channel_manager.get_channel_by_id(user_voice.id)
 
-        if not managed_channel:
-            await ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
+            if owner_id is None or owner_id != ctx.member.id:
+                return error_embed(
                     title="Fehler",
-                    description="Dieser Kanal hat keinen Besitzer."
+                    description="Der Besitzer ist noch im Kanal und kann nicht ersetzt werden."
                 )
-            )
-            return
+            return f"Du bist jetzt der Besitzer des Kanals: {user_voice.name}"
+
+        await self.get_responder().respond(ctx, take_owner.custom_id, work)
+
+    @ROUTER.route(transfer_owner.custom_id)
+    async def button_transfer_owner(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Sends an ephemeral message with a user select menu to transfer ownership.'''
 
         # Create a member select menu
         member_select = UserSelectMenu(
-            custom_id="transfer_owner_select",
+            custom_id=self.sign("select", "transfer_owner", resolved),
             placeholder="Wähle ein Mitglied aus",
             max_values=1
         )
@@ -753,47 +844,30 @@ class ButtonHandler(Extension):
             components=member_select
         )
 
-        try:
-            # Wait for the user's selection
-            select_ctx = await ctx.bot.wait_for_component(
-                components=member_select,
-                timeout=30
-            )
-        except asyncio.TimeoutError:
-            return
-
-        # Get the selected member
-        selected_member_id = select_ctx.ctx.values[0]
-        selected_member = ctx.guild.get_member(int(selected_member_id))
+    @ROUTER.route("select|transfer_owner")
+    async def select_transfer_owner(self, ctx: ComponentContext, resolved: ResolvedContext) -> None:
+        '''Transfers the ownership to the selected member.'''
 
-        if not selected_member:
-            await select_ctx.ctx.send(
-                ephemeral=True,
-                delete_after=5,
-                embed=error_embed(
+        async def work() -> Union[str, Embed]:
+            # Get the selected member
+            selected_member = await get_member(ctx.guild, int(ctx.values[0]))
+            if not selected_member:
+                return error_embed(
                     title="Fehler",
                     description="Das ausgewählte Mitglied konnte nicht gefunden werden."
                 )
-            )
-            return
 
-        # Transfer ownership
-        managed_channel.owner = selected_member.id
+            # Transfer ownership
+            channel_manager = self.get_temp_channel_manager()
+            channel_manager.set_owner(resolved.managed_channel, selected_member)
 
-        await select_ctx.ctx.send(
-            ephemeral=True,
-            delete_after=5,
-            content=f"Die Kanalbesitzerschaft wurde erfolgreich an {selected_member.mention} übertragen."
-        )
-
-        # send log message
-        try:
-            config = self.get_guild_config()
-            guild_config = config.get_guild_by_id(ctx.channel.guild.id)
-            log_channel = ctx.guild.get_channel(guild_config.log_channel)
-            await send_log_message(
-                channel=log_channel,
-                message=f"{ctx.member.mention} ({ctx.member.id}) hat die Kanalbesitzerschaft an {selected_member.mention} ({selected_member.id}) übertragen."
+            # send log message
+            await self.log(
+                resolved,
+                message=f"{ctx.member.mention} ({ctx.member.id}) hat die Kanalbesitzerschaft an {selected_member.mention} ({selected_member.id}) übertragen.",
+                action="transfer_owner",
+                targets=[selected_member]
             )
-        except Exception as e:
-            print(e)
+            return f"Die Kanalbesitzerschaft wurde erfolgreich an {selected_member.mention} übertragen."
+
+        await self.get_responder().respond(ctx, "select|transfer_owner", work)
@@ -0,0 +1,74 @@
+import hmac
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class SignedCustomId:
+    kind: str
+    action: str
+    channel_id: int
+
+    @property
+    def route_id(self) -> str:
+        return f"{self.kind}|{self.action}"
+
+
+class CustomIdSigner:
+    '''
+    This class encodes the action and the target channel into a custom_id.
+    The custom_id is signed for the user it was sent to, so it can not be
+    forged or reused by someone else.
+    The secret is derived from the bot token, the custom_ids stay valid across restarts.
+    An instance of this class is bound to the client.
+
+    format: kind|action|channel_id|signature
+    '''
+
+    separator = "|"
+    signature_length = 16
+
+    def __init__(self, secret: bytes):
+        self.secret = secret
+
+    @classmethod
+    def from_token(cls, bot_token: str) -> 'CustomIdSigner':
+        return cls(hashlib.sha256(f"custom_id:{bot_token}".encode()).digest())
+
+    def _sign(self, payload: str, user_id: int) -> str:
+        digest = hmac.new(
+            self.secret,
+            f"{payload}{self.separator}{user_id}".encode(),
+            hashlib.sha256
+        ).hexdigest()
+        return digest[:self.signature_length]
+
+    def encode(
+        self,
+        kind: str,
+        action: str,
+        channel_id: int,
+        user_id: int
+    ) -> str:
+        payload = self.separator.join((kind, action, str(int(channel_id))))
+        return f"{payload}{self.separator}{self._sign(payload, user_id)}"
+
+    def decode(
+        self,
+        custom_id: str,
+        user_id: int
+    ) -> Optional[SignedCustomId]:
+        '''
+        Decode a custom_id, returns None if it is invalid or not signed for the user.
+        '''
+        parts = custom_id.split(self.separator)
+        if len(parts) != 4 or not parts[2].isdigit():
+            return None
+
+        kind, action, channel_id, signature = parts
+        payload = self.separator.join((kind, action, channel_id))
+        if not hmac.compare_digest(signature, self._sign(payload, user_id)):
+            return None
+
+        return SignedCustomId(kind=kind, action=action, channel_id=int(channel_id))
@@ -0,0 +1,37 @@
+# custom imports
+from bot.interface.custom_id import CustomIdSigner
+
+
+def test_roundtrip() -> None:
+    signer = CustomIdSigner.from_token("token")
+    custom_id = signer.encode("modal", "name", 1366127044009791589, user_id=42)
+
+    assert len(custom_id) <= 100, "Discord only allows 100 characters"
+
+    signed = signer.decode(custom_id, user_id=42)
+    assert signed.kind == "modal"
+    assert signed.action == "name"
+    assert signed.channel_id == 1366127044009791589
+    assert signed.route_id == "modal|name"
+
+
+def test_survives_restart() -> None:
+    custom_id = CustomIdSigner.from_token("token").encode("select", "kick", 1, user_id=42)
+    assert CustomIdSigner.from_token("token").decode(custom_id, user_id=42)
+
+
+def test_rejects_forged_ids() -> None:
+    signer = CustomIdSigner.from_token("token")
+    custom_id = signer.encode("select", "kick", 1, user_id=42)
+
+    assert signer.decode(custom_id, user_id=43) is None, "Other users should be rejected"
+    assert signer.decode(custom_id.replace("|1|", "|2|"), user_id=42) is None, "Other channels should be rejected"
+    assert CustomIdSigner.from_token("other").decode(custom_id, user_id=42) is None
+    assert signer.decode("button|lock", user_id=42) is None
+
+
+if __name__ == '__main__':
+    test_roundtrip()
+    test_survives_restart()
+    test_rejects_forged_ids()
+    print("All tests passed.")
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+
+from typing import Iterable, Optional
+from interactions import Guild, GuildVoice, Member
+
+# discord allows up to 25 values per select menu
+MAX_SELECTED_MEMBERS = 25
+# the number of disconnects that run at the same time
+DISCONNECT_CONCURRENCY = 5
+
+
+async def get_member(guild: Guild, member_id: int) -> Optional[Member]:
+    '''Get a cached member, members that expired from the cache are fetched.'''
+    return guild.get_member(member_id) or await guild.fetch_member(member_id)
+
+
+async def selected_members(guild: Guild, values: Iterable[str]) -> list[Member]:
+    '''
+    Get the members of a user select menu, unknown members are dropped.
+    Uncached members are fetched, so this belongs in the deferred work of a response.
+    '''
+    member_ids = []
+    for value in values:
+        if int(value) not in member_ids:
+            member_ids.append(int(value))
+    # the resolved members are cached, the rest is fetched at the same time
+    members = await asyncio.gather(
+        *[get_member(guild, member_id) for member_id in member_ids]
+    )
+    return [member for member in members if member]
+
+
+def in_channel(member: Member, channel: GuildVoice) -> bool:
+    return bool(member.voice and member.voice.channel and member.voice.channel.id == channel.id)
+
+
+def mentions(members: list[Member]) -> str:
+    return ", ".join(f"{member.mention} ({member.id})" for member in members)
+
+
+def summary(
+    action: str,
+    done: list[Member],
+    skipped: list[Member],
+    failed: list[Member] = ()
+) -> str:
+    '''Create one confirmation message for a moderation action on several members.'''
+    lines = []
+    if done:
+        lines.append(f"Erfolgreich {action}: {', '.join(member.mention for member in done)}")
+    if skipped:
+        lines.append(f"Übersprungen: {', '.join(member.mention for member in skipped)}")
+    if failed:
+        lines.append(f"Fehlgeschlagen: {', '.join(member.mention for member in failed)}")
+    return "\n".join(lines)
+
+
+async def disconnect_members(
+    members: list[Member],
+    logger: logging.Logger,
+    concurrency: int = DISCONNECT_CONCURRENCY
+) -> list[Member]:
+    '''
+    Disconnect the members with bounded concurrency.
+    Returns the members that were disconnected.
+    '''
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def disconnect(member: Member) -> bool:
+        async with semaphore:
+            try:
+                await member.disconnect()
+                return True
+            except Exception as e:
+                logger.error(f"Error disconnecting member {member.id}: {e}")
+                return False
+
+    results = await asyncio.gather(*(disconnect(member) for member in members))
+    return [member for member, success in zip(members, results) if success]
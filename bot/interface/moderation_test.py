@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+# custom imports
+from bot.interface.moderation import disconnect_members, selected_members, summary
+
+
+class FakeMember:
+    """
+    A member whose disconnect can fail.
+    """
+
+    def __init__(self, member_id: int, fails: bool = False):
+        self.id = member_id
+        self.mention = f"<@{member_id}>"
+        self.fails = fails
+        self.disconnected = False
+
+    async def disconnect(self) -> None:
+        await asyncio.sleep(0.01)
+        if self.fails:
+            raise RuntimeError("Missing permissions")
+        self.disconnected = True
+
+
+def test_disconnect_members_reports_failures() -> None:
+    members = [FakeMember(1), FakeMember(2, fails=True), FakeMember(3)]
+
+    disconnected = asyncio.run(disconnect_members(members, logging.getLogger(__name__)))
+
+    assert disconnected == [members[0], members[2]], "A failed disconnect should not stop the others"
+    assert not members[1].disconnected
+
+
+def test_disconnect_members_is_bounded() -> None:
+    state = SimpleNamespace(running=0, peak=0)
+
+    class CountingMember(FakeMember):
+        async def disconnect(self) -> None:
+            state.running += 1
+            state.peak = max(state.peak, state.running)
+            await asyncio.sleep(0.01)
+            state.running -= 1
+
+    members = [CountingMember(member_id) for member_id in range(12)]
+    disconnected = asyncio.run(disconnect_members(members, logging.getLogger(__name__), concurrency=3))
+
+    assert len(disconnected) == 12
+    assert state.peak == 3, "Only 3 disconnects should run at the same time"
+
+
+def test_summary() -> None:
+    done = [FakeMember(1), FakeMember(2)]
+    skipped = [FakeMember(3)]
+    failed = [FakeMember(4)]
+
+    assert summary("verbannt", done, skipped, failed) == (
+        "Erfolgreich verbannt: <@1>, <@2>\n"
+        "Übersprungen: <@3>\n"
+        "Fehlgeschlagen: <@4>"
+    )
+    assert summary("eingeladen", done, []) == "Erfolgreich eingeladen: <@1>, <@2>"
+    assert summary("verbannt", [], [], failed) == "Fehlgeschlagen: <@4>"
+
+
+def test_selected_members_fetches_only_uncached() -> None:
+    cached = {1: FakeMember(1)}
+    fetched = []
+
+    async def fetch_member(member_id: int):
+        fetched.append(member_id)
+        # the third member left the guild
+        return FakeMember(member_id) if member_id != 3 else None
+
+    guild = SimpleNamespace(get_member=cached.get, fetch_member=fetch_member)
+    members = asyncio.run(selected_members(guild, ["1", "2", "2", "3"]))
+
+    assert [member.id for member in members] == [1, 2], "Unknown members should be dropped"
+    assert fetched == [2, 3], "Only uncached members should be fetched, each once"
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from interactions import GuildText, GuildVoice, Member
+
+from ..config_loader import Creator, GuildConfig
+from ..channel_manager import TempChannel
+
+if TYPE_CHECKING:
+    from bot.channel_manager import TempChannelManager
+    from bot.channel_logger import LogChannelCache
+    from bot.config_loader import GuildConfigLoader
+
+
+@dataclass
+class ResolvedContext:
+    '''
+    Everything a handler needs to know about an interaction.
+    It is resolved once per interaction and passed to the handlers.
+    '''
+    member: Member
+    channel: GuildVoice
+    guild_config: Optional[GuildConfig]
+    creator: Optional[Creator]
+    managed_channel: Optional[TempChannel]
+    log_channel: Optional[GuildText]
+    is_owner: bool
+    is_admin: bool
+
+    @property
+    def can_manage(self) -> bool:
+        return self.is_owner or self.is_admin
+
+
+def resolve_context(
+    member: Member,
+    channel: GuildVoice,
+    guild_config_loader: 'GuildConfigLoader',
+    temp_channel_manager: 'TempChannelManager',
+    log_channel_cache: 'LogChannelCache',
+) -> ResolvedContext:
+    '''
+    Resolve the guild config, creator, managed channel and log channel of a voice channel.
+    '''
+    guild_config = guild_config_loader.get_guild_by_id(channel.guild.id)
+
+    creator = None
+    log_channel = None
+    if guild_config:
+        creator = guild_config.get_creator_by_category_id(channel.parent_id)
+        log_channel = log_channel_cache.get(channel.guild, guild_config.log_channel)
+
+    managed_channel = temp_channel_manager.get_channel_by_id(channel.id)
+
+    return ResolvedContext(
+        member=member,
+        channel=channel,
+        guild_config=guild_config,
+        creator=creator,
+        managed_channel=managed_channel,
+        log_channel=log_channel,
+        is_owner=managed_channel is not None and managed_channel.owner_id == member.id,
+        is_admin=creator is not None and creator.member_has_channel_owner_permissions(member),
+    )
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Union
+
+from interactions import ComponentContext, Embed
+
+# custom imports
+from bot.embed_maker import error_embed
+
+# discord fails an interaction that is not acknowledged within 3 seconds
+ACK_DEADLINE = 3.0
+
+
+@dataclass
+class AckStats:
+    '''
+    The acknowledgement latency of one action.
+    '''
+    count: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    deadline_misses: int = 0
+    timeouts: int = 0
+
+    def record(self, latency: float, deadline: float = ACK_DEADLINE) -> None:
+        self.count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if latency > deadline:
+            self.deadline_misses += 1
+
+    @property
+    def average_latency(self) -> float:
+        if not self.count:
+            return 0.0
+        return self.total_latency / self.count
+
+
+class InteractionResponder:
+    '''
+    This class acknowledges an interaction right away and runs the REST work
+    of the handler in a background task. The deferred response is edited
+    with the result once the work is done or the timeout is reached.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        deadline: float = ACK_DEADLINE
+    ):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.stats: dict[str, AckStats] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    def get_stats(self, action: str) -> AckStats:
+        if action not in self.stats:
+            self.stats[action] = AckStats()
+        return self.stats[action]
+
+    async def respond(
+        self,
+        ctx: ComponentContext,
+        action: str,
+        work: Callable[[], Awaitable[Union[str, Embed]]],
+        delete_after: float = 5
+    ) -> None:
+        '''
+        Defer the interaction, run the work and send its result.
+        The work returns the content or an embed of the response.
+        '''
+        stats = self.get_stats(action)
+
+        await ctx.defer(ephemeral=True)
+        # the latency is measured from the creation of the interaction
+        stats.record(time.time() - ctx.id.created_at.timestamp(), self.deadline)
+
+        # the task keeps running if the timeout is reached
+        task = asyncio.create_task(work())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            result = "Die Aktion dauert länger als erwartet und wird im Hintergrund abgeschlossen."
+        except Exception as e:
+            ctx.bot.logger.error(f"Error in action {action}: {e}")
+            result = error_embed(
+                title="Fehler",
+                description="Die Aktion konnte nicht ausgeführt werden."
+            )
+
+        if isinstance(result, Embed):
+            await ctx.send(embed=result, ephemeral=True, delete_after=delete_after)
+        else:
+            await ctx.send(content=result, ephemeral=True, delete_after=delete_after)
+
+    def pending_count(self) -> int:
+        return len(self.tasks)
@@ -0,0 +1,62 @@
+import asyncio
+import datetime
+import logging
+from types import SimpleNamespace
+
+# custom imports
+from bot.interface.responder import AckStats, InteractionResponder
+
+
+class FakeContext:
+    """
+    An interaction that records its responses.
+    """
+
+    def __init__(self):
+        self.id = SimpleNamespace(created_at=datetime.datetime.now(datetime.timezone.utc))
+        self.bot = SimpleNamespace(logger=logging.getLogger(__name__))
+        self.deferred = False
+        self.responses = []
+
+    async def defer(self, ephemeral: bool = False) -> None:
+        self.deferred = True
+
+    async def send(self, content: str = None, embed=None, **kwargs) -> None:
+        assert self.deferred, "The interaction should be deferred before the response"
+        self.responses.append(content or embed)
+
+
+def test_ack_stats() -> None:
+    stats = AckStats()
+    stats.record(0.5)
+    stats.record(3.5)
+
+    assert stats.count == 2
+    assert stats.average_latency == 2.0
+    assert stats.max_latency == 3.5
+    assert stats.deadline_misses == 1
+
+
+def test_slow_work_keeps_running() -> None:
+    """
+    Test that the response is sent at the timeout and the work is finished in the background.
+    """
+    ctx = FakeContext()
+    responder = InteractionResponder(timeout=0.05)
+    done = []
+
+    async def work() -> str:
+        await asyncio.sleep(0.1)
+        done.append(1)
+        return "fertig"
+
+    async def run() -> None:
+        await responder.respond(ctx, "lock", work)
+        assert responder.pending_count() == 1
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert done == [1], "The work should not be cancelled by the timeout"
+    assert len(ctx.responses) == 1
+    assert responder.get_stats("lock").timeouts == 1
+    assert responder.get_stats("lock").deadline_misses == 0
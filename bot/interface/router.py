@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class ButtonRoute:
+    '''
+    A handler of the interface together with its requirements.
+    requires_managed: the channel must have an owner
+    requires_owner: the user must be the owner or have owner permissions
+    deduplicate: a click while the same action is running joins that action
+    '''
+    custom_id: str
+    handler: Callable
+    requires_managed: bool = True
+    requires_owner: bool = True
+    deduplicate: bool = False
+
+
+class ButtonRouter:
+    '''
+    This class maps custom_ids to their handlers.
+    Exact custom_ids are resolved with a single dict lookup,
+    prefix routes match the part before the first separator.
+    '''
+
+    def __init__(self, separator: str = "|"):
+        self.separator = separator
+        self.routes: dict[str, ButtonRoute] = {}
+        self.prefix_routes: dict[str, ButtonRoute] = {}
+
+    def route(
+        self,
+        custom_id: str,
+        prefix: bool = False,
+        requires_managed: bool = True,
+        requires_owner: bool = True,
+        deduplicate: bool = False,
+    ) -> Callable[[Callable], Callable]:
+        '''
+        Register the decorated function as handler of the custom_id.
+        '''
+        def decorator(handler: Callable) -> Callable:
+            routes = self.prefix_routes if prefix else self.routes
+            if custom_id in routes:
+                raise ValueError(f"Duplicate route for custom_id '{custom_id}'")
+            routes[custom_id] = ButtonRoute(
+                custom_id=custom_id,
+                handler=handler,
+                requires_managed=requires_managed,
+                requires_owner=requires_owner,
+                deduplicate=deduplicate,
+            )
+            return handler
+        return decorator
+
+    def resolve(self, custom_id: str) -> Optional[ButtonRoute]:
+        route = self.routes.get(custom_id)
+        if route is not None:
+            return route
+        if self.prefix_routes:
+            prefix = custom_id.split(self.separator, 1)[0]
+            return self.prefix_routes.get(prefix)
+        return None
+
+    @property
+    def custom_ids(self) -> list[str]:
+        return list(self.routes)
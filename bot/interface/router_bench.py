@@ -0,0 +1,63 @@
+'''
+Microbenchmark of the dispatch cost per interaction.
+
+Compares the old catch-all regex with the linear match cascade
+to the dict based ButtonRouter.
+
+usage: python -m bot.interface.router_bench [iterations]
+'''
+
+import re
+import sys
+import timeit
+
+# custom imports
+from bot.interface.router import ButtonRouter
+
+ACTIONS = [
+    "name", "status", "size", "lock", "unlock", "kick",
+    "ban", "invite", "show_owner", "take_owner", "transfer_owner"
+]
+CUSTOM_IDS = [f"button|{action}" for action in ACTIONS] + ["kick_member_select"]
+
+OLD_PATTERN = re.compile(r"button|[a-zA-Z0-9_]+")
+
+
+def old_dispatch(custom_id: str) -> str:
+    # the library searches the regex, then the handler walks the cascade
+    if not OLD_PATTERN.search(custom_id):
+        return None
+    for action in ACTIONS:
+        if custom_id == f"button|{action}":
+            return action
+    return None
+
+
+def make_router() -> ButtonRouter:
+    router = ButtonRouter()
+    for action in ACTIONS:
+        router.route(f"button|{action}")(action)
+    return router
+
+
+def main(iterations: int = 200_000) -> None:
+    router = make_router()
+    components = {custom_id: custom_id for custom_id in router.custom_ids}
+
+    def new_dispatch(custom_id: str) -> str:
+        # the library does an exact dict lookup, then the router resolves
+        if custom_id not in components:
+            return None
+        return router.resolve(custom_id).handler
+
+    for label, dispatch in (("regex + cascade", old_dispatch), ("router", new_dispatch)):
+        duration = timeit.timeit(
+            lambda: [dispatch(custom_id) for custom_id in CUSTOM_IDS],
+            number=iterations // len(CUSTOM_IDS)
+        )
+        per_call = duration / iterations * 1e9
+        print(f"{label:<16} {per_call:8.1f} ns per interaction")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
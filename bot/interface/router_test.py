@@ -0,0 +1,36 @@
+import pytest
+
+# custom imports
+from bot.interface.router import ButtonRouter
+
+
+def test_resolve_exact_and_prefix() -> None:
+    router = ButtonRouter()
+
+    @router.route("button|lock")
+    async def lock() -> None:
+        pass
+
+    @router.route("modal", prefix=True, requires_owner=False)
+    async def modal() -> None:
+        pass
+
+    assert router.resolve("button|lock").handler is lock
+    assert router.resolve("modal|name|123").handler is modal
+    assert not router.resolve("modal|name|123").requires_owner
+    assert router.resolve("kick_member_select") is None, "Unknown components should not be routed"
+    assert router.custom_ids == ["button|lock"]
+
+
+def test_duplicate_route() -> None:
+    router = ButtonRouter()
+    router.route("button|lock")(lambda: None)
+
+    with pytest.raises(ValueError):
+        router.route("button|lock")(lambda: None)
+
+
+if __name__ == '__main__':
+    test_resolve_exact_and_prefix()
+    test_duplicate_route()
+    print("All tests passed.")
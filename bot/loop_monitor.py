@@ -0,0 +1,110 @@
+'''
+Measures the scheduling delay of the event loop and reports blocking callbacks.
+
+The monitor task sleeps for a fixed interval, the time it wakes up late is
+the lag of the loop. A watchdog thread checks the heartbeat of the task,
+when the loop is stuck longer than the threshold it logs the stack of the
+loop thread, which shows the callback that blocks it.
+'''
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def quantile(values: list[float], q: float) -> float:
+    '''Get the quantile of sorted values (nearest rank).'''
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q * len(values)) - 1))
+    return values[index]
+
+
+def format_stack(frame) -> str:
+    return "".join(traceback.format_stack(frame)).rstrip()
+
+
+class LoopLagMonitor:
+    '''
+    This class measures the lag of the event loop it is started on.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        interval: float = 0.5,
+        threshold: float = 0.25,
+        samples: int = 1200
+    ):
+        self.logger = logger
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: deque[float] = deque(maxlen=samples)
+        self.stalls = 0
+        # written by the loop, read by the watchdog
+        self.heartbeat = 0.0
+        self.loop_thread_id: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+
+    def start(self) -> None:
+        '''Start the monitor on the running loop.'''
+        if self.running:
+            return
+        self.running = True
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.task = asyncio.get_running_loop().create_task(self._measure())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.running:
+            started_at = loop.time()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = time.monotonic()
+            self.lags.append(max(0.0, loop.time() - started_at - self.interval))
+
+    def _watch(self) -> None:
+        reported = False
+        while self.running:
+            time.sleep(self.threshold / 2)
+            blocked = time.monotonic() - self.heartbeat - self.interval
+            if blocked < self.threshold:
+                reported = False
+                continue
+            # one report per stall
+            if reported:
+                continue
+            reported = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.logger.warning(
+                    f"Event loop blocked for {blocked:.3f}s, running callback:\n{format_stack(frame)}"
+                )
+
+    def percentiles(self) -> dict[float, float]:
+        lags = sorted(self.lags)
+        return {q: quantile(lags, q) for q in QUANTILES}
+
+    def max_lag(self) -> float:
+        return max(self.lags, default=0.0)
+
+    def summary(self) -> str:
+        values = ", ".join(f"p{int(q * 100)}={lag * 1000:.1f}ms" for q, lag in self.percentiles().items())
+        return f"{values}, max={self.max_lag() * 1000:.1f}ms, stalls={self.stalls}"
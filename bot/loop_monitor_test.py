@@ -0,0 +1,32 @@
+import asyncio
+import logging
+import time
+
+# custom imports
+from bot.loop_monitor import LoopLagMonitor, quantile
+
+
+def test_quantile_uses_the_nearest_rank() -> None:
+    values = [float(value) for value in range(1, 101)]
+    assert quantile(values, 0.5) == 50.0
+    assert quantile(values, 0.99) == 99.0
+    assert quantile([], 0.5) == 0.0
+
+
+def test_blocking_callback_is_measured_and_reported(caplog) -> None:
+    monitor = LoopLagMonitor(logging.getLogger("loop_monitor_test"), interval=0.02, threshold=0.05)
+
+    async def run() -> None:
+        monitor.start()
+        await asyncio.sleep(0.05)
+        # blocks the loop
+        time.sleep(0.2)
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(run())
+
+    assert monitor.max_lag() >= 0.1
+    assert monitor.stalls == 1
+    assert "time.sleep(0.2)" in caplog.text
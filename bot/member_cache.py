@@ -0,0 +1,141 @@
+'''
+The cache policy of members and users.
+
+interactions.py keeps every member and user it has ever seen in plain dicts.
+On large guilds this is most of the memory of the process, but the bot only
+needs the members that are in a voice channel and the members that recently
+interacted with it. The policy caches are TTL/LRU caches of interactions.py
+that never evict a member with an active voice state, and never evict the
+user of a cached member. A user is removed with its last member.
+Everything else expires after the ttl, or earlier when the cache is over
+its size.
+
+The voice state cache stays a plain dict. It only holds the members that
+are connected and is the source of the pins.
+'''
+
+import time
+from collections import Counter
+from typing import Callable, Hashable, Optional
+
+from interactions.client.utils.cache import TTLCache
+
+# entries checked per insert, the rest is checked by the next inserts
+EXPIRE_SCAN_LIMIT = 64
+
+
+class PolicyCache(TTLCache):
+    '''
+    A TTLCache that keeps the entries the policy pins.
+    Pinned entries are moved to the end and checked again after one ttl.
+    '''
+
+    def __init__(
+        self,
+        ttl: int,
+        hard_limit: int,
+        keep: Callable[[Hashable], bool],
+        on_add: Optional[Callable[[Hashable], None]] = None,
+        on_remove: Optional[Callable[[Hashable], None]] = None
+    ):
+        super().__init__(ttl=ttl, soft_limit=hard_limit // 4, hard_limit=hard_limit)
+        self.keep = keep
+        self.on_add = on_add
+        self.on_remove = on_remove
+        self.evicted = 0
+
+    def __setitem__(self, key, value) -> None:
+        if self.on_add and key not in self:
+            self.on_add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        if self.on_remove:
+            self.on_remove(key)
+
+    def clear(self) -> None:
+        if self.on_remove:
+            for key in list(self.keys()):
+                self.on_remove(key)
+        super().clear()
+
+    def expire(self) -> None:
+        '''Remove the expired entries and the oldest entries over the size.'''
+        if self.soft_limit and len(self) <= self.soft_limit:
+            return
+
+        timestamp = time.monotonic()
+        for _ in range(min(len(self), EXPIRE_SCAN_LIMIT)):
+            key, item = self._first_item()
+            if len(self) <= self.hard_limit and not item.is_expired(timestamp):
+                break
+            if self.keep(key):
+                self._reset_expiration(key, item)
+            else:
+                del self[key]
+                self.evicted += 1
+
+
+class MemberCachePolicy:
+    '''
+    This class creates the member, user and voice state caches of the client.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(self, ttl: int = 600, max_members: int = 10_000):
+        self.ttl = ttl
+        self.max_members = max_members
+        # key: user_id, filled by interactions.py
+        self.voice_states: dict = {}
+        # users with at least one cached member
+        self.member_users: Counter[int] = Counter()
+
+        self.members = PolicyCache(
+            ttl,
+            max_members,
+            keep=self.keep_member,
+            on_add=self._member_added,
+            on_remove=self._member_removed
+        )
+        # the users leave with their members, the room is for users without members
+        self.users = PolicyCache(ttl, max_members * 2, keep=self.keep_user)
+        self.user_guilds = PolicyCache(ttl, max_members * 2, keep=self.keep_user)
+
+    def cache_kwargs(self) -> dict:
+        '''Get the cache arguments of the Client.'''
+        return {
+            "member_cache": self.members,
+            "user_cache": self.users,
+            "user_guilds": self.user_guilds,
+            "voice_state_cache": self.voice_states
+        }
+
+    def keep_member(self, key: tuple[int, int]) -> bool:
+        _, user_id = key
+        return user_id in self.voice_states
+
+    def keep_user(self, user_id: int) -> bool:
+        # a member without its user can not be used
+        return user_id in self.voice_states or user_id in self.member_users
+
+    def _member_added(self, key: tuple[int, int]) -> None:
+        self.member_users[key[1]] += 1
+
+    def _member_removed(self, key: tuple[int, int]) -> None:
+        user_id = key[1]
+        self.member_users[user_id] -= 1
+        if self.member_users[user_id] <= 0:
+            del self.member_users[user_id]
+            if user_id not in self.voice_states:
+                self.users.pop(user_id, None)
+                self.user_guilds.pop(user_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "members": len(self.members),
+            "users": len(self.users),
+            "voice_states": len(self.voice_states),
+            "evicted_members": self.members.evicted,
+            "evicted_users": self.users.evicted
+        }
@@ -0,0 +1,96 @@
+'''
+RSS benchmark of the member cache policy.
+
+Every configuration runs in a new process. The process creates a client,
+places the member data of a large guild like the gateway does and reports
+its RSS. One percent of the members is connected to a voice channel.
+
+usage: python -m bot.member_cache_bench [members]
+'''
+
+import multiprocessing
+import resource
+import sys
+import time
+
+GUILD_ID = 1296495299870720033
+VOICE_SHARE = 100
+
+
+def member_data(user_id: int) -> dict:
+    return {
+        "user": {
+            "id": str(user_id),
+            "username": f"user{user_id}",
+            "global_name": f"User {user_id}",
+            "discriminator": "0",
+            "avatar": "0" * 32
+        },
+        "nick": None,
+        "roles": [str(GUILD_ID + 1), str(GUILD_ID + 2)],
+        "joined_at": "2024-01-01T00:00:00.000000+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0
+    }
+
+
+def worker(members: int, cache_size: int, results: multiprocessing.Queue) -> None:
+    from interactions import VoiceState
+
+    # custom imports
+    from bot.client import make_client, make_logger
+
+    client = make_client(
+        version="bench",
+        bot_token="bench",
+        logger=make_logger("bench"),
+        audit_path=":memory:",
+        member_cache_size=cache_size
+    )
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started_at = time.perf_counter()
+    for user_id in range(1, members + 1):
+        client.cache.place_member_data(GUILD_ID, member_data(user_id))
+        if user_id % VOICE_SHARE == 0:
+            client.cache.voice_state_cache[user_id] = VoiceState.from_dict(
+                {
+                    "guild_id": str(GUILD_ID),
+                    "channel_id": str(GUILD_ID + 3),
+                    "user_id": str(user_id),
+                    "session_id": "0" * 32,
+                    "deaf": False,
+                    "mute": False,
+                    "self_deaf": False,
+                    "self_mute": False,
+                    "self_video": False,
+                    "suppress": False,
+                    "request_to_speak_timestamp": None
+                },
+                client
+            )
+    duration = time.perf_counter() - started_at
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((len(client.cache.member_cache), rss - baseline, rss, duration))
+    client.audit.close()
+
+
+def main(members: int = 200_000) -> None:
+    context = multiprocessing.get_context("spawn")
+    print(f"{members} members, {members // VOICE_SHARE} in voice")
+    for label, cache_size in (("all members", 0), ("policy 10000", 10_000)):
+        results = context.Queue()
+        process = context.Process(target=worker, args=(members, cache_size, results))
+        process.start()
+        cached, growth, rss, duration = results.get()
+        process.join()
+        print(
+            f"{label:<13} cached={cached:>8} rss={rss / 1024:7.1f} MiB "
+            f"(+{growth / 1024:6.1f} MiB) {members / duration:10,.0f} members/s"
+        )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
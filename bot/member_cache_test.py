@@ -0,0 +1,40 @@
+import time
+
+# custom imports
+from bot.member_cache import MemberCachePolicy
+
+
+def test_members_in_voice_are_not_evicted() -> None:
+    policy = MemberCachePolicy(ttl=600, max_members=8)
+    policy.voice_states[1] = object()
+    for user_id in range(1, 21):
+        policy.members[(100, user_id)] = user_id
+        policy.users[user_id] = user_id
+
+    assert (100, 1) in policy.members
+    assert len(policy.members) <= 8
+    assert policy.members.evicted > 0
+
+
+def test_users_of_cached_members_are_kept() -> None:
+    policy = MemberCachePolicy(ttl=600, max_members=8)
+    policy.members[(100, 1)] = 1
+    for user_id in range(1, 41):
+        policy.users[user_id] = user_id
+
+    assert 1 in policy.users
+    policy.members.pop((100, 1))
+    assert 1 not in policy.member_users
+
+
+def test_expired_members_are_evicted() -> None:
+    policy = MemberCachePolicy(ttl=0, max_members=8)
+    policy.voice_states[1] = object()
+    for user_id in range(1, 4):
+        policy.members[(100, user_id)] = user_id
+    time.sleep(0.01)
+    # the soft limit of 2 is exceeded
+    policy.members[(100, 4)] = 4
+
+    assert (100, 1) in policy.members
+    assert (100, 2) not in policy.members
@@ -0,0 +1,126 @@
+'''
+Memory snapshots of the bot with tracemalloc.
+
+The first snapshot starts tracing and is the baseline, every later snapshot
+is compared to the previous one. A report lists the allocation sites that
+grew the most and the sizes of the structures of the bot, so a slow growth
+can be matched to the registry, the rate limiters, pending waiters, the
+queues or the caches of interactions.py.
+
+Tracing costs memory and CPU while it runs, stop ends it.
+'''
+
+import os
+import time
+import tracemalloc
+from typing import Optional
+
+DEFAULT_REPORT_DIR = "profiles"
+
+# the allocations of tracemalloc itself are not part of the bot
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def structure_sizes(client) -> dict[str, int]:
+    '''Get the number of entries of the structures bound to the client.'''
+    cache = client.cache
+    tcm = client.tcm
+    return {
+        "registry.channels": len(tcm.channels),
+        # channels the registry holds that the cache does not know anymore
+        "registry.stale_channels": sum(
+            1 for channel_id in tcm.channels if channel_id not in cache.channel_cache
+        ),
+        "registry.occupants": sum(len(members) for members in tcm.occupants.values()),
+        "registry.owners": len(tcm.owners),
+        "rate_limiter.entries": client.state.rate_limit_entries(),
+        "permission_engine.locks": len(client.pe.locks),
+        "inflight.actions": len(client.ifd.inflight),
+        "waiters": sum(len(waits) for waits in client.waits.values()),
+        "queue.audit_log": client.audit.queue.qsize(),
+        "queue.channel_edits": client.cec.pending_count(),
+        "queue.interaction_work": client.irp.pending_count(),
+        "log_channel_cache": len(client.lcc.channels),
+        "cache.members": len(cache.member_cache),
+        "cache.users": len(cache.user_cache),
+        "cache.voice_states": len(cache.voice_state_cache),
+        "cache.channels": len(cache.channel_cache),
+        "cache.guilds": len(cache.guild_cache),
+        "cache.messages": len(cache.message_cache),
+    }
+
+
+class MemoryProfiler:
+    '''
+    This class takes and compares the tracemalloc snapshots.
+    The snapshots block, the event loop calls them in a thread.
+    '''
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.previous: Optional[tracemalloc.Snapshot] = None
+        self.previous_at = 0.0
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.previous = self.take_snapshot()
+        self.previous_at = time.time()
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.previous = None
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def compare(self, limit: int = 25) -> tuple[list[tracemalloc.StatisticDiff], float]:
+        '''
+        Compare a new snapshot to the previous one, the new one becomes the previous.
+        Returns the top allocation sites and the seconds between the snapshots.
+        '''
+        snapshot = self.take_snapshot()
+        now = time.time()
+        stats = snapshot.compare_to(self.previous, "lineno")
+        elapsed = now - self.previous_at
+        self.previous, self.previous_at = snapshot, now
+        return stats[:limit], elapsed
+
+    def report(
+        self,
+        stats: list[tracemalloc.StatisticDiff],
+        elapsed: float,
+        sizes: dict[str, int]
+    ) -> str:
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"traced: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)",
+            f"compared to the snapshot {elapsed:.0f}s ago",
+            "",
+            "top allocation sites (size diff, size, count diff):"
+        ]
+        for stat in stats:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:+10.1f} KiB {stat.size / 1024:10.1f} KiB "
+                f"{stat.count_diff:+8d}  {frame.filename}:{frame.lineno}"
+            )
+        lines += ["", "structures of the bot (entries):"]
+        lines += [f"{name:<28} {size}" for name, size in sizes.items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, report: str, directory: str = DEFAULT_REPORT_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"memory-{int(time.time())}.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(report)
+        return path
@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+# custom imports
+from bot.memory_profiler import MemoryProfiler
+
+
+def test_report_shows_the_growth_since_the_last_snapshot() -> None:
+    profiler = MemoryProfiler()
+    profiler.start()
+    try:
+        retained = [bytearray(1024) for _ in range(1000)]
+        stats, _ = profiler.compare()
+        report = profiler.report(stats, 0.0, {"registry.channels": 3})
+    finally:
+        profiler.stop()
+
+    assert "memory_profiler_test.py" in stats[0].traceback[0].filename
+    assert stats[0].size_diff >= 1000 * 1024
+    assert "registry.channels            3" in report
+    assert len(retained) == 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = profiler.write(report, directory)
+        assert os.path.dirname(path) == directory
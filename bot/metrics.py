@@ -0,0 +1,413 @@
+'''
+Metrics of the bot in the Prometheus text format.
+
+Counters and histograms are updated on the event loop with plain dict
+operations, there are no locks on the hot path. Gauges are collected from
+the components of the bot when the endpoint is scraped.
+
+The endpoint is a minimal HTTP server on the event loop of the client,
+it only answers GET /metrics.
+'''
+
+import asyncio
+import bisect
+import contextvars
+import functools
+import logging
+import time
+from typing import Callable, Mapping, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds, the REST latency includes the waits for the rate limit buckets
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+
+def format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # per label set: the count of every bucket (not cumulative) and the sum
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * len(self.buckets)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[labels] = self.sums.get(labels, 0.0) + value
+
+    def render(self) -> list[str]:
+        lines = []
+        names = self.labels + ("le",)
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                lines.append(
+                    f"{self.name}_bucket{format_labels(names, labels + (format_value(bound),))} {total}"
+                )
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {format_value(self.sums[labels])}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {total}")
+        return lines
+
+
+class Collected:
+    '''A gauge or counter whose values are read from the bot when scraped.'''
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labels: Labels,
+        collect: Callable[[], Mapping[Labels, float]]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labels = labels
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}"
+            for labels, value in self.collect().items()
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = "tempvoice"):
+        self.namespace = namespace
+        self.metrics: list = []
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}"
+
+    def counter(self, name: str, documentation: str, labels: Labels = ()) -> Counter:
+        counter = Counter(self._name(name), documentation, labels)
+        self.metrics.append(("counter", counter))
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        histogram = Histogram(self._name(name), documentation, labels, buckets)
+        self.metrics.append(("histogram", histogram))
+        return histogram
+
+    def collect(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Mapping[Labels, float]],
+        labels: Labels = (),
+        kind: str = "gauge"
+    ) -> None:
+        self.metrics.append((kind, Collected(self._name(name), documentation, kind, labels, collect)))
+
+    def render(self) -> str:
+        lines = []
+        for kind, metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class BotMetrics:
+    '''
+    This class holds the metrics the bot updates while it runs.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        self.voice_events = self.registry.counter(
+            "voice_events_total",
+            "Voice events by event and result (handled or filtered).",
+            ("event", "result")
+        )
+        self.channels_created = self.registry.counter(
+            "channels_created_total",
+            "Temp channels created.",
+            ("guild",)
+        )
+        self.channels_deleted = self.registry.counter(
+            "channels_deleted_total",
+            "Temp channels deleted after the last member left.",
+            ("guild",)
+        )
+        self.rate_limited = self.registry.counter(
+            "rate_limited_total",
+            "Actions rejected by the rate limiters of the bot.",
+            ("limiter", "action")
+        )
+        self.rest_latency = self.registry.histogram(
+            "rest_request_seconds",
+            "Latency of REST requests by route, including rate limit waits.",
+            ("route",)
+        )
+        self.rest_errors = self.registry.counter(
+            "rest_errors_total",
+            "Failed REST requests by route and status.",
+            ("route", "status")
+        )
+        self.rest_429 = self.registry.counter(
+            "rest_ratelimited_total",
+            "429 responses by route, the requests are retried by interactions.py.",
+            ("route",)
+        )
+
+
+# the route of the running request, read by the 429 hook
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="unknown")
+
+
+def instrument_http(http, metrics: BotMetrics) -> None:
+    '''
+    Measure the requests of the HTTP client of interactions.py.
+    The 429s are handled inside of the request, they are counted by the
+    rate limit log hook of the client.
+    '''
+    request = http.request
+    log_ratelimit = http.log_ratelimit
+
+    @functools.wraps(request)
+    async def instrumented_request(route, *args, **kwargs):
+        token = current_route.set(route.endpoint)
+        started_at = time.perf_counter()
+        try:
+            return await request(route, *args, **kwargs)
+        except Exception as e:
+            metrics.rest_errors.inc(route.endpoint, str(getattr(e, "status", type(e).__name__)))
+            raise
+        finally:
+            metrics.rest_latency.observe(time.perf_counter() - started_at, route.endpoint)
+            current_route.reset(token)
+
+    @functools.wraps(log_ratelimit)
+    def instrumented_log_ratelimit(log_func, message):
+        # the exhausted buckets are logged with debug, every 429 with warning
+        if log_func == http.logger.warning:
+            metrics.rest_429.inc(current_route.get())
+        return log_ratelimit(log_func, message)
+
+    http.request = instrumented_request
+    http.log_ratelimit = instrumented_log_ratelimit
+
+
+def register_client_metrics(registry: MetricsRegistry, client) -> None:
+    '''Collect the state of the components bound to the client.'''
+
+    def channels_per_guild() -> dict[Labels, float]:
+        counts: dict[Labels, float] = {}
+        for tempchannel in client.tcm.channels.values():
+            key = (str(tempchannel.channel.guild.id),)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    registry.collect(
+        "temp_channels",
+        "Temp channels in the registry by guild.",
+        channels_per_guild,
+        ("guild",)
+    )
+    registry.collect(
+        "temp_channel_members",
+        "Members connected to temp channels.",
+        lambda: {(): sum(client.tcm.occupancy(channel_id) for channel_id in client.tcm.channels)}
+    )
+    registry.collect(
+        "external_channel_changes_total",
+        "Temp channels removed from the registry by channel events.",
+        lambda: {(reason,): count for reason, count in client.tcm.external_changes.items()},
+        ("reason",),
+        kind="counter"
+    )
+    registry.collect(
+        "rate_limit_entries",
+        "Entries of the rate limiters in the state backend.",
+        lambda: {(): client.state.rate_limit_entries()}
+    )
+    registry.collect(
+        "permission_edits_total",
+        "Permission changes by result (applied or skipped).",
+        lambda: {("applied",): client.pe.applied, ("skipped",): client.pe.skipped},
+        ("result",),
+        kind="counter"
+    )
+    registry.collect(
+        "inflight_actions_total",
+        "Button actions by result (executed or joined a running action).",
+        lambda: {("executed",): client.ifd.executed, ("deduplicated",): client.ifd.deduplicated},
+        ("result",),
+        kind="counter"
+    )
+    registry.collect(
+        "interaction_ack_deadline_misses_total",
+        "Interactions acknowledged after the deadline of discord by action.",
+        lambda: {(action,): stats.deadline_misses for action, stats in client.irp.stats.items()},
+        ("action",),
+        kind="counter"
+    )
+    registry.collect(
+        "interaction_ack_seconds_max",
+        "Highest acknowledgement latency by action.",
+        lambda: {(action,): stats.max_latency for action, stats in client.irp.stats.items()},
+        ("action",)
+    )
+    registry.collect(
+        "queue_depth",
+        "Work waiting in the queues of the bot.",
+        lambda: {
+            ("audit_log",): client.audit.queue.qsize(),
+            ("channel_edits",): client.cec.pending_count(),
+            ("interaction_work",): client.irp.pending_count()
+        },
+        ("queue",)
+    )
+    registry.collect(
+        "audit_records_written_total",
+        "Audit records written to the database.",
+        lambda: {(): client.audit.written},
+        kind="counter"
+    )
+    registry.collect(
+        "audit_records_failed_total",
+        "Audit records dropped because their batch could not be written.",
+        lambda: {(): client.audit.failed},
+        kind="counter"
+    )
+    registry.collect(
+        "event_loop_lag_seconds",
+        "Scheduling delay of the event loop over the last samples.",
+        lambda: {
+            **{(str(q),): lag for q, lag in client.llm.percentiles().items()},
+            ("1.0",): client.llm.max_lag()
+        },
+        ("quantile",)
+    )
+    registry.collect(
+        "event_loop_stalls_total",
+        "Times the event loop was blocked longer than the threshold.",
+        lambda: {(): client.llm.stalls},
+        kind="counter"
+    )
+    if client.mcp:
+        registry.collect(
+            "cache_entries",
+            "Entries of the member cache policy.",
+            lambda: {(name,): value for name, value in client.mcp.stats().items()},
+            ("cache",)
+        )
+
+
+class MetricsServer:
+    '''
+    This class serves the registry over HTTP on the event loop of the client.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = "127.0.0.1",
+        port: int = 9100,
+        logger: logging.Logger = None
+    ):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.logger = logger or logging.getLogger(__name__)
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if self.server is None:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # the headers are not needed
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                try:
+                    status, content_type, body = "200 OK", CONTENT_TYPE, self.registry.render().encode()
+                except Exception as e:
+                    # a collector failed, the scrape gets an answer instead of a dropped connection
+                    self.logger.error(f"Failed to render the metrics: {e}")
+                    status, content_type, body = "500 Internal Server Error", "text/plain", b"error\n"
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
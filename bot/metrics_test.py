@@ -0,0 +1,76 @@
+import asyncio
+
+# custom imports
+from bot.metrics import MetricsRegistry, MetricsServer
+
+
+def test_registry_renders_the_text_format() -> None:
+    registry = MetricsRegistry()
+    events = registry.counter("voice_events_total", "Voice events.", ("event", "result"))
+    latency = registry.histogram("rest_request_seconds", "REST latency.", ("route",), buckets=(0.1, 1.0))
+    registry.collect("temp_channels", "Temp channels.", lambda: {("1",): 3}, ("guild",))
+
+    events.inc("join", "handled")
+    events.inc("join", "handled")
+    latency.observe(0.1, "GET /users/@me")
+    latency.observe(0.5, "GET /users/@me")
+
+    text = registry.render()
+    assert "# TYPE tempvoice_voice_events_total counter" in text
+    assert 'tempvoice_voice_events_total{event="join",result="handled"} 2' in text
+    assert 'tempvoice_rest_request_seconds_bucket{route="GET /users/@me",le="0.1"} 1' in text
+    assert 'tempvoice_rest_request_seconds_bucket{route="GET /users/@me",le="+Inf"} 2' in text
+    assert 'tempvoice_rest_request_seconds_count{route="GET /users/@me"} 2' in text
+    assert 'tempvoice_temp_channels{guild="1"} 3' in text
+
+
+def test_server_answers_metrics_requests() -> None:
+    registry = MetricsRegistry()
+    registry.counter("up_total", "Up.").inc()
+
+    async def get(server: MetricsServer, path: str) -> bytes:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def run() -> tuple[bytes, bytes]:
+        server = MetricsServer(registry, port=0)
+        await server.start()
+        server.port = server.server.sockets[0].getsockname()[1]
+        try:
+            return await get(server, "/metrics"), await get(server, "/")
+        finally:
+            await server.close()
+
+    metrics, other = asyncio.run(run())
+    assert metrics.startswith(b"HTTP/1.1 200 OK")
+    assert metrics.endswith(b"tempvoice_up_total 1\n")
+    assert other.startswith(b"HTTP/1.1 404")
+
+
+def test_server_answers_failed_scrapes() -> None:
+    registry = MetricsRegistry()
+
+    def broken() -> dict:
+        raise RuntimeError("collector failed")
+
+    registry.collect("broken", "Fails on every scrape.", broken)
+
+    async def run() -> bytes:
+        server = MetricsServer(registry, port=0)
+        await server.start()
+        port = server.server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection(server.host, port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            return response
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 500")
@@ -0,0 +1,74 @@
+'''
+The opt-in performance profile of the bot.
+
+- uvloop runs the event loop of the client, if it is installed.
+  Client.start would pick uvloop on its own, so the bot starts the
+  client with run_client to keep the default loop without the profile.
+- orjson is used by interactions.py for all JSON, if it is installed.
+  The library picks it when it is imported, so it can only be reported here.
+- The gateway always uses zlib-stream compression in interactions.py 5.x.
+
+Missing packages are skipped, the bot then runs on the defaults.
+The optional packages are listed in requirements-performance.txt.
+'''
+
+import asyncio
+import contextlib
+import importlib.util
+import logging
+from dataclasses import dataclass
+
+from interactions import Client
+
+
+@dataclass
+class PerformanceProfile:
+    uvloop: bool = False
+    json_mode: str = "builtin"
+    gateway_compression: str = "zlib-stream"
+
+    def __str__(self) -> str:
+        loop = "uvloop" if self.uvloop else "asyncio"
+        return f"loop={loop}, json={self.json_mode}, gateway={self.gateway_compression}"
+
+
+def has_uvloop() -> bool:
+    return importlib.util.find_spec("uvloop") is not None
+
+
+def json_mode() -> str:
+    '''Get the JSON library interactions.py decided to use.'''
+    from interactions.client.utils import input_utils
+    return input_utils.json_mode
+
+
+def make_performance_profile(
+    enabled: bool,
+    logger: logging.Logger
+) -> PerformanceProfile:
+    '''
+    Get the profile to run with, missing packages are logged and skipped.
+    '''
+    profile = PerformanceProfile(json_mode=json_mode())
+    if not enabled:
+        return profile
+
+    profile.uvloop = has_uvloop()
+    if not profile.uvloop:
+        logger.warning("Performance profile: uvloop is not installed, using the asyncio loop")
+    if profile.json_mode == "builtin":
+        logger.warning("Performance profile: orjson is not installed, using the builtin json")
+    return profile
+
+
+def run_client(client: Client, profile: PerformanceProfile) -> None:
+    '''Start the client on the event loop of the profile.'''
+    client.logger.info(f"Performance profile: {profile}")
+    # like Client.start, a ctrl+c ends the bot without a traceback
+    with contextlib.suppress(KeyboardInterrupt):
+        if profile.uvloop:
+            import uvloop
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                runner.run(client.astart())
+        else:
+            asyncio.run(client.astart())
@@ -0,0 +1,110 @@
+'''
+Benchmark of the synthetic voice workload with and without the performance profile.
+
+Every event goes the way of a gateway event: a zlib-stream chunk is
+decompressed, the JSON is decoded, the event is dispatched as a task and
+the handler updates the occupancy index of the TempChannelManager.
+Combinations whose packages are not installed are skipped.
+
+usage: python -m bot.performance_bench [events]
+'''
+
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+import zlib
+from typing import Callable
+
+# custom imports
+from bot.channel_manager import TempChannelManager
+from bot.rate_limiter import RateLimitManager
+
+CHANNELS = 50
+MEMBERS = 500
+
+
+def make_stream(events: int) -> list[bytes]:
+    '''Create the zlib-stream chunks of alternating voice joins and leaves.'''
+    compressor = zlib.compressobj()
+    chunks = []
+    for index in range(events):
+        member_id = index % MEMBERS
+        # a member joins on even rounds and leaves on odd rounds
+        joined = (index // MEMBERS) % 2 == 0
+        payload = {
+            "op": 0,
+            "s": index,
+            "t": "VOICE_STATE_UPDATE",
+            "d": {
+                "guild_id": "1296495299870720033",
+                "channel_id": str(1000 + member_id % CHANNELS) if joined else None,
+                "user_id": str(member_id),
+                "session_id": "0" * 32,
+                "deaf": False,
+                "mute": False,
+                "self_deaf": False,
+                "self_mute": False,
+                "self_video": False,
+                "suppress": False,
+                "request_to_speak_timestamp": None
+            }
+        }
+        data = compressor.compress(json.dumps(payload).encode())
+        chunks.append(data + compressor.flush(zlib.Z_SYNC_FLUSH))
+    return chunks
+
+
+async def run_workload(chunks: list[bytes], loads: Callable) -> float:
+    manager = TempChannelManager(rate_limiter=RateLimitManager())
+    decompressor = zlib.decompressobj()
+    channels: dict[int, int] = {}
+    tasks = set()
+
+    async def handle(event: dict) -> None:
+        data = event["d"]
+        member_id = int(data["user_id"])
+        previous = channels.pop(member_id, None)
+        if previous is not None:
+            manager.member_left(previous, member_id)
+        if data["channel_id"] is not None:
+            channels[member_id] = int(data["channel_id"])
+            manager.member_joined(channels[member_id], member_id)
+
+    started_at = time.perf_counter()
+    for chunk in chunks:
+        event = loads(decompressor.decompress(chunk))
+        task = asyncio.create_task(handle(event))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        # let the handlers run like the gateway reader does between messages
+        await asyncio.sleep(0)
+    while tasks:
+        await asyncio.sleep(0)
+    return time.perf_counter() - started_at
+
+
+def main(events: int = 200_000) -> None:
+    chunks = make_stream(events)
+
+    loops = [("asyncio", asyncio.new_event_loop)]
+    if importlib.util.find_spec("uvloop"):
+        import uvloop
+        loops.append(("uvloop", uvloop.new_event_loop))
+
+    decoders = [("json", json.loads)]
+    if importlib.util.find_spec("orjson"):
+        import orjson
+        decoders.append(("orjson", orjson.loads))
+
+    print(f"{events} voice events, zlib-stream")
+    for loop_name, loop_factory in loops:
+        for decoder_name, loads in decoders:
+            with asyncio.Runner(loop_factory=loop_factory) as runner:
+                duration = runner.run(run_workload(chunks, loads))
+            print(f"{loop_name:<8} {decoder_name:<7} {events / duration:12,.0f} events/s")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
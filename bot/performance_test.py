@@ -0,0 +1,11 @@
+import logging
+
+# custom imports
+from bot.performance import make_performance_profile
+
+
+def test_disabled_profile_keeps_the_asyncio_loop() -> None:
+    profile = make_performance_profile(False, logging.getLogger(__name__))
+    assert not profile.uvloop
+    assert profile.gateway_compression == "zlib-stream"
+    assert str(profile).startswith("loop=asyncio")
@@ -0,0 +1,178 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+from interactions import (
+    GuildVoice,
+    Member,
+    OverwriteType,
+    PermissionOverwrite,
+    Permissions,
+    Role,
+    User
+)
+from interactions.api.http.route import Route
+
+# diffs up to this many targets use the overwrite route of each target
+MAX_OVERWRITE_REQUESTS = 2
+
+
+@dataclass(frozen=True)
+class PermissionChange:
+    '''
+    One permission of one target.
+    value: True allows, False denies and None resets the permission.
+    '''
+    target: Union[Role, Member, User]
+    permission: Permissions
+    value: Optional[bool]
+
+
+class PermissionPlan:
+    '''
+    The desired overwrite state of a channel.
+    It starts as a copy of the cached overwrites and is compared with them,
+    so only a real difference results in a request.
+    '''
+
+    def __init__(self, overwrites: Iterable[PermissionOverwrite] = ()):
+        # target id -> (type, allow, deny)
+        self.current: dict[int, tuple[int, int, int]] = {
+            int(overwrite.id): (
+                int(overwrite.type),
+                int(overwrite.allow or 0),
+                int(overwrite.deny or 0)
+            )
+            for overwrite in overwrites
+        }
+        self.desired = dict(self.current)
+
+    @classmethod
+    def from_channel(cls, channel: GuildVoice) -> 'PermissionPlan':
+        return cls(channel.permission_overwrites or ())
+
+    def set(
+        self,
+        target_id: int,
+        target_type: OverwriteType,
+        permission: Permissions,
+        value: Optional[bool]
+    ) -> None:
+        overwrite_type, allow, deny = self.desired.get(
+            int(target_id),
+            (int(target_type), 0, 0)
+        )
+        bits = int(permission)
+        allow &= ~bits
+        deny &= ~bits
+        if value is True:
+            allow |= bits
+        elif value is False:
+            deny |= bits
+        self.desired[int(target_id)] = (overwrite_type, allow, deny)
+
+    def add(self, change: PermissionChange) -> None:
+        target_type = OverwriteType.ROLE if isinstance(change.target, Role) else OverwriteType.MEMBER
+        self.set(change.target.id, target_type, change.permission, change.value)
+
+    def changed_targets(self) -> list[int]:
+        '''
+        Get the targets whose overwrite differs from the cached one.
+        An empty overwrite of a new target is no change.
+        '''
+        changed = []
+        for target_id, (_, allow, deny) in self.desired.items():
+            current = self.current.get(target_id)
+            if current is None:
+                if allow or deny:
+                    changed.append(target_id)
+            elif current[1:] != (allow, deny):
+                changed.append(target_id)
+        return changed
+
+    def has_changes(self) -> bool:
+        return bool(self.changed_targets())
+
+    def overwrite(self, target_id: int) -> PermissionOverwrite:
+        overwrite_type, allow, deny = self.desired[target_id]
+        return PermissionOverwrite(
+            id=target_id,
+            type=overwrite_type,
+            allow=Permissions(allow),
+            deny=Permissions(deny)
+        )
+
+    def to_overwrites(self) -> list[PermissionOverwrite]:
+        '''
+        Get the complete overwrite list of the channel.
+        The edit replaces all overwrites, so unchanged targets are included.
+        '''
+        return [
+            self.overwrite(target_id)
+            for target_id, (_, allow, deny) in self.desired.items()
+            if target_id in self.current or allow or deny
+        ]
+
+
+class PermissionEngine:
+    '''
+    This class applies permission changes to a channel with a single edit.
+    The changes of one channel are serialized, so two plans can not
+    overwrite each other with an outdated overwrite list.
+
+    The channel edit shares its route with the renames, which Discord allows
+    only twice per 10 minutes. Small diffs and diffs that would wait for a
+    locked edit bucket use the overwrite route of each target instead.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(self):
+        self.locks: dict[int, asyncio.Lock] = {}
+        self.applied = 0
+        self.skipped = 0
+
+    def _get_lock(self, channel_id: int) -> asyncio.Lock:
+        if channel_id not in self.locks:
+            self.locks[channel_id] = asyncio.Lock()
+        return self.locks[channel_id]
+
+    async def apply(
+        self,
+        channel: GuildVoice,
+        changes: Iterable[PermissionChange],
+        reason: str = None
+    ) -> bool:
+        '''
+        Apply the changes to the channel.
+        Returns False if the channel already had the desired overwrites.
+        '''
+        async with self._get_lock(channel.id):
+            # the plan is built inside the lock to see the result of the previous edit
+            plan = PermissionPlan.from_channel(channel)
+            for change in changes:
+                plan.add(change)
+
+            changed = plan.changed_targets()
+            if not changed:
+                self.skipped += 1
+                return False
+
+            if len(changed) > MAX_OVERWRITE_REQUESTS and not self._edit_locked(channel):
+                await channel.edit(
+                    permission_overwrites=plan.to_overwrites(),
+                    reason=reason
+                )
+            else:
+                for target_id in changed:
+                    await channel.edit_permission(plan.overwrite(target_id), reason=reason)
+                # the next plan must not wait for the channel update of the gateway
+                channel.permission_overwrites = plan.to_overwrites()
+            self.applied += 1
+            return True
+
+    def _edit_locked(self, channel: GuildVoice) -> bool:
+        '''Check if the edit route of the channel is locked, e.g. by a rename 429.'''
+        route = Route("PATCH", "/channels/{channel_id}", channel_id=channel.id)
+        return channel.bot.http.get_ratelimit(route).locked
+
+    def forget_channel(self, channel_id: int) -> None:
+        self.locks.pop(channel_id, None)
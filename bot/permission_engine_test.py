@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+from interactions import OverwriteType, PermissionOverwrite, Permissions
+
+# custom imports
+from bot.permission_engine import PermissionChange, PermissionEngine, PermissionPlan
+
+
+class FakeChannel:
+    """
+    A voice channel that records its edits and keeps the new overwrites.
+    """
+
+    def __init__(self, channel_id: int, overwrites: list[PermissionOverwrite], edit_locked: bool = False):
+        self.id = channel_id
+        self.permission_overwrites = overwrites
+        self.edits = []
+        self.overwrite_edits = []
+        # the bucket of the channel edit route, locked by a rename 429
+        bucket = SimpleNamespace(locked=edit_locked)
+        self.bot = SimpleNamespace(http=SimpleNamespace(get_ratelimit=lambda route: bucket))
+
+    async def edit(self, permission_overwrites=None, reason: str = None) -> None:
+        self.edits.append(permission_overwrites)
+        self.permission_overwrites = permission_overwrites
+
+    async def edit_permission(self, overwrite: PermissionOverwrite, reason: str = None) -> None:
+        # the cached overwrites are only updated by the gateway
+        self.overwrite_edits.append(overwrite)
+
+
+def everyone_overwrite(deny: Permissions = None) -> PermissionOverwrite:
+    return PermissionOverwrite(id=1, type=OverwriteType.ROLE, allow=None, deny=deny)
+
+
+def test_plan_diff() -> None:
+    plan = PermissionPlan([everyone_overwrite(deny=Permissions.CONNECT)])
+
+    plan.set(1, OverwriteType.ROLE, Permissions.CONNECT, False)
+    assert not plan.has_changes(), "Denying a denied permission should be no change"
+
+    plan.set(2, OverwriteType.MEMBER, Permissions.CONNECT, None)
+    assert not plan.has_changes(), "An empty overwrite of a new target should be no change"
+
+    plan.set(1, OverwriteType.ROLE, Permissions.CONNECT, True)
+    plan.set(3, OverwriteType.MEMBER, Permissions.CONNECT, True)
+    assert plan.changed_targets() == [1, 3]
+
+    overwrites = {int(overwrite.id): overwrite for overwrite in plan.to_overwrites()}
+    assert set(overwrites) == {1, 3}
+    assert overwrites[1].allow == Permissions.CONNECT
+    assert overwrites[1].deny == Permissions.NONE
+
+
+def test_engine_applies_one_edit() -> None:
+    """
+    Test that several changes result in a single edit and that no-ops are skipped.
+    """
+    channel = FakeChannel(10, [everyone_overwrite()])
+    everyone = SimpleNamespace(id=1)
+    members = [SimpleNamespace(id=member_id) for member_id in (2, 3)]
+    engine = PermissionEngine()
+
+    async def run() -> None:
+        changes = [PermissionChange(everyone, Permissions.CONNECT, False)] + [
+            PermissionChange(member, Permissions.CONNECT, True) for member in members
+        ]
+        assert await engine.apply(channel, changes)
+        assert not await engine.apply(channel, changes), "The second apply should be a no-op"
+
+    asyncio.run(run())
+    assert len(channel.edits) == 1
+    assert not channel.overwrite_edits
+    assert engine.applied == 1 and engine.skipped == 1
+
+
+def test_small_diffs_use_the_overwrite_route() -> None:
+    """
+    Test that a lock does not share the bucket of the renames.
+    """
+    channel = FakeChannel(10, [everyone_overwrite()])
+    everyone = SimpleNamespace(id=1)
+    engine = PermissionEngine()
+
+    async def run() -> None:
+        assert await engine.apply(channel, [PermissionChange(everyone, Permissions.CONNECT, False)])
+        # the unlock must see the lock before the gateway sends the channel update
+        assert await engine.apply(channel, [PermissionChange(everyone, Permissions.CONNECT, None)])
+
+    asyncio.run(run())
+    assert not channel.edits
+    assert [overwrite.deny for overwrite in channel.overwrite_edits] == [Permissions.CONNECT, Permissions.NONE]
+
+
+def test_locked_edit_bucket_uses_the_overwrite_route() -> None:
+    """
+    Test that a large diff does not wait for a locked channel edit bucket.
+    """
+    channel = FakeChannel(10, [everyone_overwrite()], edit_locked=True)
+    members = [SimpleNamespace(id=member_id) for member_id in (2, 3, 4)]
+    engine = PermissionEngine()
+
+    changes = [PermissionChange(member, Permissions.CONNECT, False) for member in members]
+    assert asyncio.run(engine.apply(channel, changes))
+    assert not channel.edits
+    assert sorted(int(overwrite.id) for overwrite in channel.overwrite_edits) == [2, 3, 4]
+    assert {int(overwrite.id) for overwrite in channel.permission_overwrites} == {1, 2, 3, 4}
@@ -1,6 +1,9 @@
 import time
 from dataclasses import dataclass
 
+# custom imports
+from bot.state_backend import StateBackend, MemoryStateBackend
+
 
 @dataclass
 class RateLimitResponse:
@@ -23,9 +26,15 @@ class RateLimitManager:
     def __init__(
         self,
         rate_limit_in_seconds: int = 5,
+        backend: StateBackend = None,
+        namespace: str = "create",
     ):
         self.rate_limit = rate_limit_in_seconds
-        self.user_last_action: dict[int, int] = {}
+        self.backend = backend if backend is not None else MemoryStateBackend()
+        self.namespace = namespace
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.namespace}:{user_id}"
 
     def record_action(
         self,
@@ -34,23 +43,127 @@ class RateLimitManager:
     ) -> None:
         if current_time is None:
             current_time = int(time.time())
-        self.user_last_action[user_id] = current_time
+        self.backend.record([self._key(user_id)], current_time)
 
     def can_perform_action(self, user_id: int) -> RateLimitResponse:
-        # Check if the user is in the rate limit dictionary
-        if user_id not in self.user_last_action:
-            return RateLimitResponse(True)
-
         # Check if the user is within the rate limit
-        now = int(time.time())
-        last_action = self.user_last_action[user_id]
-
-        if now - last_action >= self.rate_limit:
+        remaining_time = self.backend.check(
+            [(self._key(user_id), self.rate_limit)]
+        )
+        if remaining_time == 0:
             return RateLimitResponse(True)
 
         # User is still within the rate limit
-        remaining_time = self.rate_limit - (now - last_action)
         return RateLimitResponse(
             False,
             remaining_time,
         )
+
+
+@dataclass(frozen=True)
+class ActionPolicy:
+    '''
+    Rate limit policy of one interface action.
+    The values are the cooldowns in seconds, 0 disables the scope.
+    '''
+    per_user: int = 0
+    per_channel: int = 0
+
+
+DEFAULT_ACTION_POLICIES: dict[str, ActionPolicy] = {
+    # general
+    "name": ActionPolicy(per_user=10, per_channel=30),
+    "status": ActionPolicy(per_user=5, per_channel=10),
+    "size": ActionPolicy(per_user=5, per_channel=5),
+    "lock": ActionPolicy(per_user=3, per_channel=3),
+    "unlock": ActionPolicy(per_user=3, per_channel=3),
+    # moderation
+    "kick": ActionPolicy(per_user=3),
+    "ban": ActionPolicy(per_user=3),
+    "invite": ActionPolicy(per_user=3),
+    # ownership
+    "show_owner": ActionPolicy(per_user=2),
+    "take_owner": ActionPolicy(per_user=5, per_channel=5),
+    "transfer_owner": ActionPolicy(per_user=5, per_channel=5),
+}
+
+
+class ActionRateLimitManager:
+    '''
+    This class is used to manage the rate limit for interface actions.
+    Every action is limited per (user, action) and per (channel, action),
+    independent of the channel creation limit of the RateLimitManager.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        policies: dict[str, ActionPolicy] = None,
+        default_policy: ActionPolicy = ActionPolicy(),
+        backend: StateBackend = None,
+    ):
+        if policies is None:
+            policies = dict(DEFAULT_ACTION_POLICIES)
+        self.policies = policies
+        self.default_policy = default_policy
+        self.backend = backend if backend is not None else MemoryStateBackend()
+
+    def get_policy(self, action: str) -> ActionPolicy:
+        return self.policies.get(action, self.default_policy)
+
+    def _limited_keys(
+        self,
+        action: str,
+        user_id: int,
+        channel_id: int = None
+    ) -> list[tuple[str, int]]:
+        '''
+        Get the composite keys of an action together with their cooldown.
+        '''
+        policy = self.get_policy(action)
+        keys = []
+        if policy.per_user:
+            keys.append((f"user:{user_id}:{action}", policy.per_user))
+        if policy.per_channel and channel_id is not None:
+            keys.append((f"channel:{channel_id}:{action}", policy.per_channel))
+        return keys
+
+    def record_action(
+        self,
+        action: str,
+        user_id: int,
+        channel_id: int = None,
+        current_time: int = None
+    ) -> None:
+        keys = [key for key, _ in self._limited_keys(action, user_id, channel_id)]
+        self.backend.record(keys, current_time)
+
+    def can_perform_action(
+        self,
+        action: str,
+        user_id: int,
+        channel_id: int = None
+    ) -> RateLimitResponse:
+        # the longest remaining cooldown of all keys wins
+        wait_time = self.backend.check(
+            self._limited_keys(action, user_id, channel_id)
+        )
+        if wait_time == 0:
+            return RateLimitResponse(True)
+        return RateLimitResponse(False, wait_time)
+
+    def acquire(
+        self,
+        action: str,
+        user_id: int,
+        channel_id: int = None
+    ) -> RateLimitResponse:
+        '''
+        Check the rate limit and record the action if it is allowed.
+        '''
+        wait_time = self.backend.acquire(
+            self._limited_keys(action, user_id, channel_id)
+        )
+        if wait_time == 0:
+            return RateLimitResponse(True)
+        return RateLimitResponse(False, wait_time)
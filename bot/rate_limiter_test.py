@@ -3,7 +3,7 @@ import time
 # pylint: disable=protected-access
 
 # custom imports
-from rate_limiter import RateLimitManager
+from bot.rate_limiter import RateLimitManager, ActionRateLimitManager, ActionPolicy
 
 
 def now(seconds: int = 0) -> int:
@@ -57,8 +57,56 @@ def test_deny_user() -> None:
         user_id), "User should not be able to perform action"
 
 
+def test_action_keys_are_independent() -> None:
+    """
+    Test that actions do not share the cooldown with each other
+    or with the channel creation limit.
+    """
+    creation_limiter = RateLimitManager(rate_limit_in_seconds=5)
+    action_limiter = ActionRateLimitManager(policies={
+        "name": ActionPolicy(per_user=10),
+        "lock": ActionPolicy(per_user=10),
+    })
+    user_id = 4
+
+    assert action_limiter.acquire("name", user_id, channel_id=100)
+    assert not action_limiter.acquire("name", user_id, channel_id=100)
+
+    assert action_limiter.acquire(
+        "lock", user_id, channel_id=100), "Other actions should not be limited"
+    assert creation_limiter.can_perform_action(
+        user_id), "Channel creation should not be limited"
+
+
+def test_action_channel_scope() -> None:
+    """
+    Test that the channel scope limits different users in the same channel.
+    """
+    action_limiter = ActionRateLimitManager(policies={
+        "name": ActionPolicy(per_user=5, per_channel=30),
+    })
+
+    assert action_limiter.acquire("name", user_id=5, channel_id=200)
+
+    denied = action_limiter.acquire("name", user_id=6, channel_id=200)
+    assert not denied, "Channel should be limited for other users"
+    assert denied._wait_time > 5, "The longest cooldown should win"
+
+    assert action_limiter.acquire(
+        "name", user_id=6, channel_id=201), "Other channels should not be limited"
+
+
+def test_action_without_policy() -> None:
+    action_limiter = ActionRateLimitManager(policies={})
+    for _ in range(3):
+        assert action_limiter.acquire("unknown", user_id=7, channel_id=300)
+
+
 if __name__ == '__main__':
     test_not_registered_user()
     test_allow_user()
     test_deny_user()
+    test_action_keys_are_independent()
+    test_action_channel_scope()
+    test_action_without_policy()
     print("All tests passed.")
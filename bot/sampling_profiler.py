@@ -0,0 +1,73 @@
+'''
+A sampling CPU profiler for the thread of the event loop.
+
+A profiler thread reads the stack of the loop thread at a fixed interval.
+The samples are written as collapsed stacks (one "frame;frame;frame count"
+line per stack), the input format of flamegraph.pl, speedscope and inferno.
+Idle time of the loop shows up as the selector of the loop.
+'''
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+DEFAULT_PROFILE_DIR = "profiles"
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse(frame) -> str:
+    '''Get the collapsed stack of a frame, the outermost frame first.'''
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    '''
+    This class samples the stack of one thread.
+    run blocks, the event loop calls it in a thread.
+    '''
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.duration = 0.0
+
+    def run(self, duration: float, stop: Optional[threading.Event] = None) -> None:
+        started_at = time.monotonic()
+        deadline = started_at + duration
+        while time.monotonic() < deadline and not (stop and stop.is_set()):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+                self.samples += 1
+            # the frame must not keep the locals of the thread alive
+            del frame
+            time.sleep(self.interval)
+        self.duration = time.monotonic() - started_at
+
+    def top_functions(self, count: int = 5) -> list[tuple[str, int]]:
+        '''Get the functions with the most samples on top of the stack (self time).'''
+        functions: Counter[str] = Counter()
+        for stack, samples in self.stacks.items():
+            functions[stack.rsplit(";", 1)[-1]] += samples
+        return functions.most_common(count)
+
+    def write(self, path: str) -> str:
+        '''Write the collapsed stacks to the path.'''
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, samples in self.stacks.most_common():
+                file.write(f"{stack} {samples}\n")
+        return path
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import threading
+
+# custom imports
+from bot.sampling_profiler import SamplingProfiler
+
+
+def busy(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_writes_collapsed_stacks() -> None:
+    stop = threading.Event()
+    thread = threading.Thread(target=busy, args=(stop,))
+    thread.start()
+    try:
+        profiler = SamplingProfiler(thread.ident, interval=0.001)
+        profiler.run(0.1)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert profiler.samples > 0
+    assert any("sampling_profiler_test.py:busy" in stack for stack in profiler.stacks)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = profiler.write(os.path.join(directory, "profile.folded"))
+        with open(path, encoding="utf-8") as file:
+            stack, samples = file.readline().rsplit(" ", 1)
+    assert stack.startswith("threading.py:_bootstrap")
+    assert int(samples) > 0
@@ -0,0 +1,287 @@
+'''
+The graceful shutdown of the bot and the snapshot of its state.
+
+On SIGTERM or SIGINT the bot stops accepting new voice and button work and
+waits for the running work (creations, deletions, interaction responses and
+channel edits) up to a deadline. Then it writes a snapshot of the registry,
+the rate limits and the edits that are still pending, flushes the audit log
+and stops the client.
+
+The next start reads the snapshot before it connects. The rate limits are
+restored right away, the registry and the pending edits once the guilds are
+received. A snapshot is only used once, an older one is never restored
+after a crash. Without a snapshot the channels are recovered from the
+registry of the state backend, it is written while the bot runs.
+'''
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional
+
+# custom imports
+from bot.state_backend import ChannelRecord
+from bot.channel_manager import TempChannel
+
+DEFAULT_SNAPSHOT_PATH = "state_snapshot.json"
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class StateSnapshot:
+    channels: list[ChannelRecord] = field(default_factory=list)
+    rate_limits: dict[str, int] = field(default_factory=dict)
+    # channel id -> fields of the PendingEdit
+    pending_edits: dict[int, dict] = field(default_factory=dict)
+    # channel id -> times of the last renames
+    rename_history: dict[int, list[float]] = field(default_factory=dict)
+    created_at: int = field(default_factory=lambda: int(time.time()))
+
+    def to_dict(self) -> dict:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "created_at": self.created_at,
+            "channels": [asdict(record) for record in self.channels],
+            "rate_limits": self.rate_limits,
+            "pending_edits": self.pending_edits,
+            "rename_history": self.rename_history
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StateSnapshot':
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unknown snapshot version {data.get('version')}")
+        return cls(
+            channels=[ChannelRecord(**record) for record in data["channels"]],
+            rate_limits=data["rate_limits"],
+            # json keys are strings
+            pending_edits={int(key): edit for key, edit in data["pending_edits"].items()},
+            rename_history={int(key): history for key, history in data["rename_history"].items()},
+            created_at=data["created_at"]
+        )
+
+
+def write_snapshot(path: str, snapshot: StateSnapshot) -> None:
+    '''Write the snapshot atomically, a crash never leaves half a file.'''
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(snapshot.to_dict(), file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def take_snapshot(path: str) -> Optional[StateSnapshot]:
+    '''Read and remove the snapshot, returns None if there is none.'''
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return StateSnapshot.from_dict(data)
+
+
+def make_snapshot(client) -> StateSnapshot:
+    '''Collect the state of the components bound to the client.'''
+    cec = client.cec
+    return StateSnapshot(
+        channels=[tempchannel.to_record() for tempchannel in client.tcm.channels.values()],
+        rate_limits=client.state.dump_rate_limits(),
+        pending_edits={
+            channel_id: {
+                "name": edit.name,
+                "status": edit.status,
+                "user_limit": edit.user_limit,
+                "reason": edit.reason
+            }
+            for channel_id, edit in cec.pending.items()
+            if edit
+        },
+        rename_history={
+            channel_id: list(bucket.history)
+            for channel_id, bucket in cec.rename_buckets.items()
+            if bucket.history
+        }
+    )
+
+
+class GracefulShutdown:
+    '''
+    This class drains the work of the bot, writes the snapshot and stops the client.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+        deadline: float = 10.0
+    ):
+        self.logger = logger
+        self.snapshot_path = snapshot_path
+        self.deadline = deadline
+        self.draining = False
+        # the voice and button handlers that are running
+        self.tasks: set[asyncio.Task] = set()
+        # read on the start, the registry is restored once the guilds are received
+        self.snapshot: Optional[StateSnapshot] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def work(self) -> Iterator[None]:
+        '''Track the current task until it is done, the shutdown waits for it.'''
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            yield
+        finally:
+            self.tasks.discard(task)
+
+    def load(self, client) -> Optional[StateSnapshot]:
+        '''Read the snapshot of the last shutdown and restore the rate limits.'''
+        try:
+            self.snapshot = take_snapshot(self.snapshot_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.error(f"Failed to read the state snapshot {self.snapshot_path}: {e}")
+            self.snapshot = None
+        if self.snapshot:
+            client.state.load_rate_limits(self.snapshot.rate_limits)
+        return self.snapshot
+
+    async def restore(self, client) -> list[int]:
+        '''
+        Register the channels of the snapshot that still exist and submit their pending edits.
+        Without a snapshot the channels of the registry are registered, the bot crashed.
+        Returns the ids of the restored channels.
+        '''
+        snapshot, self.snapshot = self.snapshot, None
+        if not snapshot:
+            # the registry is shared with the other shards, it is read in a thread
+            records = await asyncio.to_thread(client.state.get_channels)
+            restored = self.register(client, records)
+            if restored:
+                self.logger.info(f"Recovered {len(restored)} channels from the registry")
+            return restored
+
+        restored = self.register(client, snapshot.channels)
+        tcm = client.tcm
+        cec = client.cec
+        for channel_id, history in snapshot.rename_history.items():
+            if channel_id in tcm.channels:
+                cec._get_rename_bucket(channel_id).history.extend(history)
+        for channel_id, edit in snapshot.pending_edits.items():
+            if channel_id in tcm.channels:
+                cec.submit(tcm.channels[channel_id].channel, **edit)
+
+        self.logger.info(
+            f"Restored {len(restored)}/{len(snapshot.channels)} channels and "
+            f"{len(snapshot.pending_edits)} pending edits from the snapshot"
+        )
+        return restored
+
+    def register(self, client, records: list[ChannelRecord]) -> list[int]:
+        '''
+        Register the channels of the records that still exist, returns their ids.
+        Records of deleted channels in the guilds of this shard are removed from the registry.
+        '''
+        tcm = client.tcm
+        restored = []
+        for record in records:
+            channel = client.cache.get_channel(record.channel_id)
+            if channel is None:
+                # the guilds of the other shards are not in the cache
+                if client.cache.get_guild(record.guild_id) is not None:
+                    client.state.remove_channel(record.channel_id)
+                continue
+            if record.channel_id in tcm.channels:
+                continue
+            tcm._add_channel(
+                TempChannel(channel=channel, owner=record.owner_id, created_at=record.created_at)
+            )
+            restored.append(record.channel_id)
+        return restored
+
+    async def delete_emptied(self, client, channel_ids: list[int]) -> list[int]:
+        '''
+        Delete the restored channels that emptied while the bot was offline.
+        Returns the ids of the deleted channels.
+        '''
+        tcm = client.tcm
+        deleted = []
+        for channel_id in channel_ids:
+            tempchannel = tcm.get_channel_by_id(channel_id)
+            if tempchannel is None or not tcm.is_empty(channel_id):
+                continue
+            if await tcm.delete_channel(channel=tempchannel.channel):
+                client.cec.forget_channel(channel_id)
+                client.pe.forget_channel(channel_id)
+                deleted.append(channel_id)
+        return deleted
+
+    def install_signal_handlers(self, client) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.request, client, signal.Signals(signum).name)
+            except NotImplementedError:
+                # windows has no signal handlers on the loop
+                return
+
+    def request(self, client, reason: str) -> None:
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run(client, reason))
+
+    async def drain(self, client) -> int:
+        '''Wait for the running work up to the deadline, returns the number of unfinished tasks.'''
+        current = asyncio.current_task()
+        cec = client.cec
+        ready_by = time.time() + self.deadline
+        # a throttled rename may wait for minutes, its edit is kept in the snapshot instead
+        edit_tasks = {
+            task for channel_id, task in cec.tasks.items()
+            if channel_id not in cec.pending or cec._ready_at(channel_id, cec.pending[channel_id]) <= ready_by
+        }
+        tasks = self.tasks | client.irp.tasks | edit_tasks
+        tasks.discard(current)
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        return len(pending)
+
+    async def run(self, client, reason: str) -> None:
+        self.draining = True
+        started_at = time.monotonic()
+        self.logger.info(f"Shutting down ({reason}), waiting up to {self.deadline:.0f}s for running work")
+
+        unfinished = await self.drain(client)
+        if unfinished:
+            self.logger.warning(f"{unfinished} tasks did not finish before the deadline")
+
+        snapshot = make_snapshot(client)
+        await asyncio.to_thread(write_snapshot, self.snapshot_path, snapshot)
+        # the audit writer commits everything that is queued
+        await asyncio.to_thread(client.audit.close)
+
+        client.llm.stop()
+        if client.metrics_server:
+            await client.metrics_server.close()
+
+        self.logger.info(
+            f"Wrote the snapshot of {len(snapshot.channels)} channels to {self.snapshot_path}, "
+            f"shutdown took {time.monotonic() - started_at:.2f}s"
+        )
+        try:
+            await client.stop()
+        except Exception as e:
+            # a signal between the login and the gateway connection
+            self.logger.error(f"Failed to stop the client: {e}")
+        finally:
+            client.state.close()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+# custom imports
+from bot.channel_manager import TempChannelManager
+from bot.edit_coalescer import ChannelEditCoalescer
+from bot.permission_engine import PermissionEngine
+from bot.rate_limiter import RateLimitManager
+from bot.shutdown import GracefulShutdown, StateSnapshot, take_snapshot, write_snapshot
+from bot.state_backend import ChannelRecord, MemoryStateBackend
+
+
+class FakeChannel:
+    """
+    A voice channel that records its deletion.
+    """
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.name = f"channel {channel_id}"
+        self.parent_id = None
+        self.guild = SimpleNamespace(id=3)
+        self.bot = SimpleNamespace(logger=logging.getLogger(__name__))
+        self.deleted = False
+
+    async def delete(self, reason: str = None) -> None:
+        self.deleted = True
+
+
+def test_snapshot_is_read_once() -> None:
+    snapshot = StateSnapshot(
+        channels=[ChannelRecord(1, 2, 3, 1000)],
+        rate_limits={"create:3": 1000},
+        pending_edits={1: {"name": "a", "status": None, "user_limit": None, "reason": None}},
+        rename_history={1: [999.5]}
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.json")
+        write_snapshot(path, snapshot)
+
+        assert take_snapshot(path) == snapshot
+        # a crash after this start must not restore the same state again
+        assert take_snapshot(path) is None
+
+
+def test_rate_limits_are_restored_on_load() -> None:
+    state = MemoryStateBackend()
+    state.record(["create:3"], current_time=2000)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.json")
+        write_snapshot(path, StateSnapshot(rate_limits={"create:3": 1000, "create:4": 1000}))
+
+        shutdown = GracefulShutdown(logging.getLogger(__name__), path)
+        shutdown.load(SimpleNamespace(state=state))
+
+    # the newer action of this process wins
+    assert state.dump_rate_limits() == {"create:3": 2000, "create:4": 1000}
+
+
+def test_drain_waits_for_running_work() -> None:
+    shutdown = GracefulShutdown(logging.getLogger(__name__), deadline=1.0)
+    client = SimpleNamespace(irp=SimpleNamespace(tasks=set()), cec=ChannelEditCoalescer())
+    finished = []
+
+    async def handler(delay: float) -> None:
+        with shutdown.work():
+            await asyncio.sleep(delay)
+            finished.append(delay)
+
+    async def run() -> int:
+        tasks = [asyncio.create_task(handler(delay)) for delay in (0.01, 0.05)]
+        await asyncio.sleep(0)
+        unfinished = await shutdown.drain(client)
+        await asyncio.gather(*tasks)
+        return unfinished
+
+    assert asyncio.run(run()) == 0
+    assert finished == [0.01, 0.05]
+
+
+def test_drain_stops_at_the_deadline() -> None:
+    shutdown = GracefulShutdown(logging.getLogger(__name__), deadline=0.05)
+    client = SimpleNamespace(irp=SimpleNamespace(tasks=set()), cec=ChannelEditCoalescer())
+
+    async def handler() -> None:
+        with shutdown.work():
+            await asyncio.sleep(10)
+
+    async def run() -> int:
+        task = asyncio.create_task(handler())
+        await asyncio.sleep(0)
+        unfinished = await shutdown.drain(client)
+        task.cancel()
+        return unfinished
+
+    assert asyncio.run(run()) == 1
+
+
+def test_drain_skips_throttled_renames() -> None:
+    shutdown = GracefulShutdown(logging.getLogger(__name__), deadline=0.5)
+    cec = ChannelEditCoalescer(debounce=0.01)
+    client = SimpleNamespace(irp=SimpleNamespace(tasks=set()), cec=cec)
+
+    async def run() -> int:
+        channel = FakeChannel(1)
+        # both renames of the window are used up
+        cec._get_rename_bucket(channel.id).history.extend([time.time(), time.time()])
+        cec.submit(channel, name="throttled")
+        unfinished = await asyncio.wait_for(shutdown.drain(client), timeout=1)
+        cec.forget_channel(channel.id)
+        return unfinished
+
+    assert asyncio.run(run()) == 0, "The drain should not wait for a rename after the deadline"
+
+
+def make_client(channels: list[FakeChannel]) -> SimpleNamespace:
+    cached = {channel.id: channel for channel in channels}
+    # the guild of the fake channels is the only guild of this shard
+    guilds = {3: SimpleNamespace(id=3)}
+    state = MemoryStateBackend()
+    return SimpleNamespace(
+        cache=SimpleNamespace(get_channel=cached.get, get_guild=guilds.get),
+        state=state,
+        tcm=TempChannelManager(rate_limiter=RateLimitManager(), backend=state),
+        cec=ChannelEditCoalescer(debounce=60),
+        pe=PermissionEngine()
+    )
+
+
+def test_restore_registers_existing_channels() -> None:
+    shutdown = GracefulShutdown(logging.getLogger(__name__))
+    shutdown.snapshot = StateSnapshot(
+        channels=[ChannelRecord(1, 3, 100, 1000), ChannelRecord(2, 3, 200, 1000)],
+        pending_edits={
+            1: {"name": "a", "status": None, "user_limit": None, "reason": None},
+            2: {"name": "b", "status": None, "user_limit": None, "reason": None}
+        },
+        rename_history={1: [999.5]}
+    )
+    # the second channel was deleted while the bot was offline
+    client = make_client([FakeChannel(1)])
+
+    async def run() -> list[int]:
+        restored = await shutdown.restore(client)
+        assert client.cec.pending[1].name == "a"
+        assert 2 not in client.cec.pending, "Edits of missing channels should be dropped"
+        client.cec.forget_channel(1)
+        return restored
+
+    assert asyncio.run(run()) == [1]
+    assert client.tcm.get_channel_by_id(1).owner_id == 100
+    assert client.tcm.get_channels_by_owner(100), "The restored owner should be indexed"
+    assert asyncio.run(shutdown.restore(client)) == [], "A snapshot should only be restored once"
+
+
+def test_restore_recovers_from_the_registry() -> None:
+    shutdown = GracefulShutdown(logging.getLogger(__name__))
+    client = make_client([FakeChannel(1)])
+    # the registry of a crashed process, without a snapshot
+    client.state.set_channel(ChannelRecord(1, 3, 100, 1000))
+    client.state.set_channel(ChannelRecord(2, 3, 200, 1000))
+    client.state.set_channel(ChannelRecord(5, 4, 300, 1000))
+
+    assert asyncio.run(shutdown.restore(client)) == [1]
+    assert client.tcm.get_channel_by_id(1).owner_id == 100
+    assert client.state.get_channel(2) is None, "Deleted channels should be removed from the registry"
+    assert client.state.get_channel(5) is not None, "Channels of other shards should be kept"
+
+
+def test_emptied_channels_are_deleted() -> None:
+    shutdown = GracefulShutdown(logging.getLogger(__name__))
+    shutdown.snapshot = StateSnapshot(
+        channels=[ChannelRecord(1, 3, 100, 1000), ChannelRecord(2, 3, 200, 1000)]
+    )
+    channels = [FakeChannel(1), FakeChannel(2)]
+    client = make_client(channels)
+    # only the first channel still has a member
+    client.tcm.seed_occupancy([(1, 100)])
+
+    async def run() -> list[int]:
+        return await shutdown.delete_emptied(client, await shutdown.restore(client))
+
+    deleted = asyncio.run(run())
+
+    assert deleted == [2]
+    assert not channels[0].deleted
+    assert channels[1].deleted
+    assert client.tcm.get_channel_by_id(1) is not None
+    assert client.tcm.get_channel_by_id(2) is None
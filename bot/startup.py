@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Optional
+
+
+class StartupTimer:
+    '''
+    This class measures the phases of the startup.
+    Sequential phases are marked when they end, background phases
+    (like the config loading) record their own duration.
+    An instance of this class is bound to the client.
+    '''
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.last_mark = self.started_at
+        self.phases: dict[str, float] = {}
+        self.background: dict[str, float] = {}
+        self.finished = False
+        self.lock = threading.Lock()
+
+    def mark(self, phase: str) -> float:
+        '''End a sequential phase, returns its duration.'''
+        with self.lock:
+            now = time.perf_counter()
+            self.phases[phase] = now - self.last_mark
+            self.last_mark = now
+            return self.phases[phase]
+
+    def record(self, phase: str, duration: float) -> None:
+        '''Record a phase that ran in the background.'''
+        with self.lock:
+            self.background[phase] = duration
+
+    def finish(self) -> float:
+        '''Mark the startup as finished, returns the total duration.'''
+        self.finished = True
+        return self.last_mark - self.started_at
+
+    def report(self) -> str:
+        total = self.last_mark - self.started_at
+        parts = [f"{phase} {duration:.2f}s" for phase, duration in self.phases.items()]
+        parts += [f"{phase} {duration:.2f}s (background)" for phase, duration in self.background.items()]
+        return f"Startup took {total:.2f}s: " + " | ".join(parts)
@@ -0,0 +1,22 @@
+# custom imports
+from bot.startup import StartupTimer
+
+
+def test_report_phases() -> None:
+    timer = StartupTimer(started_at=0)
+    timer.last_mark = 0
+    timer.phases = {"imports": 0.5, "extensions": 0.25}
+    timer.last_mark = 0.75
+    timer.record("config", 0.1)
+
+    assert timer.finish() == 0.75
+    assert timer.report() == "Startup took 0.75s: imports 0.50s | extensions 0.25s | config 0.10s (background)"
+
+
+def test_mark_is_sequential() -> None:
+    timer = StartupTimer()
+    first = timer.mark("imports")
+    second = timer.mark("extensions")
+
+    assert first >= 0 and second >= 0
+    assert list(timer.phases) == ["imports", "extensions"]
@@ -0,0 +1,412 @@
+'''
+State backends for the rate limiters and the temp channel registry.
+
+The MemoryStateBackend keeps the state in the memory of one process.
+The SQLiteStateBackend stores the state in a SQLite database in WAL mode,
+so multiple bot processes on one host can share it.
+
+Every operation takes all keys at once, so a rate limit check is a single
+query and a check-and-record is a single transaction. The registry outlives
+the process, after a crash the next start restores the channels from it. Rate limits older
+than the longest cooldown are pruned, so the state does not grow with
+every user that ever clicked a button.
+'''
+
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# rate limits older than this can not block an action anymore
+DEFAULT_MAX_AGE = 3600
+# seconds between two prunes of the rate limits
+PRUNE_INTERVAL = 60
+# the cooldown of an action that could not be recorded because the database is locked
+BUSY_WAIT_TIME = 1
+
+
+@dataclass
+class ChannelRecord:
+    '''
+    The part of a temp channel that can be shared between processes.
+    '''
+    channel_id: int
+    guild_id: int
+    owner_id: int
+    created_at: int
+
+
+class StateBackend(ABC):
+    '''
+    Base class of all state backends.
+    '''
+
+    def __init__(self, max_age: int = DEFAULT_MAX_AGE):
+        self.max_age = max_age
+        self.pruned_at = 0
+
+    # raw: rate limits
+    @abstractmethod
+    def check(
+        self,
+        limits: list[tuple[str, int]],
+        current_time: int = None
+    ) -> int:
+        '''
+        Get the longest remaining cooldown of the given (key, seconds) pairs.
+        0 means that the action is allowed.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def record(
+        self,
+        keys: Iterable[str],
+        current_time: int = None
+    ) -> None:
+        '''Record an action for all given keys.'''
+        raise NotImplementedError
+
+    @abstractmethod
+    def acquire(
+        self,
+        limits: list[tuple[str, int]],
+        current_time: int = None
+    ) -> int:
+        '''
+        Check and record the keys in one atomic step.
+        Returns the remaining cooldown, the keys are only recorded if it is 0.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def rate_limit_entries(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def prune(self, older_than: int) -> int:
+        '''
+        Delete the rate limits whose last action is older than the timestamp.
+        Returns the number of deleted entries.
+        '''
+        raise NotImplementedError
+
+    def maybe_prune(self, current_time: int) -> None:
+        '''Prune the rate limits at most once per PRUNE_INTERVAL.'''
+        if current_time - self.pruned_at < PRUNE_INTERVAL:
+            return
+        self.pruned_at = current_time
+        self.prune(current_time - self.max_age)
+
+    def dump_rate_limits(self) -> dict[str, int]:
+        '''
+        Get the rate limits for the snapshot of a shutdown.
+        Backends that store the state outside of the process return nothing.
+        '''
+        return {}
+
+    def load_rate_limits(self, last_actions: dict[str, int]) -> None:
+        '''Restore the rate limits of a snapshot.'''
+
+    # raw: registry
+    @abstractmethod
+    def set_channel(self, record: ChannelRecord) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove_channel(self, channel_id: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_channel(self, channel_id: int) -> Optional[ChannelRecord]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_channels(self) -> list[ChannelRecord]:
+        '''Get the registered channels of every process, may block on the database.'''
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        '''Block until the own registry writes can be read.'''
+
+    def close(self) -> None:
+        pass
+
+
+def remaining_time(
+    last_action: Optional[int],
+    rate_limit: int,
+    current_time: int
+) -> int:
+    if last_action is None:
+        return 0
+    if current_time - last_action >= rate_limit:
+        return 0
+    return rate_limit - (current_time - last_action)
+
+
+class MemoryStateBackend(StateBackend):
+    '''
+    Keeps the state in the memory of the current process.
+    '''
+
+    def __init__(self, max_age: int = DEFAULT_MAX_AGE):
+        super().__init__(max_age)
+        self.last_action: dict[str, int] = {}
+        self.channels: dict[int, ChannelRecord] = {}
+
+    def check(self, limits, current_time=None) -> int:
+        if current_time is None:
+            current_time = int(time.time())
+        wait_time = 0
+        for key, rate_limit in limits:
+            wait_time = max(
+                wait_time,
+                remaining_time(self.last_action.get(key), rate_limit, current_time)
+            )
+        return wait_time
+
+    def record(self, keys, current_time=None) -> None:
+        if current_time is None:
+            current_time = int(time.time())
+        for key in keys:
+            self.last_action[key] = current_time
+        self.maybe_prune(current_time)
+
+    def acquire(self, limits, current_time=None) -> int:
+        if current_time is None:
+            current_time = int(time.time())
+        wait_time = self.check(limits, current_time)
+        if wait_time == 0:
+            self.record([key for key, _ in limits], current_time)
+        return wait_time
+
+    def rate_limit_entries(self) -> int:
+        return len(self.last_action)
+
+    def prune(self, older_than: int) -> int:
+        expired = [key for key, last_action in self.last_action.items() if last_action < older_than]
+        for key in expired:
+            del self.last_action[key]
+        return len(expired)
+
+    def dump_rate_limits(self) -> dict[str, int]:
+        return dict(self.last_action)
+
+    def load_rate_limits(self, last_actions: dict[str, int]) -> None:
+        # newer actions of this process win
+        for key, last_action in last_actions.items():
+            self.last_action[key] = max(self.last_action.get(key, 0), last_action)
+
+    def set_channel(self, record: ChannelRecord) -> None:
+        self.channels[record.channel_id] = record
+
+    def remove_channel(self, channel_id: int) -> None:
+        self.channels.pop(channel_id, None)
+
+    def get_channel(self, channel_id: int) -> Optional[ChannelRecord]:
+        return self.channels.get(channel_id)
+
+    def get_channels(self) -> list[ChannelRecord]:
+        return list(self.channels.values())
+
+
+class SQLiteStateBackend(StateBackend):
+    '''
+    Stores the state in a SQLite database in WAL mode.
+    Every process opens its own connection to the same file.
+
+    The rate limits are checked on the event loop, a locked database is
+    waited for at most busy_timeout_ms. The registry is written by a writer
+    thread and read with its own connection, the reads belong in a thread
+    (asyncio.to_thread), the startup reads it to recover from a crash.
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_ms: int = 100,
+        max_age: int = DEFAULT_MAX_AGE
+    ):
+        super().__init__(max_age)
+        self.path = path
+        # actions that were denied or not recorded because the database was locked
+        self.busy = 0
+        # registry writes the writer thread could not commit
+        self.failed_writes = 0
+        self.connection = self._connect(busy_timeout_ms)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit (
+                key TEXT PRIMARY KEY,
+                last_action INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS rate_limit_last_action ON rate_limit (last_action);
+            CREATE TABLE IF NOT EXISTS temp_channel (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                owner_id INTEGER NOT NULL,
+                created_at INTEGER NOT NULL
+            );
+            """
+        )
+
+        # (sql, parameters) of the registry, None stops the writer
+        self.writes: queue.Queue[Optional[tuple[str, tuple]]] = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name="state-backend-writer", daemon=True)
+        self.thread.start()
+
+    def _connect(self, busy_timeout_ms: int) -> sqlite3.Connection:
+        # autocommit mode, transactions are started explicitly
+        connection = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        return connection
+
+    def _writer(self) -> None:
+        # the writer may wait longer for the lock, it does not block the loop
+        connection = self._connect(busy_timeout_ms=5000)
+        while True:
+            write = self.writes.get()
+            try:
+                if write is None:
+                    break
+                connection.execute(*write)
+            except sqlite3.Error:
+                self.failed_writes += 1
+            finally:
+                self.writes.task_done()
+        connection.close()
+
+    def _select_last_actions(self, keys: list[str]) -> dict[str, int]:
+        placeholders = ",".join("?" * len(keys))
+        rows = self.connection.execute(
+            f"SELECT key, last_action FROM rate_limit WHERE key IN ({placeholders})",
+            keys
+        )
+        return dict(rows.fetchall())
+
+    def _upsert_last_actions(self, keys: Iterable[str], current_time: int) -> None:
+        self.connection.executemany(
+            "INSERT INTO rate_limit (key, last_action) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET last_action = excluded.last_action",
+            [(key, current_time) for key in keys]
+        )
+
+    def check(self, limits, current_time=None) -> int:
+        if not limits:
+            return 0
+        if current_time is None:
+            current_time = int(time.time())
+        last_actions = self._select_last_actions([key for key, _ in limits])
+        wait_time = 0
+        for key, rate_limit in limits:
+            wait_time = max(
+                wait_time,
+                remaining_time(last_actions.get(key), rate_limit, current_time)
+            )
+        return wait_time
+
+    def record(self, keys, current_time=None) -> None:
+        if current_time is None:
+            current_time = int(time.time())
+        try:
+            self._upsert_last_actions(keys, current_time)
+            self.maybe_prune(current_time)
+        except sqlite3.OperationalError:
+            # the action already happened, it is not recorded
+            self.busy += 1
+
+    def acquire(self, limits, current_time=None) -> int:
+        if not limits:
+            return 0
+        if current_time is None:
+            current_time = int(time.time())
+
+        # BEGIN IMMEDIATE takes the write lock, so no other process can
+        # record the same key between the check and the record
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            # a locked database denies the action, nothing is recorded twice
+            self.busy += 1
+            return BUSY_WAIT_TIME
+        try:
+            wait_time = self.check(limits, current_time)
+            if wait_time == 0:
+                self._upsert_last_actions([key for key, _ in limits], current_time)
+                self.maybe_prune(current_time)
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+        return wait_time
+
+    def rate_limit_entries(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0]
+
+    def prune(self, older_than: int) -> int:
+        return self.connection.execute(
+            "DELETE FROM rate_limit WHERE last_action < ?",
+            (older_than,)
+        ).rowcount
+
+    def set_channel(self, record: ChannelRecord) -> None:
+        self.writes.put_nowait((
+            "INSERT OR REPLACE INTO temp_channel (channel_id, guild_id, owner_id, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (record.channel_id, record.guild_id, record.owner_id, record.created_at)
+        ))
+
+    def remove_channel(self, channel_id: int) -> None:
+        self.writes.put_nowait((
+            "DELETE FROM temp_channel WHERE channel_id = ?",
+            (channel_id,)
+        ))
+
+    def flush(self) -> None:
+        '''Block until the queued registry writes are committed.'''
+        self.writes.join()
+
+    def _select_channels(self, where: str = "", parameters: tuple = ()) -> list[ChannelRecord]:
+        # the connection of the loop is not shared with the reading thread
+        connection = self._connect(busy_timeout_ms=5000)
+        try:
+            rows = connection.execute(
+                f"SELECT channel_id, guild_id, owner_id, created_at FROM temp_channel {where}",
+                parameters
+            ).fetchall()
+        finally:
+            connection.close()
+        return [ChannelRecord(*row) for row in rows]
+
+    def get_channel(self, channel_id: int) -> Optional[ChannelRecord]:
+        records = self._select_channels("WHERE channel_id = ?", (channel_id,))
+        return records[0] if records else None
+
+    def get_channels(self) -> list[ChannelRecord]:
+        return self._select_channels()
+
+    def close(self) -> None:
+        # the queued registry writes are committed first
+        if self.thread.is_alive():
+            self.writes.put(None)
+            self.thread.join()
+        self.connection.close()
+
+
+def make_state_backend(path: str = None) -> StateBackend:
+    '''
+    Create the SQLiteStateBackend if a path is given, otherwise the MemoryStateBackend.
+    '''
+    if path:
+        return SQLiteStateBackend(path)
+    return MemoryStateBackend()
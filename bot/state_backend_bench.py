@@ -0,0 +1,91 @@
+'''
+Multi-process benchmark of the SQLiteStateBackend.
+
+Every process tries to acquire the same keys at the same time.
+Exactly one process may win each key, otherwise the backend is not safe
+under contention.
+
+usage: python -m bot.state_backend_bench [processes] [rounds]
+'''
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+
+# custom imports
+from bot.state_backend import ChannelRecord, SQLiteStateBackend
+
+
+def worker(
+    path: str,
+    worker_id: int,
+    rounds: int,
+    start: multiprocessing.Event,
+    results: multiprocessing.Queue
+) -> None:
+    backend = SQLiteStateBackend(path)
+    start.wait()
+
+    wins = 0
+    timings = []
+    for round_id in range(rounds):
+        # every process uses the same keys and the same time
+        limits = [(f"user:{round_id}:name", 60), (f"channel:{round_id}:name", 60)]
+        t = time.perf_counter()
+        if backend.acquire(limits, current_time=1000) == 0:
+            wins += 1
+        timings.append(time.perf_counter() - t)
+
+        # every process registers its own channels
+        backend.set_channel(
+            ChannelRecord(worker_id * rounds + round_id, 1, worker_id, 1000)
+        )
+
+    backend.close()
+    results.put((wins, timings))
+
+
+def main(processes: int = 4, rounds: int = 2000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.db")
+        SQLiteStateBackend(path).close()
+
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=worker,
+                args=(path, worker_id, rounds, start, results)
+            )
+            for worker_id in range(processes)
+        ]
+        for p in workers:
+            p.start()
+
+        t = time.perf_counter()
+        start.set()
+        collected = [results.get() for _ in workers]
+        for p in workers:
+            p.join()
+        duration = time.perf_counter() - t
+
+        total_wins = sum(wins for wins, _ in collected)
+        timings = sorted(timing for _, worker_timings in collected for timing in worker_timings)
+        registered = len(SQLiteStateBackend(path).get_channels())
+
+    operations = processes * rounds
+    print(f"processes:   {processes}")
+    print(f"operations:  {operations} in {duration:.2f}s ({operations / duration:.0f} ops/s)")
+    print(f"acquire p50: {timings[len(timings) // 2] * 1e6:.0f}us")
+    print(f"acquire p99: {timings[int(len(timings) * 0.99)] * 1e6:.0f}us")
+    print(f"wins:        {total_wins} (expected {rounds})")
+    print(f"channels:    {registered} (expected {operations})")
+
+    assert total_wins == rounds, "A key was acquired by more than one process"
+    assert registered == operations, "A channel record was lost"
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,91 @@
+import os
+import tempfile
+
+# custom imports
+from bot.state_backend import (
+    ChannelRecord,
+    MemoryStateBackend,
+    SQLiteStateBackend,
+    StateBackend
+)
+
+
+def check_rate_limits(backend: StateBackend) -> None:
+    limits = [("user:1:name", 10), ("channel:2:name", 30)]
+
+    assert backend.acquire(limits, current_time=100) == 0, "First action should be allowed"
+    assert backend.acquire(limits, current_time=105) == 25, "Longest cooldown should win"
+    assert backend.check(limits, current_time=130) == 0, "Cooldown should be over"
+    assert backend.rate_limit_entries() == 2
+
+
+def check_prune(backend: StateBackend) -> None:
+    backend.acquire([("user:1:name", 10)], current_time=1000)
+    backend.acquire([("user:2:name", 10)], current_time=5000)
+
+    # user 1 is older than max_age, its entry is deleted with the next record
+    backend.record(["user:3:name"], current_time=5100)
+    assert backend.rate_limit_entries() == 2, "Expired entries should be pruned"
+    assert backend.check([("user:2:name", 10)], current_time=5005) == 5
+
+
+def check_registry(backend: StateBackend) -> None:
+    backend.set_channel(ChannelRecord(10, 1, 100, 1000))
+    backend.set_channel(ChannelRecord(11, 1, 101, 1001))
+    backend.set_channel(ChannelRecord(10, 1, 102, 1000))
+    backend.flush()
+
+    assert backend.get_channel(10).owner_id == 102, "Owner should be updated"
+    assert len(backend.get_channels()) == 2
+
+    backend.remove_channel(11)
+    backend.remove_channel(12)
+    backend.flush()
+    assert backend.get_channel(11) is None
+    assert len(backend.get_channels()) == 1
+
+
+def test_memory_backend() -> None:
+    check_rate_limits(MemoryStateBackend())
+    check_prune(MemoryStateBackend(max_age=3600))
+    check_registry(MemoryStateBackend())
+
+
+def test_sqlite_backend() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteStateBackend(os.path.join(directory, "state.db"))
+        check_rate_limits(backend)
+        check_registry(backend)
+        backend.close()
+
+        backend = SQLiteStateBackend(os.path.join(directory, "prune.db"), max_age=3600)
+        check_prune(backend)
+        backend.close()
+
+
+def test_sqlite_backend_is_shared() -> None:
+    """
+    Test that two connections to the same file see the same state.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.db")
+        first = SQLiteStateBackend(path)
+        second = SQLiteStateBackend(path)
+
+        assert first.acquire([("create:1", 5)], current_time=100) == 0
+        assert second.acquire([("create:1", 5)], current_time=101) == 4
+
+        first.set_channel(ChannelRecord(10, 1, 100, 1000))
+        # the registry is written by the writer thread of the first connection
+        first.flush()
+        assert second.get_channel(10) == ChannelRecord(10, 1, 100, 1000)
+
+        first.close()
+        second.close()
+
+
+if __name__ == '__main__':
+    test_memory_backend()
+    test_sqlite_backend()
+    test_sqlite_backend_is_shared()
+    print("All tests passed.")
@@ -0,0 +1,170 @@
+'''
+Runs one bot process per shard and restarts processes that exit.
+
+interactions.py connects one shard per Client, so every process owns
+exactly one shard. The processes are started with the spawn method,
+they do not inherit any state or event loop of the supervisor.
+
+Discord lets one shard per max_concurrency bucket identify every 5
+seconds, the first start of the shards is spaced accordingly.
+A shard that receives /reload sends RELOAD_SIGNAL to the supervisor,
+which forwards it to every shard process.
+'''
+
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import Callable, Optional
+
+# a process that ran shorter than this is restarted with a longer delay
+STABLE_UPTIME = 60.0
+# the seconds between the identifies of one max_concurrency bucket
+IDENTIFY_INTERVAL = 5.0
+# reloads the configs of every shard, not available on windows
+RELOAD_SIGNAL = getattr(signal, "SIGHUP", None)
+
+
+def next_restart_delay(
+    previous_delay: float,
+    uptime: float,
+    min_delay: float = 5.0,
+    max_delay: float = 300.0
+) -> float:
+    '''
+    Double the delay for a process that keeps crashing, reset it after a stable run.
+    '''
+    if uptime >= STABLE_UPTIME:
+        return min_delay
+    return min(max(previous_delay * 2, min_delay), max_delay)
+
+
+class ShardProcess:
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.restart_delay = 0.0
+        # set while the shard waits for its restart
+        self.restart_at: Optional[float] = None
+        self.restarts = 0
+
+
+class ShardSupervisor:
+    '''
+    This class starts, monitors and restarts the shard processes.
+    The target is called with (shard_id, total_shards) in a new process.
+    '''
+
+    def __init__(
+        self,
+        target: Callable[[int, int], None],
+        total_shards: int,
+        logger: logging.Logger,
+        poll_interval: float = 1.0,
+        min_restart_delay: float = 5.0,
+        max_restart_delay: float = 300.0,
+        max_concurrency: int = 1,
+        identify_interval: float = IDENTIFY_INTERVAL
+    ):
+        self.target = target
+        self.total_shards = total_shards
+        self.logger = logger
+        self.poll_interval = poll_interval
+        self.min_restart_delay = min_restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.max_concurrency = max(1, max_concurrency)
+        self.identify_interval = identify_interval
+        self.context = multiprocessing.get_context("spawn")
+        self.shards = [ShardProcess(shard_id) for shard_id in range(total_shards)]
+        self.running = False
+
+    def start_shard(self, shard: ShardProcess) -> None:
+        shard.process = self.context.Process(
+            target=self.target,
+            args=(shard.shard_id, self.total_shards),
+            name=f"shard-{shard.shard_id}"
+        )
+        shard.process.start()
+        shard.started_at = time.monotonic()
+        self.logger.info(f"Started shard {shard.shard_id}/{self.total_shards} (pid {shard.process.pid})")
+
+    def start_delay(self, shard_id: int) -> float:
+        '''Get the delay of the first start of a shard, one bucket identifies at a time.'''
+        return (shard_id // self.max_concurrency) * self.identify_interval
+
+    def check_shard(self, shard: ShardProcess) -> None:
+        '''Schedule or run the restart of a shard whose process exited.'''
+        now = time.monotonic()
+        # not started yet
+        if shard.process is None or shard.process.is_alive():
+            return
+
+        # the process just exited
+        if shard.restart_at is None:
+            uptime = now - shard.started_at
+            shard.restart_delay = next_restart_delay(
+                shard.restart_delay,
+                uptime,
+                self.min_restart_delay,
+                self.max_restart_delay
+            )
+            shard.restart_at = now + shard.restart_delay
+            self.logger.error(
+                f"Shard {shard.shard_id} exited with code {shard.process.exitcode} after {uptime:.0f}s, "
+                f"restarting in {shard.restart_delay:.0f}s"
+            )
+            return
+
+        if now >= shard.restart_at:
+            shard.restart_at = None
+            shard.restarts += 1
+            self.start_shard(shard)
+
+    def run(self) -> None:
+        '''Start all shards and watch them until stop is called or a signal arrives.'''
+        self.running = True
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+        if RELOAD_SIGNAL is not None:
+            signal.signal(RELOAD_SIGNAL, lambda *_: self.reload())
+
+        started_at = time.monotonic()
+        for shard in self.shards:
+            # wait for the identify slot of the bucket of the shard
+            while self.running and time.monotonic() < started_at + self.start_delay(shard.shard_id):
+                time.sleep(min(self.poll_interval, self.identify_interval))
+            if not self.running:
+                break
+            self.start_shard(shard)
+
+        while self.running:
+            time.sleep(self.poll_interval)
+            for shard in self.shards:
+                if self.running:
+                    self.check_shard(shard)
+
+        self.shutdown()
+
+    def stop(self) -> None:
+        self.running = False
+
+    def reload(self) -> None:
+        '''Forward a config reload to every running shard.'''
+        for shard in self.shards:
+            if shard.process and shard.process.is_alive():
+                os.kill(shard.process.pid, RELOAD_SIGNAL)
+        self.logger.info("Reloading the configs of all shards")
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        '''Terminate the shard processes and wait for them.'''
+        for shard in self.shards:
+            if shard.process and shard.process.is_alive():
+                shard.process.terminate()
+        for shard in self.shards:
+            if shard.process:
+                shard.process.join(timeout)
+                if shard.process.is_alive():
+                    shard.process.kill()
+        self.logger.info("All shards stopped")
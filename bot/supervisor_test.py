@@ -0,0 +1,56 @@
+import logging
+
+# custom imports
+from bot.supervisor import ShardSupervisor, next_restart_delay
+
+
+class FakeProcess:
+    def __init__(self, alive: bool = True, exitcode: int = None):
+        self.alive = alive
+        self.exitcode = exitcode
+        self.pid = 1
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def start(self) -> None:
+        self.alive = True
+
+
+def test_restart_delay() -> None:
+    assert next_restart_delay(0, uptime=1, min_delay=5) == 5
+    assert next_restart_delay(5, uptime=1, min_delay=5) == 10, "A crash loop should back off"
+    assert next_restart_delay(200, uptime=1, max_delay=300) == 300
+    assert next_restart_delay(200, uptime=3600, min_delay=5) == 5, "A stable run should reset the delay"
+
+
+def test_exited_shard_is_restarted() -> None:
+    supervisor = ShardSupervisor(
+        target=print,
+        total_shards=2,
+        logger=logging.getLogger(__name__),
+        min_restart_delay=0
+    )
+    supervisor.context = type("Context", (), {"Process": lambda self, **kwargs: FakeProcess()})()
+    for shard in supervisor.shards:
+        supervisor.start_shard(shard)
+
+    shard = supervisor.shards[1]
+    shard.process.alive = False
+    shard.process.exitcode = 1
+
+    supervisor.check_shard(shard)  # schedules the restart
+    supervisor.check_shard(shard)  # restarts the shard
+    assert shard.restarts == 1
+    assert shard.process.is_alive()
+    assert supervisor.shards[0].restarts == 0
+
+
+def test_start_delay_per_identify_bucket() -> None:
+    supervisor = ShardSupervisor(
+        target=print,
+        total_shards=6,
+        logger=logging.getLogger(__name__),
+        max_concurrency=2
+    )
+    assert [supervisor.start_delay(shard_id) for shard_id in range(6)] == [0, 0, 5, 5, 10, 10]
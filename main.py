@@ -1,10 +1,17 @@
+# the startup timing starts before the heavy imports
+import time
+STARTED_AT = time.perf_counter()
 
 # .env imports
 import os
+import signal
 from dotenv import load_dotenv
 
 # custom imports
 from bot.client import make_client, make_logger
+from bot.supervisor import ShardSupervisor, RELOAD_SIGNAL
+from bot.startup import StartupTimer
+from bot.performance import run_client
 
 
 load_dotenv()
@@ -12,13 +19,58 @@ load_dotenv()
 __version__ = "1.3.4"
 
 
-def main() -> None:
+def snapshot_path(path: str, shard_id: int, total_shards: int) -> str:
+    if total_shards == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.shard{shard_id}{extension}"
+
+
+def run_shard(shard_id: int = 0, total_shards: int = 1) -> None:
+    # a config reload before the login must not end the process, the handler is installed on login
+    if total_shards > 1 and RELOAD_SIGNAL is not None:
+        signal.signal(RELOAD_SIGNAL, signal.SIG_IGN)
+
+    logger_name = __name__ if total_shards == 1 else f"{__name__}.shard{shard_id}"
     bot = make_client(
         version=__version__,
         bot_token=os.getenv("DISCORD_BOT_TOKEN"),
-        logger=make_logger(__name__)
+        logger=make_logger(logger_name),
+        state_path=os.getenv("STATE_DB_PATH"),
+        audit_path=os.getenv("AUDIT_DB_PATH", "audit.db"),
+        shard_id=shard_id,
+        total_shards=total_shards,
+        startup_timer=StartupTimer(started_at=STARTED_AT),
+        # PERFORMANCE_PROFILE=1 runs on uvloop and reports orjson, see bot/performance.py
+        performance=os.getenv("PERFORMANCE_PROFILE", "0") == "1",
+        # members without a voice state expire, MEMBER_CACHE_SIZE=0 caches every member
+        member_cache_ttl=int(os.getenv("MEMBER_CACHE_TTL", "600")),
+        member_cache_size=int(os.getenv("MEMBER_CACHE_SIZE", "10000")),
+        # METRICS_PORT serves /metrics, every shard uses the next port
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        metrics_port=int(os.getenv("METRICS_PORT")) + shard_id if os.getenv("METRICS_PORT") else None,
+        # every shard keeps the snapshot of its own registry
+        snapshot_path=snapshot_path(os.getenv("SNAPSHOT_PATH", "state_snapshot.json"), shard_id, total_shards),
+        shutdown_deadline=float(os.getenv("SHUTDOWN_DEADLINE", "10"))
+    )
+    run_client(bot, bot.performance)
+
+
+def main() -> None:
+    # SHARD_COUNT > 1 runs one process per shard under a supervisor
+    total_shards = int(os.getenv("SHARD_COUNT", "1"))
+    if total_shards <= 1:
+        run_shard()
+        return
+
+    supervisor = ShardSupervisor(
+        target=run_shard,
+        total_shards=total_shards,
+        logger=make_logger(f"{__name__}.supervisor"),
+        # the max_concurrency of GET /gateway/bot, shards of one bucket identify together
+        max_concurrency=int(os.getenv("SHARD_MAX_CONCURRENCY", "1"))
     )
-    bot.start()
+    supervisor.run()
 
 
 if __name__ == '__main__':